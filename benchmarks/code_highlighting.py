@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+benchmarks.code_highlighting
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measures the throughput of rendering a corpus of posts with code blocks
+if the pygments lexer and formatter are looked up for every block (as
+``FlaskBBRenderer.block_code`` did before) compared to the cached lexers,
+the shared formatter and the size cap for huge blocks.
+
+Usage::
+
+    python benchmarks/code_highlighting.py [--rounds 20] [--posts 200]
+
+:copyright: (c) 2026 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import mistune
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+from flaskbb.markup import FlaskBBRenderer, make_renderer
+
+SNIPPETS = {
+    "python": 'def hello(name):\n    return f"Hello {name}!"\n',
+    "javascript": "const hello = (name) => `Hello ${name}!`;\n",
+    "sql": "SELECT id, title FROM topics WHERE forum_id = 1 ORDER BY id;\n",
+    "bash": "pip install flaskbb && flaskbb install\n",
+    "html": '<div class="post">{{ post.content }}</div>\n',
+    "ini": "[flaskbb]\nSQLALCHEMY_DATABASE_URI = sqlite://\n",
+    "unknownlang": "this is not highlighted\n",
+}
+TEXT = "I've tried this, but it doesn't work. Any ideas?\n\n"
+
+
+class UncachedRenderer(FlaskBBRenderer):
+    """The code highlighting as it was done before."""
+
+    def block_code(self, code, info=None):
+        if info:
+            try:
+                lexer = get_lexer_by_name(info, stripall=True)
+            except ClassNotFound:
+                lexer = None
+        else:
+            lexer = None
+        if not lexer:
+            return "\n<pre><code>%s</code></pre>\n" % mistune.escape(code)
+        formatter = HtmlFormatter()
+        return highlight(code, lexer, formatter)
+
+
+def make_corpus(posts: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(posts):
+        text = TEXT
+        for _ in range(rnd.randint(1, 4)):
+            alias = rnd.choice(list(SNIPPETS))
+            code = SNIPPETS[alias] * rnd.randint(1, 10)
+            text += f"```{alias}\n{code}```\n\n"
+        corpus.append(text)
+    # a few pasted logs which are far too large to be worth highlighting
+    log = 'Traceback (most recent call last):\n  File "app.py", line 1\n'
+    for _ in range(max(1, posts // 50)):
+        corpus.append(f"{TEXT}```python\n{log * 2000}```\n")
+    return corpus
+
+
+def measure(render, corpus: list[str], rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in corpus:
+            render(text)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float], posts: int):
+    median = statistics.median(timings)
+    print(f"{name:<20} median {median * 1000:9.2f} ms   {posts / median:9.1f} posts/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.posts)
+    print(f"{len(corpus)} posts, {args.rounds} rounds")
+    report(
+        "uncached",
+        measure(make_renderer([UncachedRenderer]), corpus, args.rounds),
+        len(corpus),
+    )
+    report(
+        "cached",
+        measure(make_renderer([FlaskBBRenderer]), corpus, args.rounds),
+        len(corpus),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+benchmarks.markdown_preview
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measures how long the markdown preview of a 20 KB post with code blocks
+takes if the renderer is built for every request (as the preview did
+before) compared to reusing the renderer set up by
+``flaskbb_jinja_directives`` and to a repeated (debounced) preview.
+
+Usage::
+
+    python benchmarks/markdown_preview.py [--rounds 50]
+
+:copyright: (c) 2026 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import argparse
+import statistics
+import time
+
+from flaskbb import create_app
+from flaskbb.configs.testing import TestingConfig
+from flaskbb.extensions import pluggy
+from flaskbb.markup import DEFAULT_PLUGINS, make_renderer
+
+PARAGRAPH = (
+    "Hey @admin, I've tried to **upgrade** my board but ~~it~~ something "
+    "fails. Here is what I did, see the [docs](https://flaskbb.org):\n\n"
+)
+CODE = """```python
+def create_app(config=None):
+    app = Flask("flaskbb")
+    for extension in (db, cache, limiter):
+        extension.init_app(app)
+    return app
+```
+
+"""
+
+
+def make_post(size: int = 20 * 1024) -> str:
+    text = ""
+    while len(text) < size:
+        text += PARAGRAPH + CODE
+    return text
+
+
+def measure(render, text: str, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        render(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    print(
+        f"{name:<24} median {statistics.median(timings):8.2f} ms   "
+        f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app(TestingConfig)
+    text = make_post()
+
+    def per_request(text):
+        # what the preview did before: a new renderer without the plugins
+        classes = pluggy.hook.flaskbb_load_post_markdown_class(app=app)
+        return make_renderer(classes)(text)
+
+    def per_request_with_plugins(text):
+        classes = pluggy.hook.flaskbb_load_post_markdown_class(app=app)
+        plugins = DEFAULT_PLUGINS[:]
+        pluggy.hook.flaskbb_load_post_markdown_plugins(plugins=plugins, app=app)
+        return make_renderer(classes, plugins)(text)
+
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.config["MARKDOWN_PREVIEW_RATE_LIMIT"] = "1000000/minute"
+    client = app.test_client()
+
+    def endpoint(text):
+        return client.post("/markdown", data=text)
+
+    with app.test_request_context():
+        memoised = app.jinja_env.filters["markup"]
+        print(f"Preview of a {len(text) / 1024:.1f} KB post, {args.rounds} rounds")
+        report("before (no plugins)", measure(per_request, text, args.rounds))
+        report(
+            "renderer per request",
+            measure(per_request_with_plugins, text, args.rounds),
+        )
+        report("memoised renderer", measure(memoised, text, args.rounds))
+        report("repeated preview", measure(endpoint, text, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
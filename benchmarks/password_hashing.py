@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+benchmarks.password_hashing
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measures the logins per second of one app server worker for a few hash
+methods, and how long cheap requests wait while a burst of logins hits
+that worker. The worker is simulated by a pool of request threads. A
+login either hashes on its request thread or on the bounded pool of the
+password hasher.
+
+Usage::
+
+    python benchmarks/password_hashing.py [--logins 64] [--threads 8]
+
+:copyright: (c) 2026 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flaskbb.utils.passwords import PasswordHasher, PasswordHasherBusy
+
+METHODS = ["pbkdf2:sha256:600000", "scrypt:32768:8:1", "scrypt:16384:8:1"]
+
+
+def login(hasher: PasswordHasher, pwhash: str) -> bool:
+    """Returns if the password was verified or the login refused."""
+    try:
+        hasher.verify(pwhash, "wrong password")
+        return True
+    except PasswordHasherBusy:
+        return False
+
+
+def cheap_request(submitted: float) -> float:
+    """Returns how long the request waited for a request thread."""
+    return time.perf_counter() - submitted
+
+
+def burst(hasher: PasswordHasher, pwhash: str, logins: int, threads: int):
+    """Sends the logins with a cheap request after every login to a worker
+    with ``threads`` request threads."""
+    waits = []
+    with ThreadPoolExecutor(max_workers=threads) as worker:
+        start = time.perf_counter()
+        futures = []
+        for _ in range(logins):
+            futures.append(worker.submit(login, hasher, pwhash))
+            waits.append(worker.submit(cheap_request, time.perf_counter()))
+        verified = sum(future.result() for future in futures)
+        elapsed = time.perf_counter() - start
+    waits = sorted(future.result() for future in waits)
+    return verified, elapsed, waits
+
+
+def report(name: str, logins: int, verified: int, elapsed: float, waits: list[float]):
+    p95 = waits[int(len(waits) * 0.95) - 1]
+    print(
+        f"{name:<36} {verified / elapsed:6.1f} logins/s "
+        f"({logins - verified:3} refused)   cheap requests wait "
+        f"median {statistics.median(waits) * 1000:7.1f} ms, p95 {p95 * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins, {args.threads} request threads per worker")
+    for method in METHODS:
+        inline = PasswordHasher(method=method)
+        pwhash = inline.hash("password")
+        report(
+            f"{method} inline",
+            args.logins,
+            *burst(inline, pwhash, args.logins, args.threads),
+        )
+
+        pooled = PasswordHasher(
+            method=method,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            timeout=args.timeout,
+        )
+        report(
+            f"{method} {args.workers} hash workers",
+            args.logins,
+            *burst(pooled, pwhash, args.logins, args.threads),
+        )
+
+
+if __name__ == "__main__":
+    main()
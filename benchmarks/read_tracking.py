@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+benchmarks.read_tracking
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compares the per topic read trackers (``topicsread`` and ``forumsread``)
+with the read marks in a temporary SQLite database: how many rows they
+need, how long it takes to convert the trackers into read marks and how
+fast both answer if the topics of a page are unread and how many topics
+of a forum are unread.
+
+The board of the request is ``--users 100000 --topics 100000``, the
+defaults are scaled down so that the benchmark runs in a minute.
+
+Usage::
+
+    python benchmarks/read_tracking.py [--users 10000] [--topics 10000]
+
+:copyright: (c) 2026 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from flask import current_app
+
+from flaskbb import create_app
+from flaskbb.configs.testing import TestingConfig
+from flaskbb.extensions import db
+from flaskbb.forum.models import ForumsRead, ReadMark, Topic, TopicsRead
+from flaskbb.utils.helpers import time_utcnow
+from flaskbb.utils.populate import create_default_groups, create_default_settings
+
+BATCH = 10_000
+
+
+class Reader(object):
+    """Stands in for a logged in user."""
+
+    is_authenticated = True
+
+    def __init__(self, id):
+        self.id = id
+
+
+def populate(users: int, topics: int, forums: int, reads: int, days: int):
+    """Creates the topics and lets every user read ``reads`` random topics
+    and mark one forum as read during the last ``days`` days."""
+    now = time_utcnow()
+
+    def some_time():
+        return now - timedelta(seconds=random.uniform(0, days * 86400))
+
+    rows = []
+    for topic_id in range(1, topics + 1):
+        created = some_time()
+        rows.append(
+            {
+                "id": topic_id,
+                "forum_id": topic_id % forums + 1,
+                "title": "Topic {}".format(topic_id),
+                "username": "test",
+                "date_created": created,
+                "last_updated": created,
+            }
+        )
+    for start in range(0, len(rows), BATCH):
+        db.session.execute(db.insert(Topic), rows[start : start + BATCH])
+
+    topicsread, forumsread = [], []
+    for user_id in range(1, users + 1):
+        for topic_id in random.sample(range(1, topics + 1), min(reads, topics)):
+            topicsread.append(
+                {
+                    "user_id": user_id,
+                    "topic_id": topic_id,
+                    "forum_id": topic_id % forums + 1,
+                    "last_read": some_time(),
+                }
+            )
+        cleared = some_time()
+        forumsread.append(
+            {
+                "user_id": user_id,
+                "forum_id": random.randint(1, forums),
+                "last_read": cleared,
+                "cleared": cleared,
+            }
+        )
+        if len(topicsread) >= BATCH:
+            db.session.execute(db.insert(TopicsRead), topicsread)
+            topicsread = []
+    if topicsread:
+        db.session.execute(db.insert(TopicsRead), topicsread)
+    db.session.execute(db.insert(ForumsRead), forumsread)
+    db.session.commit()
+
+
+def table_size(name: str) -> str:
+    """Returns the size of a table and its indexes if SQLite has been
+    compiled with the dbstat table."""
+    try:
+        size = db.session.execute(
+            db.text(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = :name "
+                "OR name IN (SELECT name FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = :name)"
+            ),
+            {"name": name},
+        ).scalar()
+    except Exception:
+        db.session.rollback()
+        return "n/a"
+    return "{:.1f} MB".format((size or 0) / 1024 / 1024)
+
+
+def tracker_unread_count(user_id: int, forum_id: int, cutoff) -> int:
+    """The unread count of :meth:`~flaskbb.forum.models.Forum.update_read`."""
+    return db.session.execute(
+        db.select(db.func.count())
+        .select_from(Topic)
+        .outerjoin(
+            TopicsRead,
+            db.and_(TopicsRead.topic_id == Topic.id, TopicsRead.user_id == user_id),
+        )
+        .outerjoin(
+            ForumsRead,
+            db.and_(
+                ForumsRead.forum_id == Topic.forum_id,
+                ForumsRead.user_id == user_id,
+            ),
+        )
+        .filter(
+            Topic.forum_id == forum_id,
+            Topic.last_updated > cutoff,
+            db.or_(
+                TopicsRead.last_read.is_(None),
+                TopicsRead.last_read < Topic.last_updated,
+            ),
+            db.or_(
+                ForumsRead.last_read.is_(None),
+                ForumsRead.last_read < Topic.last_updated,
+            ),
+        )
+    ).scalar_one()
+
+
+def tracker_unread_page(user_id: int, page: list[Topic]) -> int:
+    """Looks up the trackers of a page of topics like the forum view."""
+    read = dict(
+        db.session.execute(
+            db.select(TopicsRead.topic_id, TopicsRead.last_read).where(
+                TopicsRead.user_id == user_id,
+                TopicsRead.topic_id.in_([topic.id for topic in page]),
+            )
+        ).all()
+    )
+    return sum(
+        read.get(topic.id) is None or read[topic.id] < topic.last_updated
+        for topic in page
+    )
+
+
+def readmark_unread_page(user_id: int, forum_id: int, page: list[Topic]) -> int:
+    mark = ReadMark.for_user(Reader(user_id), forum_id)
+    return sum(mark.is_unread(topic) for topic in page)
+
+
+def readmark_unread_count(user_id: int, forum_id: int) -> int:
+    return ReadMark.for_user(Reader(user_id), forum_id).unread_count()
+
+
+def timed(name: str, rounds: int, func, *args_for_round):
+    """Runs every round in its own request, like a page view."""
+    start = time.perf_counter()
+    for args in args_for_round:
+        with current_app.test_request_context():
+            func(*args)
+        db.session.expunge_all()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<34} {rounds / elapsed:8.0f} ops/s ({elapsed / rounds * 1000:.2f} ms)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--topics", type=int, default=10_000)
+    parser.add_argument("--forums", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+    random.seed(0)
+
+    tmp = tempfile.mkdtemp(prefix="flaskbb-readtracking-")
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "flaskbb.sqlite")
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        create_default_groups()
+        create_default_settings()
+
+        print(
+            f"{args.users} users, {args.topics} topics in {args.forums} forums, "
+            f"{args.reads} read topics per user"
+        )
+        populate(args.users, args.topics, args.forums, args.reads, args.days)
+
+        start = time.perf_counter()
+        written = ReadMark.migrate_trackers(batch_size=1000)
+        print(f"migrated to {written} read marks in {time.perf_counter() - start:.1f}s")
+
+        for name, model in [
+            ("topicsread", TopicsRead),
+            ("forumsread", ForumsRead),
+            ("readmarks", ReadMark),
+        ]:
+            rows = db.session.execute(
+                db.select(db.func.count()).select_from(model)
+            ).scalar()
+            print(f"{name:<12} {rows:10} rows {table_size(name):>12}")
+
+        cutoff = time_utcnow() - timedelta(days=args.days)
+        samples = [
+            (random.randint(1, args.users), random.randint(1, args.forums))
+            for _ in range(args.rounds)
+        ]
+        pages = {
+            forum_id: db.session.execute(
+                db.select(Topic)
+                .where(Topic.forum_id == forum_id)
+                .order_by(Topic.last_updated.desc())
+                .limit(20)
+            )
+            .scalars()
+            .all()
+            for forum_id in range(1, args.forums + 1)
+        }
+        db.session.expunge_all()
+
+        timed(
+            "trackers: unread topics of a page",
+            args.rounds,
+            tracker_unread_page,
+            *[(user_id, pages[forum_id]) for user_id, forum_id in samples],
+        )
+        timed(
+            "readmarks: unread topics of a page",
+            args.rounds,
+            readmark_unread_page,
+            *[(user_id, forum_id, pages[forum_id]) for user_id, forum_id in samples],
+        )
+        timed(
+            "trackers: unread count of a forum",
+            args.rounds,
+            tracker_unread_count,
+            *[(user_id, forum_id, cutoff) for user_id, forum_id in samples],
+        )
+        timed(
+            "readmarks: unread count of a forum",
+            args.rounds,
+            readmark_unread_count,
+            *samples,
+        )
+
+
+if __name__ == "__main__":
+    main()
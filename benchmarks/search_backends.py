@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+benchmarks.search_backends
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compares the index and query throughput of the search backends. The
+board is generated with ``insert_bulk_data`` in a temporary SQLite
+database (the database backend uses FTS5 there).
+
+Usage::
+
+    python benchmarks/search_backends.py [--topics 100] [--posts 100] [--rounds 200]
+
+:copyright: (c) 2026 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from flaskbb import create_app
+from flaskbb.configs.testing import TestingConfig
+from flaskbb.extensions import db
+from flaskbb.utils.populate import create_test_data, insert_bulk_data
+from flaskbb.utils.search import PostWhoosheer, SearchReindexer, TopicWhoosheer
+from flaskbb.utils.search_backends import search_backends
+
+QUERIES = ["post", "other", "first", "title", "some other", "test title"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="flaskbb-search-")
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "flaskbb.sqlite")
+        WHOOSHEE_MEMORY_STORAGE = False
+        WHOOSHEE_DIR = os.path.join(tmp, "whoosh")
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        create_test_data()
+        insert_bulk_data(args.topics, args.posts)
+
+        whoosheers = {"post": PostWhoosheer, "topic": TopicWhoosheer}
+        print(
+            f"{args.topics} topics with {args.posts} posts each, "
+            f"{args.rounds} rounds of {len(QUERIES)} queries"
+        )
+        for name, backend_cls in search_backends.items():
+            backend = app.extensions["search_backend"] = backend_cls()
+
+            start = time.perf_counter()
+            indexed = SearchReindexer(whoosheers).run()
+            elapsed = time.perf_counter() - start
+            documents = sum(indexed.values())
+
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for query in QUERIES:
+                    backend.search(PostWhoosheer, query, 500)
+            queries = args.rounds * len(QUERIES)
+            query_time = time.perf_counter() - start
+
+            print(
+                f"{name:<10} index {documents / elapsed:9.0f} docs/s   "
+                f"query {queries / query_time:8.0f} queries/s "
+                f"({query_time / queries * 1000:.2f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ from datetime import UTC, datetime
 from typing import Any
 
 from celery import Celery
-from flask import Flask, request
+from flask import Flask, g, request
 from flask_login import current_user
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
@@ -48,7 +48,7 @@ from flaskbb.plugins.models import PluginRegistry
 from flaskbb.plugins.utils import remove_zombie_plugins_from_db, template_hook
 
 # models
-from flaskbb.user.models import Guest, User
+from flaskbb.user.models import GROUPS_VERSION_REQUEST_KEY, Guest, User
 
 # various helpers
 from flaskbb.utils.helpers import (
@@ -64,12 +64,13 @@ from flaskbb.utils.helpers import (
     mark_online,
     render_template,
     time_since,
-    time_utcnow,
     topic_is_unread,
 )
+from flaskbb.utils.passwords import password_hasher
 
 # permission checks (here they are used for the jinja filters)
 from flaskbb.utils.requirements import (
+    REQUIREMENTS_REQUEST_KEY,
     CanBanUser,
     CanEditUser,
     IsAdmin,
@@ -84,12 +85,8 @@ from flaskbb.utils.requirements import (
 )
 
 # whooshees
-from flaskbb.utils.search import (
-    ForumWhoosheer,
-    PostWhoosheer,
-    TopicWhoosheer,
-    UserWhoosheer,
-)
+from flaskbb.utils.search import search_index_queue, whoosheers
+from flaskbb.utils.search_backends import make_search_backend
 
 # app specific configurations
 from flaskbb.utils.settings import flaskbb_config
@@ -100,8 +97,10 @@ from .auth import views as auth_views  # noqa
 from .deprecation import FlaskBBDeprecation
 from .display.navigation import NavigationContentType
 from .forum import views as forum_views  # noqa
+from .forum.counters import topic_view_counter
 from .management import views as management_views  # noqa
 from .user import views as user_views  # noqa
+from .user.presence import lastseen_writer
 
 logger = logging.getLogger(__name__)
 
@@ -241,6 +240,32 @@ def configure_celery_app(app: Flask, celery: Celery):
 
     celery.Task = ContextTask
 
+    # periodic tasks, only run if a celery beat scheduler is running.
+    # Entries with the same name in the CELERY_CONFIG take precedence.
+    periodic_tasks = {
+        "flush-topic-views": (
+            "flaskbb.forum.counters.flush_topic_views",
+            app.config["TOPIC_VIEWS_FLUSH_INTERVAL"],
+        ),
+        "flush-lastseen": (
+            "flaskbb.user.presence.flush_lastseen",
+            app.config["LASTSEEN_FLUSH_INTERVAL"],
+        ),
+        "flush-search-index": (
+            "flaskbb.utils.search.flush_search_index",
+            app.config["SEARCH_INDEX_FLUSH_INTERVAL"],
+        ),
+        "prune-trackers": (
+            "flaskbb.forum.trackers.prune_trackers",
+            app.config["TRACKER_PRUNE_INTERVAL"],
+        ),
+    }
+    for name, (task, schedule) in periodic_tasks.items():
+        if schedule is not None:
+            celery.conf.beat_schedule.setdefault(
+                name, {"task": task, "schedule": schedule}
+            )
+
 
 def configure_blueprints(app: Flask):
     pluggy.hook.flaskbb_load_blueprints(app=app)
@@ -279,14 +304,18 @@ def configure_extensions(app: Flask):
     # Flask-Limiter
     limiter.init_app(app)
 
-    # Flask-Whooshee
+    # Password hashing
+    password_hasher.init_app(app)
+
+    # Flask-Whooshee and the search backend
     whooshee.init_app(app)
+    make_search_backend(app)
     # not needed for unittests - and it will speed up testing A LOT
     if not app.testing:
-        whooshee.register_whoosheer(PostWhoosheer)
-        whooshee.register_whoosheer(TopicWhoosheer)
-        whooshee.register_whoosheer(ForumWhoosheer)
-        whooshee.register_whoosheer(UserWhoosheer)
+        for whoosheer in whoosheers:
+            whooshee.register_whoosheer(whoosheer)
+            search_index_queue.register(whoosheer)
+    search_index_queue.init_app(app)
 
     # Flask-Login
     login_manager.login_view = app.config["LOGIN_VIEW"]
@@ -372,11 +401,10 @@ def configure_before_handlers(app: Flask):
     @app.before_request
     def update_lastseen():
         """Updates `lastseen` before every reguest if the user is
-        authenticated."""
+        authenticated. The updates are throttled and written in batches
+        by the :class:`~flaskbb.user.presence.LastseenWriter`."""
         if current_user.is_authenticated:
-            current_user.lastseen = time_utcnow()
-            db.session.add(current_user)
-            db.session.commit()
+            lastseen_writer.touch(current_user)
 
     if app.config["REDIS_ENABLED"]:
 
@@ -387,6 +415,21 @@ def configure_before_handlers(app: Flask):
             else:
                 mark_online(request.remote_addr, guest=True)
 
+    # writes the buffered topic views and lastseen dates to the database
+    # from time to time
+    topic_view_counter.init_app(app)
+    lastseen_writer.init_app(app)
+
+    # drops the settings that have been memoized for the request
+    app.teardown_request(flaskbb_config.teardown_request)
+
+    @app.teardown_request
+    def drop_request_memos(exc: BaseException | None = None):
+        # ``g`` outlives the request if an app context has been pushed
+        # before (e.g. in the CLI or the tests)
+        g.pop(GROUPS_VERSION_REQUEST_KEY, None)
+        g.pop(REQUIREMENTS_REQUEST_KEY, None)
+
     pluggy.hook.flaskbb_request_processors(app=app)
 
 
@@ -17,12 +17,14 @@ from ..user.models import User
 from ..utils.settings import flaskbb_config
 from . import impl
 from .services.authentication import (
+    BlockTooManyFailedLogins,
     BlockUnactivatedUser,
     ClearFailedLogins,
     DefaultFlaskBBAuthProvider,
     MarkFailedLogin,
 )
 from .services.factories import account_activator_factory
+from .services.lockout import failed_login_configuration
 from .services.reauthentication import (
     ClearFailedLoginsOnReauth,
     DefaultFlaskBBReauthProvider,
@@ -39,9 +41,18 @@ from .services.registration import (
 )
 
 
+@impl(tryfirst=True, specname="flaskbb_authenticate")
+def block_too_many_failed_logins(identifier, secret, attempt):
+    configuration = failed_login_configuration()
+    if configuration.limit or configuration.ip_limit:
+        BlockTooManyFailedLogins(configuration).authenticate(
+            identifier, secret, attempt
+        )
+
+
 @impl(trylast=True)
-def flaskbb_authenticate(identifier, secret):
-    return DefaultFlaskBBAuthProvider().authenticate(identifier, secret)
+def flaskbb_authenticate(identifier, secret, attempt):
+    return DefaultFlaskBBAuthProvider().authenticate(identifier, secret, attempt)
 
 
 @impl(tryfirst=True)
@@ -56,8 +67,8 @@ def flaskbb_post_authenticate(user):
 
 
 @impl
-def flaskbb_authentication_failed(identifier):
-    MarkFailedLogin().handle_authentication_failure(identifier)
+def flaskbb_authentication_failed(identifier, attempt):
+    MarkFailedLogin().handle_authentication_failure(identifier, attempt)
 
 
 @impl(trylast=True)
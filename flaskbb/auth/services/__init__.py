@@ -13,10 +13,10 @@ submodules.
 
 from .activation import AccountActivator
 from .authentication import (
+    AuthenticationAttempt,
     BlockTooManyFailedLogins,
     BlockUnactivatedUser,
     DefaultFlaskBBAuthProvider,
-    FailedLoginConfiguration,
     MarkFailedLogin,
     PluginAuthenticationManager,
 )
@@ -27,6 +27,12 @@ from .factories import (
     registration_service_factory,
     reset_service_factory,
 )
+from .lockout import (
+    DatabaseLockoutStore,
+    FailedLoginConfiguration,
+    LockoutStore,
+    RedisLockoutStore,
+)
 from .password import ResetPasswordService
 from .registration import (
     EmailUniquenessValidator,
@@ -38,15 +44,19 @@ from .registration import (
 __all__ = (
     "AccountActivator",
     "account_activator_factory",
+    "AuthenticationAttempt",
     "authentication_manager_factory",
     "BlockTooManyFailedLogins",
     "BlockUnactivatedUser",
+    "DatabaseLockoutStore",
     "DefaultFlaskBBAuthProvider",
     "EmailUniquenessValidator",
     "FailedLoginConfiguration",
+    "LockoutStore",
     "MarkFailedLogin",
     "PluginAuthenticationManager",
     "reauthentication_manager_factory",
+    "RedisLockoutStore",
     "registration_service_factory",
     "ResetPasswordService",
     "reset_service_factory",
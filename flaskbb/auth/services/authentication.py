@@ -11,70 +11,116 @@ in FlaskBB
 """
 
 import logging
-from datetime import datetime
 
-import attr
+from flask import has_request_context, request
 from flask_babelplus import gettext as _
-from pytz import UTC
-from werkzeug.security import check_password_hash
 
 from ...core.auth.authentication import (
     AuthenticationFailureHandler,
     AuthenticationManager,
     AuthenticationProvider,
+    AuthenticationUnavailable,
     PostAuthenticationHandler,
     StopAuthentication,
 )
 from ...extensions import db
 from ...user.models import User
-from ...utils.helpers import time_utcnow
+from ...utils.passwords import PasswordHasherBusy, password_hasher
+from .lockout import lockout_store_factory
 
 logger = logging.getLogger(__name__)
 
 
-@attr.s(frozen=True)
-class FailedLoginConfiguration(object):
+def identifier_filter(identifier):
     """
-    Used to configure how many failed logins are accepted until an account
-    is temporarily locked out and how long to temporarily lock the account
-    out for.
+    Returns a filter that matches the user with the identifier as username
+    or email. Each side of the ``UNION`` uses the unique index of its
+    column, unlike an ``OR`` across both columns.
     """
+    matches = db.union(
+        db.select(User.id).where(User.username == identifier),
+        db.select(User.id).where(User.email == identifier),
+    )
+    return User.id.in_(matches.scalar_subquery())
 
-    limit = attr.ib()
-    lockout_window = attr.ib()
+
+def find_user(identifier):
+    """
+    Returns the user with the identifier as username or email or ``None``.
+    """
+    return db.session.execute(
+        db.select(User).where(identifier_filter(identifier))
+    ).scalar_one_or_none()
+
+
+class AuthenticationAttempt(object):
+    """
+    Holds the state of one login attempt that is shared by the
+    ``flaskbb_authenticate`` and ``flaskbb_authentication_failed`` hooks,
+    so that the user is only looked up once per attempt.
+
+    :param str identifier: The identifier the user has entered.
+    :param str remote_addr: The IP address the attempt came from, defaults
+        to the address of the current request.
+    """
+
+    def __init__(self, identifier, remote_addr=None):
+        if remote_addr is None and has_request_context():
+            remote_addr = request.remote_addr
+        self.identifier = identifier
+        self.remote_addr = remote_addr
+        self._user = None
+        self._resolved = False
+
+    def __repr__(self):
+        return "<{} {!r}>".format(self.__class__.__name__, self.identifier)
+
+    @property
+    def user(self):
+        """The user with the identifier or ``None`` if there is none."""
+        if not self._resolved:
+            self._user = find_user(self.identifier)
+            self._resolved = True
+        return self._user
+
+    @user.setter
+    def user(self, user):
+        self._user = user
+        self._resolved = True
+
+
+def _get_user(identifier, attempt):
+    if attempt is not None:
+        return attempt.user
+    return find_user(identifier)
 
 
 class BlockTooManyFailedLogins(AuthenticationProvider):
     """
     Pre authentication check to block a login from an account that has too
     many failed login attempts in place.
+
+    :param configuration: The :class:`FailedLoginConfiguration`.
+    :param store: The :class:`~flaskbb.auth.services.lockout.LockoutStore`
+        with the failed logins, defaults to the store of the app.
     """
 
-    def __init__(self, configuration):
+    def __init__(self, configuration, store=None):
         self.configuration = configuration
+        self.store = store
 
-    def authenticate(self, identifier, secret):
-        user = db.session.execute(
-            db.select(User).filter(
-                db.or_(User.username == identifier, User.email == identifier)
-            )
-        ).scalar_one_or_none()
-
-        if user is not None:
-            attempts = user.login_attempts
-            last_attempt = user.last_failed_login or datetime.min.replace(tzinfo=UTC)
-            reached_attempt_limit = attempts >= self.configuration.limit
-            inside_lockout = (
-                last_attempt + self.configuration.lockout_window
-            ) >= time_utcnow()
-
-            if reached_attempt_limit and inside_lockout:
-                raise StopAuthentication(
-                    _(
-                        "Your account is currently locked out due to too many "
-                        "failed login attempts"
-                    )
+    def authenticate(self, identifier, secret, attempt=None):
+        if attempt is None:
+            attempt = AuthenticationAttempt(identifier)
+        store = self.store or lockout_store_factory(self.configuration)
+
+        if store.is_locked_out(attempt):
+            raise StopAuthentication(
+                _(
+                    "Your account is currently locked out due to too many "
+                    "failed login attempts"
                 )
+            )
 
 
 class DefaultFlaskBBAuthProvider(AuthenticationProvider):
@@ -86,40 +132,52 @@ class DefaultFlaskBBAuthProvider(AuthenticationProvider):
 
     Offers protection against timing attacks that would rely on the difference
     in response time from not matching a password hash.
+
+    If the password of the user has been hashed with other parameters than
+    the configured ones, it is rehashed.
     """
 
-    def authenticate(self, identifier, secret):
-        user = db.session.execute(
-            db.select(User).filter(
-                db.or_(User.username == identifier, User.email == identifier)
-            )
-        ).scalar_one_or_none()
+    def authenticate(self, identifier, secret, attempt=None):
+        user = _get_user(identifier, attempt)
 
-        if user is not None:
-            if check_password_hash(user.password, secret):
-                return user
-            return None
+        try:
+            if user is None:
+                password_hasher.verify_dummy(secret)
+                return None
+
+            if not password_hasher.verify(user.password, secret):
+                return None
+        except PasswordHasherBusy:
+            raise AuthenticationUnavailable(
+                _("Too many login attempts at the moment, please try again later.")
+            )
 
-        check_password_hash("dummy password", secret)
-        return None
+        if password_hasher.needs_rehash(user.password):
+            try:
+                user.password = secret
+            except PasswordHasherBusy:
+                # the old hash still works, rehash it on another login
+                logger.debug(f"Skipped rehashing the password of {user}.")
+        return user
 
 
 class MarkFailedLogin(AuthenticationFailureHandler):
     """
-    Failure handler that marks the login attempt on the user and sets the
-    last failed date when it happened.
+    Failure handler that records the failed login attempt in the lockout
+    store. In the database store, the attempts of the user are incremented
+    by the database, so concurrent failures are all counted.
+
+    :param store: The :class:`~flaskbb.auth.services.lockout.LockoutStore`,
+        defaults to the store of the app.
     """
 
-    def handle_authentication_failure(self, identifier):
-        user = db.session.execute(
-            db.select(User).filter(
-                db.or_(User.username == identifier, User.email == identifier)
-            )
-        ).scalar_one_or_none()
+    def __init__(self, store=None):
+        self.store = store
 
-        if user is not None:
-            user.login_attempts += 1
-            user.last_failed_login = time_utcnow()
+    def handle_authentication_failure(self, identifier, attempt=None):
+        if attempt is None:
+            attempt = AuthenticationAttempt(identifier)
+        (self.store or lockout_store_factory()).record_failure(attempt)
 
 
 class BlockUnactivatedUser(PostAuthenticationHandler):
@@ -143,10 +201,16 @@ class ClearFailedLogins(PostAuthenticationHandler):
     """
     Post auth handler that clears all failed login attempts from a user's
     account.
+
+    :param store: The :class:`~flaskbb.auth.services.lockout.LockoutStore`,
+        defaults to the store of the app.
     """
 
+    def __init__(self, store=None):
+        self.store = store
+
     def handle_post_auth(self, user):
-        user.login_attempts = 0
+        (self.store or lockout_store_factory()).clear(user)
 
 
 class PluginAuthenticationManager(AuthenticationManager):
@@ -160,17 +224,21 @@ class PluginAuthenticationManager(AuthenticationManager):
         self.session = session
 
     def authenticate(self, identifier, secret):
+        attempt = AuthenticationAttempt(identifier)
         try:
             user = self.plugin_manager.hook.flaskbb_authenticate(
-                identifier=identifier, secret=secret
+                identifier=identifier, secret=secret, attempt=attempt
             )
             if user is None:
                 raise StopAuthentication(_("Wrong username or password."))
             self.plugin_manager.hook.flaskbb_post_authenticate(user=user)
             return user
+        except AuthenticationUnavailable:
+            # the secret hasn't been checked, this isn't a failed attempt
+            raise
         except StopAuthentication:
             self.plugin_manager.hook.flaskbb_authentication_failed(
-                identifier=identifier
+                identifier=identifier, attempt=attempt
             )
             raise
         finally:
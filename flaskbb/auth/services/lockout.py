@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.auth.services.lockout
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Stores that keep track of failed logins to lock out brute force
+attempts. If redis is enabled, the failures are counted in redis
+instead of being written to the user's row.
+
+:copyright: (c) 2014-2018 the FlaskBB Team.
+:license: BSD, see LICENSE for more details
+"""
+
+import logging
+import math
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import attr
+from flask import current_app
+from pytz import UTC
+
+from ...extensions import db, redis_store
+from ...user.models import User
+from ...utils.helpers import time_utcnow
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(frozen=True)
+class FailedLoginConfiguration(object):
+    """
+    Used to configure how many failed logins are accepted until an account
+    is temporarily locked out and how long to temporarily lock the account
+    out for. ``ip_limit`` optionally limits the failed logins from one IP
+    address, no matter which accounts they targeted. A limit of ``None``
+    never locks out.
+    """
+
+    limit = attr.ib()
+    lockout_window = attr.ib()
+    ip_limit = attr.ib(default=None)
+
+
+class LockoutStore(ABC):
+    """
+    Counts the failed logins of an identifier (and IP address) and decides
+    if further logins are locked out.
+
+    :param configuration: The :class:`FailedLoginConfiguration`.
+    """
+
+    def __init__(self, configuration):
+        self.configuration = configuration
+
+    @abstractmethod
+    def is_locked_out(self, attempt):
+        """
+        Checks if the login attempt is locked out.
+
+        :param attempt: The
+            :class:`~flaskbb.auth.services.AuthenticationAttempt`.
+        """
+        pass
+
+    @abstractmethod
+    def record_failure(self, attempt):
+        """Records that the login attempt failed."""
+        pass
+
+    @abstractmethod
+    def clear(self, user):
+        """Clears the failed logins of a user after a successful login."""
+        pass
+
+
+class DatabaseLockoutStore(LockoutStore):
+    """
+    Keeps the failed logins in the ``login_attempts`` and
+    ``last_failed_login`` columns of the user. Failed logins of unknown
+    users and IP addresses aren't tracked.
+    """
+
+    def is_locked_out(self, attempt):
+        if not self.configuration.limit:
+            return False
+
+        user = attempt.user
+        if user is None:
+            return False
+
+        last_attempt = user.last_failed_login or datetime.min.replace(tzinfo=UTC)
+        reached_attempt_limit = user.login_attempts >= self.configuration.limit
+        inside_lockout = (
+            last_attempt + self.configuration.lockout_window
+        ) >= time_utcnow()
+        return reached_attempt_limit and inside_lockout
+
+    def record_failure(self, attempt):
+        if attempt.user is None:
+            return
+
+        db.session.execute(
+            db.update(User)
+            .where(User.id == attempt.user.id)
+            .values(
+                login_attempts=User.login_attempts + 1,
+                last_failed_login=time_utcnow(),
+            )
+        )
+
+    def clear(self, user):
+        user.login_attempts = 0
+
+
+class RedisLockoutStore(LockoutStore):
+    """
+    Counts the failed logins per user (or per identifier if there is no
+    such user) and per IP address in sliding windows of
+    ``lockout_window``. Every window is a sorted set of the times of the
+    failures which expires with the window, so the database isn't touched
+    apart from looking up the user of the attempt.
+
+    :param redis: The redis client.
+    :param prefix: The prefix of the keys.
+    """
+
+    def __init__(self, configuration, redis, prefix="login-failures"):
+        super(RedisLockoutStore, self).__init__(configuration)
+        self.redis = redis
+        self.prefix = prefix
+
+    @property
+    def window(self):
+        return self.configuration.lockout_window.total_seconds()
+
+    def identifier_key(self, identifier):
+        return "{}/id/{}".format(self.prefix, identifier.strip().lower())
+
+    def user_key(self, user):
+        return "{}/user/{}".format(self.prefix, user.id)
+
+    def ip_key(self, remote_addr):
+        return "{}/ip/{}".format(self.prefix, remote_addr)
+
+    def _limits(self, attempt):
+        # the failures of a user are counted together, no matter if the
+        # username or the email address has been entered
+        if attempt.user is not None:
+            key = self.user_key(attempt.user)
+        else:
+            key = self.identifier_key(attempt.identifier)
+        limits = [(key, self.configuration.limit)]
+        if attempt.remote_addr:
+            limits.append(
+                (self.ip_key(attempt.remote_addr), self.configuration.ip_limit)
+            )
+        return limits
+
+    def is_locked_out(self, attempt):
+        limits = [(key, limit) for key, limit in self._limits(attempt) if limit]
+        if not limits:
+            return False
+
+        since = time.time() - self.window
+        pipe = self.redis.pipeline(transaction=False)
+        for key, _ in limits:
+            pipe.zcount(key, since, "+inf")
+        counts = pipe.execute()
+        return any(count >= limit for count, (_, limit) in zip(counts, limits))
+
+    def record_failure(self, attempt):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        for key, _ in self._limits(attempt):
+            pipe.zadd(key, {"{}/{}".format(now, uuid.uuid4().hex[:8]): now})
+            pipe.zremrangebyscore(key, "-inf", now - self.window)
+            pipe.expire(key, math.ceil(self.window))
+        pipe.execute()
+
+    def clear(self, user):
+        # the failures of the IP address are kept, otherwise an attacker
+        # could reset them by logging into their own account
+        self.redis.delete(
+            self.user_key(user),
+            self.identifier_key(user.username),
+            self.identifier_key(user.email),
+        )
+
+
+def failed_login_configuration():
+    """Returns the :class:`FailedLoginConfiguration` of the app."""
+    config = current_app.config
+    return FailedLoginConfiguration(
+        limit=config["LOGIN_LOCKOUT_ATTEMPTS"],
+        lockout_window=config["LOGIN_LOCKOUT_WINDOW"],
+        ip_limit=config["LOGIN_LOCKOUT_IP_ATTEMPTS"],
+    )
+
+
+def lockout_store_factory(configuration=None):
+    """
+    Returns the lockout store of the app, the redis store if redis is
+    enabled and the database store otherwise.
+
+    :param configuration: The :class:`FailedLoginConfiguration`, defaults
+        to the configuration of the app.
+    """
+    if configuration is None:
+        configuration = failed_login_configuration()
+
+    if current_app.config["REDIS_ENABLED"]:
+        return RedisLockoutStore(configuration, redis_store)
+    return DatabaseLockoutStore(configuration)
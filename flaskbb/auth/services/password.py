@@ -15,6 +15,7 @@ from ...core.exceptions import StopValidation, ValidationError
 from ...core.tokens import Token, TokenActions, TokenError
 from ...email import send_reset_token
 from ...extensions import db
+from ...utils.passwords import PasswordHasherBusy
 
 
 class ResetPasswordService(_ResetPasswordService):
@@ -52,7 +53,17 @@ class ResetPasswordService(_ResetPasswordService):
         ).scalar_one_or_none()
         if user is None:
             raise TokenError.invalid()
-        user.password = new_password
+        try:
+            user.password = new_password
+        except PasswordHasherBusy:
+            raise StopValidation(
+                [
+                    (
+                        "password",
+                        _("The server is busy at the moment, please try again later."),
+                    )
+                ]
+            )
 
     def _verify_token(self, token, email):
         errors = []
@@ -11,16 +11,18 @@ Tools for handling reauthentication needs inside FlaskBB.
 import logging
 
 from flask_babelplus import gettext as _
-from werkzeug.security import check_password_hash
 
 from ...core.auth.authentication import (
+    AuthenticationUnavailable,
     PostReauthenticateHandler,
     ReauthenticateFailureHandler,
     ReauthenticateManager,
     ReauthenticateProvider,
     StopAuthentication,
 )
-from ...utils.helpers import time_utcnow
+from ...utils.passwords import PasswordHasherBusy, password_hasher
+from .authentication import AuthenticationAttempt
+from .lockout import lockout_store_factory
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +34,20 @@ class DefaultFlaskBBReauthProvider(ReauthenticateProvider):
     """
 
     def reauthenticate(self, user, secret):
-        if check_password_hash(user.password, secret):  # pragma: no branch
+        try:
+            verified = password_hasher.verify(user.password, secret)
+        except PasswordHasherBusy:
+            raise AuthenticationUnavailable(
+                _("Too many login attempts at the moment, please try again later.")
+            )
+
+        if verified:  # pragma: no branch
+            if password_hasher.needs_rehash(user.password):
+                try:
+                    user.password = secret
+                except PasswordHasherBusy:
+                    # the old hash still works, rehash it on another login
+                    logger.debug(f"Skipped rehashing the password of {user}.")
             return True
 
 
@@ -40,21 +55,34 @@ class ClearFailedLoginsOnReauth(PostReauthenticateHandler):
     """
     Handler that clears failed login attempts after a successful
     reauthentication.
+
+    :param store: The :class:`~flaskbb.auth.services.lockout.LockoutStore`,
+        defaults to the store of the app.
     """
 
+    def __init__(self, store=None):
+        self.store = store
+
     def handle_post_reauth(self, user):
-        user.login_attempts = 0
+        (self.store or lockout_store_factory()).clear(user)
 
 
 class MarkFailedReauth(ReauthenticateFailureHandler):
     """
-    Failure handler that marks the failed reauth attempt as a failed login
-    and when it occurred.
+    Failure handler that records the failed reauth attempt as a failed
+    login in the lockout store.
+
+    :param store: The :class:`~flaskbb.auth.services.lockout.LockoutStore`,
+        defaults to the store of the app.
     """
 
+    def __init__(self, store=None):
+        self.store = store
+
     def handle_reauth_failure(self, user):
-        user.login_attempts += 1
-        user.last_failed_login = time_utcnow()
+        attempt = AuthenticationAttempt(user.username)
+        attempt.user = user
+        (self.store or lockout_store_factory()).record_failure(attempt)
 
 
 class PluginReauthenticationManager(ReauthenticateManager):
@@ -75,6 +103,9 @@ class PluginReauthenticationManager(ReauthenticateManager):
             if not result:
                 raise StopAuthentication(_("Wrong password."))
             self.plugin_manager.hook.flaskbb_post_reauth(user=user)
+        except AuthenticationUnavailable:
+            # the secret hasn't been checked, this isn't a failed attempt
+            raise
         except StopAuthentication:
             self.plugin_manager.hook.flaskbb_reauth_failed(user=user)
             raise
@@ -37,6 +37,7 @@ from ...core.exceptions import (
 )
 from ...extensions import db
 from ...user.models import User
+from ...utils.passwords import PasswordHasherBusy
 
 __all__ = (
     "AutoActivateUserPostProcessor",
@@ -253,6 +254,16 @@ class RegistrationService(UserRegistrationService):
             self.db.session.add(user)
             self.db.session.commit()
             return user
+        except PasswordHasherBusy:
+            self.db.session.rollback()
+            raise StopValidation(
+                [
+                    (
+                        "password",
+                        _("The server is busy at the moment, please try again later."),
+                    )
+                ]
+            )
         except Exception:
             self.db.session.rollback()
             raise PersistenceError("Could not persist user")
@@ -35,6 +35,9 @@ from flaskbb.cli.utils import (
     write_config,
 )
 from flaskbb.extensions import alembic, celery, db, pluggy, whooshee
+from flaskbb.forum.counters import topic_view_counter
+from flaskbb.forum.models import ReadMark
+from flaskbb.forum.trackers import TrackerPruner
 from flaskbb.utils.populate import (
     create_default_groups,
     create_default_settings,
@@ -45,6 +48,8 @@ from flaskbb.utils.populate import (
     run_plugin_migrations,
     update_settings_from_fixture,
 )
+from flaskbb.utils.search import SearchReindexer
+from flaskbb.utils.search_backends import get_search_backend
 from flaskbb.utils.translations import compile_translations
 
 logger = logging.getLogger(__name__)
@@ -295,10 +300,172 @@ def populate(
 
 
 @flaskbb.command()
-def reindex():
-    """Reindexes the search index."""
+@click.option(
+    "--model",
+    "-m",
+    "models",
+    multiple=True,
+    type=click.Choice(["post", "topic", "forum", "user"]),
+    help="Only reindex these models. Can be given multiple times.",
+)
+@click.option("--since-id", type=int, help="Only (re)index the rows with a greater id.")
+@click.option(
+    "--procs",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="The number of indexing processes.",
+)
+@click.option("--chunk-size", default=1000, show_default=True, help="Rows per select.")
+@click.option(
+    "--commit-every",
+    default=50000,
+    show_default=True,
+    help="Rows per index commit and checkpoint.",
+)
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False),
+    help="The checkpoint file. Defaults to 'reindex.json' in the index directory.",
+)
+@click.option(
+    "--restart", is_flag=True, help="Ignore the checkpoint and start from scratch."
+)
+@with_appcontext
+def reindex(
+    models: tuple[str, ...],
+    since_id: int | None,
+    procs: int,
+    chunk_size: int,
+    commit_every: int,
+    checkpoint: str | None,
+    restart: bool,
+):
+    """Reindexes the search index.
+
+    The reindex can be interrupted at any time, running it again continues
+    from the last checkpoint.
+    """
+    checkpoint = checkpoint or os.path.join(
+        current_app.extensions["whooshee"]["index_path_root"], "reindex.json"
+    )
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    reindexer = SearchReindexer(
+        {wh.models[0].__name__.lower(): wh for wh in whooshee.whoosheers},
+        checkpoint=checkpoint,
+        chunk_size=chunk_size,
+        commit_every=commit_every,
+        procs=procs,
+    )
+    bars: dict[str, Any] = {}
+
+    def progress(name: str, indexed: int, total: int):
+        if name not in bars:
+            for bar in bars.values():
+                bar.render_finish()
+            bars[name] = click.progressbar(
+                length=total, label=f"[+] Reindexing {name}s", show_eta=True
+            )
+        bar = bars[name]
+        bar.update(indexed - bar.pos)
+
     click.secho("[+] Reindexing search index...", fg="cyan")
-    whooshee.reindex()
+    get_search_backend().create_indexes(whooshee.whoosheers)
+    indexed = reindexer.run(models, since_id=since_id, progress=progress)
+    for bar in bars.values():
+        bar.render_finish()
+    for name, count in indexed.items():
+        click.secho(f"[+] Indexed {count} {name}s.", fg="cyan")
+
+
+@flaskbb.command("flush-views")
+@with_appcontext
+def flush_views():
+    """Writes the buffered topic views to the database.
+
+    Only the views counted in redis can be flushed from here, the views
+    that are buffered inside the processes are flushed by the processes
+    themselves.
+    """
+    click.secho("[+] Flushing topic views...", fg="cyan")
+    topics = topic_view_counter.flush()
+    click.secho(f"[+] Updated the views of {topics} topic(s).", fg="cyan")
+
+
+@flaskbb.command("prune-trackers")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=None,
+    help="How many trackers are deleted in one transaction. "
+    "Defaults to TRACKER_PRUNE_BATCH_SIZE.",
+)
+@click.option(
+    "--pause",
+    type=float,
+    default=None,
+    help="How many seconds to wait between two batches. "
+    "Defaults to TRACKER_PRUNE_PAUSE.",
+)
+@with_appcontext
+def prune_trackers(batch_size: int | None, pause: float | None):
+    """Deletes the read trackers that are older than the tracker length.
+
+    The trackers are deleted in small batches, so it's safe to run it
+    while the forum is in use.
+    """
+    pruner = TrackerPruner.from_config()
+    if batch_size is not None:
+        pruner.batch_size = batch_size
+    if pause is not None:
+        pruner.pause = pause
+
+    click.secho("[+] Pruning read trackers...", fg="cyan")
+    report = pruner.prune()
+    for table, deleted in report.deleted.items():
+        click.secho(f"[+] Deleted {deleted} row(s) from {table}.", fg="cyan")
+    click.secho(
+        f"[+] Pruned {report.total} tracker(s) in {report.elapsed:.2f}s.", fg="cyan"
+    )
+
+
+@flaskbb.command("migrate-readmarks")
+@click.option(
+    "--batch-size",
+    default=500,
+    show_default=True,
+    help="How many users are converted in one transaction.",
+)
+@with_appcontext
+def migrate_readmarks(batch_size: int):
+    """Converts the topicsread and forumsread trackers into read marks.
+
+    The marks of a user are replaced when the user is converted again,
+    so the migration can be interrupted and run again.
+    """
+    click.secho("[+] Converting the read trackers...", fg="cyan")
+    start = time.time()
+    bar = None
+
+    def progress(converted: int, total: int):
+        nonlocal bar
+        if bar is None:
+            bar = click.progressbar(length=total, label="[+] Converting users")
+        bar.update(converted - bar.pos)
+
+    written = ReadMark.migrate_trackers(batch_size=batch_size, progress=progress)
+    if bar is not None:
+        bar.render_finish()
+    click.secho(
+        f"[+] Wrote {written} read mark(s) in {time.time() - start:.2f}s.",
+        fg="cyan",
+    )
+    if current_app.config["READ_TRACKER"] != "readmarks":
+        click.secho(
+            '[+] Set READ_TRACKER = "readmarks" in your config to use them.',
+            fg="cyan",
+        )
 
 
 @flaskbb.command()
@@ -185,6 +185,29 @@ class DefaultConfig(object):
     WHOOSHEE_WRITER_TIMEOUT = 2
     # Minimum number of characters for the search (defaults to 3)
     WHOOSHEE_MIN_STRING_LEN = 3
+    # The backend which stores the search index: "whoosh" (the default) or
+    # "database" to use a SQLite FTS5 or PostgreSQL full text index that is
+    # shared by all app servers. It can also be the import path of a
+    # flaskbb.utils.search_backends.SearchBackend subclass. After switching
+    # the backend, run "flaskbb reindex", which also creates the tables of
+    # the "database" backend.
+    SEARCH_BACKEND = "whoosh"
+    # The changes are queued and written to the search index in batches
+    # instead of inside the request that changed them. If redis is enabled,
+    # the queue is flushed by the celery beat task, otherwise after a request
+    # once SEARCH_INDEX_FLUSH_INTERVAL seconds have passed.
+    # Set it to None to only flush the queue with celery.
+    SEARCH_INDEX_FLUSH_INTERVAL = 5
+    # The maximum number of changes that are written with one index writer
+    SEARCH_INDEX_BATCH_SIZE = 500
+    # Set it to False to write the changes right after the commit
+    SEARCH_INDEX_ASYNC = True
+    # The maximum number of matches per content type of a search
+    SEARCH_RESULT_LIMIT = 500
+    # How long should the results of a search be cached (in seconds)?
+    # They are dropped as soon as the searched content changes anyway.
+    # Set it to None to disable the cache. It is disabled while testing.
+    SEARCH_CACHE_TIMEOUT = 300
 
     # Auth
     # ------------------------------
@@ -193,6 +216,30 @@ class DefaultConfig(object):
     LOGIN_MESSAGE_CATEGORY = "info"
     REFRESH_MESSAGE_CATEGORY = "info"
 
+    # The werkzeug method and cost that new password hashes are computed
+    # with, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000". Passwords
+    # that have been hashed differently are rehashed when the user logs in.
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    PASSWORD_HASH_SALT_LENGTH = 16
+    # How many passwords are hashed at the same time per process, 0 hashes
+    # them on the thread of the request without a limit. This only caps the
+    # hashes that run at once, the request still waits for its hash. At most
+    # PASSWORD_HASH_QUEUE_SIZE more requests wait for a free worker, any
+    # further login waits PASSWORD_HASH_TIMEOUT seconds for a place in the
+    # queue before it is refused (0 refuses it right away).
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_QUEUE_SIZE = 4
+    PASSWORD_HASH_TIMEOUT = 0
+
+    # Temporarily locks out logins with an identifier (username or email)
+    # after LOGIN_LOCKOUT_ATTEMPTS failed logins within LOGIN_LOCKOUT_WINDOW,
+    # and logins from an IP address after LOGIN_LOCKOUT_IP_ATTEMPTS. The
+    # failures are counted in redis if it is enabled, otherwise in the users
+    # table, which doesn't track IP addresses. None disables a limit.
+    LOGIN_LOCKOUT_ATTEMPTS = None
+    LOGIN_LOCKOUT_IP_ATTEMPTS = None
+    LOGIN_LOCKOUT_WINDOW = datetime.timedelta(minutes=15)
+
     # The name of the cookie to store the “remember me” information in.
     REMEMBER_COOKIE_NAME = "remember_token"
     # The amount of time before the cookie expires, as a datetime.timedelta object.
@@ -224,6 +271,12 @@ class DefaultConfig(object):
     # relies on the pymemcache package.
     # RATELIMIT_STORAGE_URL = "redis://localhost:6379"
 
+    # How many markdown previews a user (or guest, by ip) can request.
+    MARKDOWN_PREVIEW_RATE_LIMIT = "30/minute"
+    # Identical previews requested by the same user within this many seconds
+    # are served from the cache instead of being rendered again.
+    MARKDOWN_PREVIEW_DEBOUNCE = 10
+
     # Caching
     # ------------------------------
     # For all available caching types, have a look at the Flask-Cache docs
@@ -232,6 +285,16 @@ class DefaultConfig(object):
     # For redis:
     # CACHE_TYPE = "redis"
     CACHE_DEFAULT_TIMEOUT = 60
+    # How long the approximate counts that are used for the pagination
+    # are cached. Set it to None to disable caching them.
+    COUNT_CACHE_TIMEOUT = 60
+    # Where the rendered HTML of posts and signatures is cached:
+    #   "local"  - in a LRU cache with MARKUP_CACHE_SIZE entries per process
+    #   "shared" - in the cache above for MARKUP_CACHE_TIMEOUT seconds
+    #   None     - disables caching of the rendered HTML
+    MARKUP_CACHE = "local"
+    MARKUP_CACHE_SIZE = 2048
+    MARKUP_CACHE_TIMEOUT = 60 * 60 * 24
 
     # Mail
     # ------------------------------
@@ -271,6 +334,47 @@ class DefaultConfig(object):
         "broker_transport_options": {"max_retries": 1},
     }
 
+    # Topic Views
+    # ------------------------------ #
+    # Topic views are counted in a buffer (in redis if it is enabled,
+    # otherwise in the process itself) and written to the database every
+    # TOPIC_VIEWS_FLUSH_INTERVAL seconds. If a celery beat scheduler is
+    # running, the views counted in redis are flushed by it as well.
+    # Set it to None to only flush them with the "flaskbb flush-views"
+    # command or the celery beat task.
+    TOPIC_VIEWS_FLUSH_INTERVAL = 30
+
+    # Read Trackers
+    # ------------------------------ #
+    # How the read state of the users is stored: "trackers" (the default)
+    # stores a topicsread row per read topic and a forumsread row per forum,
+    # "readmarks" stores a single row per user and forum. Convert the
+    # trackers with "flaskbb migrate-readmarks" before switching to
+    # "readmarks".
+    READ_TRACKER = "trackers"
+
+    # The topicsread and forumsread trackers that are older than the
+    # "tracker_length" setting are deleted every TRACKER_PRUNE_INTERVAL
+    # seconds by the celery beat task or with the "flaskbb prune-trackers"
+    # command. They are deleted in batches of TRACKER_PRUNE_BATCH_SIZE rows
+    # with a pause of TRACKER_PRUNE_PAUSE seconds after every batch, which
+    # keeps the locks short on a live site.
+    # Set the interval to None to only prune them with the command.
+    TRACKER_PRUNE_INTERVAL = 86400
+    TRACKER_PRUNE_BATCH_SIZE = 1000
+    TRACKER_PRUNE_PAUSE = 0.5
+
+    # Last Seen
+    # ------------------------------ #
+    # The lastseen date of a user is only written to the database if it
+    # has moved more than LASTSEEN_GRANULARITY seconds. The pending updates
+    # are written in one batch every LASTSEEN_FLUSH_INTERVAL seconds.
+    # If redis is enabled, the online users tracked in redis are used
+    # instead. Set the interval to None to only flush them with the celery
+    # beat task.
+    LASTSEEN_GRANULARITY = 60
+    LASTSEEN_FLUSH_INTERVAL = 60
+
     # FlaskBB Settings
     # ------------------------------ #
     # URL Prefixes
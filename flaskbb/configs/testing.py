@@ -33,6 +33,23 @@ class TestingConfig(DefaultConfig):
         "cache_backend": "memory",
     }
 
+    # Don't cache the counts, the ids are reused by every test
+    COUNT_CACHE_TIMEOUT = None
+
+    # Write the buffered topic views and lastseen dates after every request
+    TOPIC_VIEWS_FLUSH_INTERVAL = 0
+    LASTSEEN_FLUSH_INTERVAL = 0
+
+    # Don't wait between the batches of pruned trackers
+    TRACKER_PRUNE_PAUSE = 0
+
+    # Index the search changes right after the commit
+    SEARCH_INDEX_ASYNC = False
+
+    # Cheap password hashes, hashed on the thread of the test
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+    PASSWORD_HASH_WORKERS = 0
+
     LOG_DEFAULT_CONF = {
         "version": 1,
         "disable_existing_loggers": False,
@@ -24,6 +24,17 @@ class StopAuthentication(BaseFlaskBBError):
         self.reason = reason
 
 
+class AuthenticationUnavailable(StopAuthentication):
+    """
+    Used by Authentication providers to halt the authentication when the
+    secret can't be checked at the moment, e.g. because the password hasher
+    is busy. Unlike :class:`StopAuthentication`, the failure handlers aren't
+    called, since the secret hasn't been rejected.
+
+    :param reason str: The reason why authentication was halted
+    """
+
+
 class ForceLogout(BaseFlaskBBError):
     """
     Used to forcefully log a user out.
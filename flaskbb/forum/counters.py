@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.forum.counters
+~~~~~~~~~~~~~~~~~~~~~~
+
+Buffered counters for the forum. Instead of committing a transaction
+for every single topic view, the views are counted in a buffer and
+periodically written to the database in one batched update.
+
+:copyright: (c) 2014 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import logging
+from collections import Counter
+
+from flask import Flask
+from sqlalchemy import bindparam, update
+
+from flaskbb.extensions import celery, db, redis_store
+from flaskbb.forum.models import Topic
+from flaskbb.utils.flushers import BufferedFlusher
+
+logger = logging.getLogger(__name__)
+
+
+class TopicViewCounter(BufferedFlusher):
+    """Counts the topic views in a buffer and flushes them to the database
+    as a single ``UPDATE topics SET views = views + n`` per topic.
+
+    If redis is enabled, the views are counted in a redis hash which is
+    shared between all processes and can be flushed by any of them (e.g.
+    by the celery beat task or the ``flaskbb flush-views`` command).
+    Otherwise the views are counted in a process local buffer which is
+    flushed by the process itself after a request once
+    ``TOPIC_VIEWS_FLUSH_INTERVAL`` seconds have passed and when the
+    process exits.
+    """
+
+    #: The redis hash in which the views are counted
+    redis_key = "topic-views"
+    flush_interval_key = "TOPIC_VIEWS_FLUSH_INTERVAL"
+    description = "topic views"
+
+    def __init__(self, app: Flask | None = None):
+        self._views: Counter[int] = Counter()
+        super(TopicViewCounter, self).__init__(app)
+
+    def add(self, topic_id: int, views: int = 1):
+        """Counts the views of a topic.
+
+        :param topic_id: The id of the topic that has been viewed.
+        :param views: The number of views to add.
+        """
+        if self.use_redis:
+            redis_store.hincrby(self.redis_key, str(topic_id), views)
+        else:
+            with self._lock:
+                self._views[topic_id] += views
+
+    def pending(self) -> dict[int, int]:
+        """Returns the views that haven't been flushed yet."""
+        if self.use_redis:
+            views = redis_store.hgetall(self.redis_key)
+            return {int(k): int(v) for k, v in views.items()}
+
+        with self._lock:
+            return dict(self._views)
+
+    def flush(self) -> int:
+        """Writes the buffered views to the database and returns the
+        number of topics that have been updated. If the update fails, the
+        views are put back into the buffer so that they are not lost.
+
+        The views are written in a transaction on their own connection,
+        so that nothing that is pending in the session of the current
+        request is committed along with them.
+        """
+        views = self._take()
+        if not views:
+            return 0
+
+        topics = Topic.__table__
+        stmt = (
+            update(topics)
+            .where(topics.c.id == bindparam("topic_id"))
+            .values(views=topics.c.views + bindparam("new_views"))
+        )
+        try:
+            # sorted by id so that concurrent flushes lock the rows in the
+            # same order
+            with db.engine.begin() as conn:
+                conn.execute(
+                    stmt,
+                    [
+                        {"topic_id": topic_id, "new_views": count}
+                        for topic_id, count in sorted(views.items())
+                    ],
+                )
+        except Exception:
+            self._restore(views)
+            raise
+
+        logger.debug(f"Flushed {sum(views.values())} views of {len(views)} topics.")
+        return len(views)
+
+    def _take(self) -> dict[int, int]:
+        if self.use_redis:
+            pipe = redis_store.pipeline()
+            pipe.hgetall(self.redis_key)
+            pipe.delete(self.redis_key)
+            views, _ = pipe.execute()
+            return {int(k): int(v) for k, v in views.items() if int(v)}
+
+        with self._lock:
+            views, self._views = self._views, Counter()
+        return dict(views)
+
+    def _restore(self, views: dict[int, int]):
+        if self.use_redis:
+            pipe = redis_store.pipeline()
+            for topic_id, count in views.items():
+                pipe.hincrby(self.redis_key, str(topic_id), count)
+            pipe.execute()
+        else:
+            with self._lock:
+                self._views.update(views)
+
+
+topic_view_counter = TopicViewCounter()
+
+
+@celery.task
+def flush_topic_views():
+    """Writes the topic views that have been counted in redis to the
+    database. Scheduled by celery beat every ``TOPIC_VIEWS_FLUSH_INTERVAL``
+    seconds.
+    """
+    return topic_view_counter.flush()
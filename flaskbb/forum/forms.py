@@ -22,10 +22,11 @@ from wtforms import (
 )
 from wtforms.validators import DataRequired, Length, Optional
 
-from flaskbb.extensions import pluggy
-from flaskbb.forum.models import Forum, Post, Report, Topic
+from flaskbb.extensions import db, pluggy
+from flaskbb.forum.models import Post, Report, Topic
 from flaskbb.user.models import User
 from flaskbb.utils.helpers import time_utcnow
+from flaskbb.utils.search import search_service
 
 logger = logging.getLogger(__name__)
 
@@ -169,8 +170,17 @@ class UserSearchForm(FlaskForm):
     submit = SubmitField(_("Search"))
 
     def get_results(self):
-        query = self.search_query.data
-        return User.query.whooshee_search(query)
+        ids = [
+            user_id
+            for user_id, _ in search_service.hits("user", self.search_query.data)
+        ]
+        query = User.query.filter(User.id.in_(ids))
+        if ids:
+            # ordered by relevance
+            query = query.order_by(
+                db.case({user_id: i for i, user_id in enumerate(ids)}, value=User.id)
+            )
+        return query
 
 
 class SearchPageForm(FlaskForm):
@@ -191,22 +201,17 @@ class SearchPageForm(FlaskForm):
 
     submit = SubmitField(_("Search"))
 
-    def get_results(self):
-        # Because the DB is not yet initialized when this form is loaded,
-        # the query objects cannot be instantiated in the class itself
-        search_actions = {
-            "post": Post.query.whooshee_search,
-            "topic": Topic.query.whooshee_search,
-            "forum": Forum.query.whooshee_search,
-            "user": User.query.whooshee_search,
-        }
-
-        query = self.search_query.data
-        types = self.search_types.data
-        results = {}
-
-        for search_type in search_actions.keys():
-            if search_type in types:
-                results[search_type] = search_actions[search_type](query)
-
-        return results
+    def get_results(self, page=1, per_page=20, viewer=None):
+        """Returns a page of results for every selected content type.
+
+        :param page: The page of the results.
+        :param per_page: The number of results per page.
+        :param viewer: The user who searches. Defaults to the current user.
+        """
+        return search_service.search(
+            self.search_query.data,
+            self.search_types.data,
+            viewer=viewer,
+            page=page,
+            per_page=per_page,
+        )
@@ -10,23 +10,40 @@ It provides the models for the forum
 """
 
 import logging
-from datetime import datetime, timedelta
+import struct
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from itertools import groupby
 from typing import TYPE_CHECKING, override
 
-from flask import abort, url_for
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, Text, or_
+from flask import abort, current_app, url_for
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Table,
+    Text,
+    inspect,
+    or_,
+)
 from sqlalchemy.orm import Mapped, aliased, mapped_column, relationship
 
 from flaskbb.extensions import db, pluggy
-from flaskbb.utils.queries import hidden, paginate
+from flaskbb.utils.queries import approximate_count, hidden, paginate
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from flaskbb.user.models import Group, User
 from flaskbb.utils.database import (
     CRUDMixin,
     HideableCRUDMixin,
     UTCDateTime,
     make_comparable,
+    upsert,
 )
 from flaskbb.utils.helpers import (
     get_categories_and_forums,
@@ -39,6 +56,9 @@ from flaskbb.utils.settings import flaskbb_config
 
 logger = logging.getLogger(__name__)
 
+# marks that the first unread post of a topic hasn't been resolved yet
+_UNRESOLVED = object()
+
 
 moderators = Table(
     "moderators",
@@ -73,6 +93,7 @@ topictracker = Table(
         ForeignKey("topics.id", ondelete="CASCADE"),
         nullable=False,
     ),
+    Index("ix_topictracker_user_id_topic_id", "user_id", "topic_id"),
 )
 
 
@@ -96,6 +117,12 @@ forumgroups = Table(
 
 class TopicsRead(db.Model, CRUDMixin):
     __tablename__ = "topicsread"
+    __table_args__ = (
+        # Forum.update_read and the unread checks of a forum
+        Index("ix_topicsread_user_id_forum_id", "user_id", "forum_id"),
+        # the expired trackers deleted by the TrackerPruner
+        Index("ix_topicsread_last_read", "last_read"),
+    )
 
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
@@ -118,6 +145,10 @@ class TopicsRead(db.Model, CRUDMixin):
 
 class ForumsRead(db.Model, CRUDMixin):
     __tablename__ = "forumsread"
+    __table_args__ = (
+        # the expired trackers deleted by the TrackerPruner
+        Index("ix_forumsread_last_read", "last_read"),
+    )
 
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
@@ -136,6 +167,456 @@ class ForumsRead(db.Model, CRUDMixin):
         UTCDateTime(timezone=True), nullable=True
     )
 
+    @classmethod
+    def mark_read(cls, user: "User", forum_id: int):
+        """Marks a forum as read for a user by dropping the topicsread
+        trackers of the forum and upserting its forumsread tracker.
+
+        :param user: The user who has read the forum.
+        :param forum_id: The id of the forum.
+        """
+        now = time_utcnow()
+        db.session.execute(
+            db.delete(TopicsRead).where(
+                TopicsRead.user_id == user.id, TopicsRead.forum_id == forum_id
+            )
+        )
+        upsert(
+            cls,
+            {
+                "user_id": user.id,
+                "forum_id": forum_id,
+                "last_read": now,
+                "cleared": now,
+            },
+            index_elements=["user_id", "forum_id"],
+            set_={"last_read": now, "cleared": now},
+        )
+        db.session.commit()
+
+    @classmethod
+    def mark_all_read(cls, user: "User"):
+        """Marks every forum as read for a user. The trackers are replaced
+        by one forumsread tracker per forum which are inserted by the
+        database itself, so the number of queries doesn't depend on the
+        number of forums.
+
+        :param user: The user who has read the forums.
+        """
+        now = db.literal(time_utcnow(), UTCDateTime(timezone=True))
+        db.session.execute(db.delete(cls).where(cls.user_id == user.id))
+        db.session.execute(db.delete(TopicsRead).where(TopicsRead.user_id == user.id))
+        db.session.execute(
+            db.insert(cls).from_select(
+                ["user_id", "forum_id", "last_read", "cleared"],
+                db.select(db.literal(user.id), Forum.id, now, now),
+            )
+        )
+        db.session.commit()
+
+
+# the read times of the topics are stored as microseconds since the epoch
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def pack_read_topics(read_topics: dict[int, datetime]) -> bytes:
+    """Packs the read times of topics into the sorted array of topic ids
+    followed by the array of their read times (microseconds since the
+    epoch) in which :class:`ReadMark` stores them.
+
+    :param read_topics: The read times by topic id.
+    """
+    topic_ids = sorted(read_topics)
+    read_times = [
+        (read_topics[topic_id] - _EPOCH) // _MICROSECOND for topic_id in topic_ids
+    ]
+    return struct.pack("<{0}I{0}q".format(len(topic_ids)), *topic_ids, *read_times)
+
+
+def unpack_read_topics(data: bytes | None) -> dict[int, datetime]:
+    """Unpacks the read times of topics packed by :func:`pack_read_topics`.
+
+    :param data: The packed read times.
+    """
+    if not data:
+        return {}
+
+    count = len(data) // 12
+    values = struct.unpack("<{0}I{0}q".format(count), data)
+    return {
+        topic_id: _EPOCH + read_time * _MICROSECOND
+        for topic_id, read_time in zip(values[:count], values[count:])
+    }
+
+
+def read_cutoff() -> datetime | None:
+    """Returns the time before which every topic counts as read or ``None``
+    if the read tracker is disabled (``TRACKER_LENGTH`` is ``0``)."""
+    if flaskbb_config["TRACKER_LENGTH"] <= 0:
+        return None
+    return time_utcnow() - timedelta(days=flaskbb_config["TRACKER_LENGTH"])
+
+
+def use_readmarks() -> bool:
+    """Returns ``True`` if the read state of the users is stored in
+    :class:`ReadMark` rows instead of the :class:`TopicsRead` and
+    :class:`ForumsRead` trackers (the ``READ_TRACKER`` config)."""
+    return current_app.config["READ_TRACKER"] == "readmarks"
+
+
+class ReadMark(db.Model, CRUDMixin):
+    """The read state of a user in a forum in a single row. Every topic
+    which has been updated before the ``watermark`` is read, the topics
+    that have been read after it are kept as a sparse set of topic ids
+    with their read times.
+
+    Unlike the :class:`TopicsRead` and :class:`ForumsRead` trackers, which
+    store one row per read topic, the read state of a forum can be answered
+    without a join and the table only grows with the forums a user visits.
+    Whenever the topics that have been read are contiguous since the
+    watermark, it is moved forward and the read topics behind it are
+    dropped, so the set stays small.
+    """
+
+    __tablename__ = "readmarks"
+
+    #: How many read topics are kept before the marks are compacted
+    max_read_topics = 64
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    forum_id: Mapped[int] = mapped_column(
+        ForeignKey("forums.id", ondelete="CASCADE"), primary_key=True
+    )
+    watermark: Mapped[datetime | None] = mapped_column(
+        UTCDateTime(timezone=True), nullable=True
+    )
+    packed_read_topics: Mapped[bytes] = mapped_column(
+        "read_topics", LargeBinary, default=b"", nullable=False
+    )
+
+    @override
+    def __repr__(self):
+        return "<{} {}/{}>".format(self.__class__.__name__, self.user_id, self.forum_id)
+
+    @classmethod
+    def for_user(cls, user: "User", forum_id: int) -> "ReadMark":
+        """Returns the read marks of a user in a forum. If the user hasn't
+        read anything in the forum yet, new marks are returned which
+        still need to be saved.
+
+        :param user: The user.
+        :param forum_id: The id of the forum.
+        """
+        mark = db.session.get(cls, (user.id, forum_id))
+        if mark is None:
+            mark = cls(user_id=user.id, forum_id=forum_id, packed_read_topics=b"")
+        return mark
+
+    @property
+    def read_topics(self) -> dict[int, datetime]:
+        """The read times of the topics that have been read after the
+        watermark by topic id. Don't modify it, it's unpacked only once."""
+        packed = self.packed_read_topics
+        cached = self.__dict__.get("_unpacked_read_topics")
+        if cached is None or cached[0] is not packed:
+            cached = (packed, unpack_read_topics(packed))
+            self.__dict__["_unpacked_read_topics"] = cached
+        return cached[1]
+
+    def last_read(self, topic: "Topic") -> datetime | None:
+        """Returns when the user has read the topic the last time or
+        ``None`` if the user hasn't read it.
+
+        :param topic: The topic.
+        """
+        read_time = self.read_topics.get(topic.id)
+        if read_time is None or (
+            self.watermark is not None and self.watermark > read_time
+        ):
+            return self.watermark
+        return read_time
+
+    def is_unread(self, topic: "Topic") -> bool:
+        """Checks if the topic has been updated since the user has read it.
+
+        :param topic: The topic.
+        """
+        cutoff = read_cutoff()
+        if cutoff is None or topic.last_updated < cutoff:
+            return False
+
+        last_read = self.last_read(topic)
+        return last_read is None or last_read < topic.last_updated
+
+    def first_unread_post_id(self, topic: "Topic") -> int | None:
+        """Returns the id of the first post in the topic the user hasn't
+        read or ``None`` if the topic is read.
+
+        :param topic: The topic.
+        """
+        if not self.is_unread(topic):
+            return None
+
+        stmt = db.select(db.func.min(Post.id)).where(Post.topic_id == topic.id)
+        last_read = self.last_read(topic)
+        if last_read is not None:
+            stmt = stmt.where(Post.date_created > last_read)
+        return db.session.execute(stmt).scalar()
+
+    def _since(self) -> datetime | None:
+        """Returns the time after which topics may be unread."""
+        since = self.watermark
+        cutoff = read_cutoff()
+        if cutoff is not None and (since is None or cutoff > since):
+            since = cutoff
+        return since
+
+    def _updated_topics(self, *clauses):
+        """Returns the ids and update times of the topics in the forum that
+        have been updated since the watermark, oldest first."""
+        stmt = db.select(Topic.id, Topic.last_updated).where(
+            Topic.forum_id == self.forum_id, *clauses
+        )
+        since = self._since()
+        if since is not None:
+            stmt = stmt.where(Topic.last_updated > since)
+        return db.session.execute(stmt.order_by(Topic.last_updated)).all()
+
+    def unread_topic_ids(self) -> list[int]:
+        """Returns the ids of the unread topics in the forum."""
+        if read_cutoff() is None:
+            return []
+
+        read_topics = self.read_topics
+        return [
+            topic_id
+            for topic_id, last_updated in self._updated_topics()
+            if read_topics.get(topic_id, _EPOCH) < last_updated
+        ]
+
+    def unread_count(self) -> int:
+        """Returns the number of unread topics in the forum. The topics
+        that have been updated since the watermark are counted by the
+        database, only the read ones among them are looked up.
+        """
+        if read_cutoff() is None:
+            return 0
+
+        stmt = (
+            db.select(db.func.count())
+            .select_from(Topic)
+            .where(Topic.forum_id == self.forum_id)
+        )
+        since = self._since()
+        if since is not None:
+            stmt = stmt.where(Topic.last_updated > since)
+        count = db.session.execute(stmt).scalar_one()
+
+        read_topics = self.read_topics
+        if read_topics:
+            count -= sum(
+                read_topics[topic_id] >= last_updated
+                for topic_id, last_updated in self._updated_topics(
+                    Topic.id.in_(read_topics)
+                )
+            )
+        return count
+
+    def mark_topic_read(
+        self,
+        topic: "Topic",
+        read_time: datetime | None = None,
+        compact: bool = False,
+    ):
+        """Marks a topic as read. The marks are compacted if they have
+        grown beyond :attr:`max_read_topics` topics.
+
+        :param topic: The topic that has been read.
+        :param read_time: When the topic has been read, defaults to now.
+        :param compact: Compact the marks right away, which moves the
+                        watermark past the last post of the forum once
+                        every topic has been read.
+        """
+        read_topics = dict(self.read_topics)
+        read_topics[topic.id] = read_time or time_utcnow()
+        self.packed_read_topics = pack_read_topics(read_topics)
+        if compact or len(read_topics) > self.max_read_topics:
+            self.compact()
+
+    def mark_forum_read(self, read_time: datetime | None = None):
+        """Marks every topic in the forum as read.
+
+        :param read_time: When the forum has been read, defaults to now.
+        """
+        self.watermark = read_time or time_utcnow()
+        self.packed_read_topics = b""
+
+    def compact(self):
+        """Moves the watermark forward over the topics which have been read
+        since it and drops the read topics it covers then.
+        """
+        read_topics = self.read_topics
+        updated_topics = self._updated_topics()
+        watermark = self.watermark
+        # topics that have been updated at the same time are either passed
+        # together or not at all
+        for last_updated, topics in groupby(
+            updated_topics, key=lambda row: row.last_updated
+        ):
+            if any(
+                read_topics.get(topic.id, _EPOCH) < last_updated for topic in topics
+            ):
+                break
+            watermark = last_updated
+
+        self.watermark = watermark
+        self.packed_read_topics = pack_read_topics(
+            {
+                topic_id: read_topics[topic_id]
+                for topic_id, last_updated in updated_topics
+                if topic_id in read_topics
+                and (watermark is None or last_updated > watermark)
+            }
+        )
+
+    @override
+    def save(self):
+        """Saves the read marks. New marks are upserted, because the first
+        topic of a forum may be read in two requests at the same time."""
+        if inspect(self).persistent:
+            db.session.commit()
+            return self
+
+        upsert(
+            ReadMark,
+            {
+                "user_id": self.user_id,
+                "forum_id": self.forum_id,
+                "watermark": self.watermark,
+                "packed_read_topics": self.packed_read_topics,
+            },
+            index_elements=["user_id", "forum_id"],
+            set_={"watermark": self.watermark, "read_topics": self.packed_read_topics},
+        )
+        db.session.commit()
+        return self
+
+    @classmethod
+    def mark_read(cls, user: "User", forum_id: int):
+        """Marks a forum as read for a user.
+
+        :param user: The user who has read the forum.
+        :param forum_id: The id of the forum.
+        """
+        mark = cls.for_user(user, forum_id)
+        mark.mark_forum_read()
+        mark.save()
+
+    @classmethod
+    def mark_all_read(cls, user: "User"):
+        """Marks every forum as read for a user by replacing the marks of
+        the user with one mark per forum, which are inserted by the
+        database itself.
+
+        :param user: The user who has read the forums.
+        """
+        now = db.literal(time_utcnow(), UTCDateTime(timezone=True))
+        db.session.execute(db.delete(cls).where(cls.user_id == user.id))
+        db.session.execute(
+            db.insert(cls).from_select(
+                [cls.user_id, cls.forum_id, cls.watermark, cls.packed_read_topics],
+                db.select(
+                    db.literal(user.id), Forum.id, now, db.literal(b"", LargeBinary)
+                ),
+            )
+        )
+        db.session.commit()
+
+    @classmethod
+    def migrate_trackers(cls, batch_size: int = 500, progress=None) -> int:
+        """Converts the :class:`ForumsRead` and :class:`TopicsRead` rows
+        into read marks and returns how many marks have been written. The
+        users are converted in batches of ``batch_size`` users, every batch
+        in its own transaction. Converting a user again replaces the marks
+        of the user, so an interrupted migration can simply be rerun.
+
+        :param batch_size: How many users are converted at once.
+        :param progress: Called with the number of converted users and the
+                         number of all users after every batch.
+        """
+        user_ids = (
+            db.session.execute(
+                db.select(ForumsRead.user_id).union(db.select(TopicsRead.user_id))
+            )
+            .scalars()
+            .all()
+        )
+        user_ids.sort()
+        cutoff = read_cutoff()
+        written = 0
+
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start : start + batch_size]
+            watermarks: dict[tuple[int, int], datetime | None] = {}
+            read_topics: dict[tuple[int, int], dict[int, datetime]] = {}
+
+            for user_id, forum_id, last_read, cleared in db.session.execute(
+                db.select(
+                    ForumsRead.user_id,
+                    ForumsRead.forum_id,
+                    ForumsRead.last_read,
+                    ForumsRead.cleared,
+                ).where(ForumsRead.user_id.in_(batch))
+            ):
+                # the forum has been read completely at last_read and marked
+                # as read at cleared
+                watermarks[(user_id, forum_id)] = max(
+                    (read_time for read_time in (last_read, cleared) if read_time),
+                    default=None,
+                )
+
+            stmt = db.select(
+                TopicsRead.user_id,
+                TopicsRead.forum_id,
+                TopicsRead.topic_id,
+                TopicsRead.last_read,
+            ).where(TopicsRead.user_id.in_(batch))
+            if cutoff is not None:
+                stmt = stmt.where(TopicsRead.last_read > cutoff)
+            for user_id, forum_id, topic_id, last_read in db.session.execute(stmt):
+                watermark = watermarks.setdefault((user_id, forum_id), None)
+                if watermark is None or last_read > watermark:
+                    read_topics.setdefault((user_id, forum_id), {})[topic_id] = (
+                        last_read
+                    )
+
+            db.session.execute(db.delete(cls).where(cls.user_id.in_(batch)))
+            if watermarks:
+                db.session.execute(
+                    db.insert(cls),
+                    [
+                        {
+                            "user_id": user_id,
+                            "forum_id": forum_id,
+                            "watermark": watermark,
+                            "packed_read_topics": pack_read_topics(
+                                read_topics.get((user_id, forum_id), {})
+                            ),
+                        }
+                        for (user_id, forum_id), watermark in watermarks.items()
+                    ],
+                )
+            db.session.commit()
+            written += len(watermarks)
+
+            if progress is not None:
+                progress(start + len(batch), len(user_ids))
+
+        return written
+
 
 @make_comparable
 class Report(db.Model, CRUDMixin):
@@ -197,6 +678,12 @@ class Report(db.Model, CRUDMixin):
 @make_comparable
 class Post(HideableCRUDMixin, db.Model):
     __tablename__ = "posts"
+    __table_args__ = (
+        # the posts of a topic and the position of a post in its topic
+        Index("ix_posts_topic_id_id", "topic_id", "id"),
+        # the posts of a user, most recent first
+        Index("ix_posts_user_id_id", "user_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     topic_id: Mapped[int | None] = mapped_column(
@@ -295,28 +782,71 @@ class Post(HideableCRUDMixin, db.Model):
                 self.topic = topic
                 self.date_created = created
 
-                if not topic.hidden:
-                    topic.last_updated = created
-                    topic.last_post = self
-
-                    # Update the last post info for the forum
-                    topic.forum.last_post = self
-                    topic.forum.last_post_user = self.user
-                    topic.forum.last_post_title = topic.title
-                    topic.forum.last_post_username = user.username
-                    topic.forum.last_post_created = created
-
-                    # Update the post counts
-                    user.post_count += 1
-                    topic.post_count += 1
-                    topic.forum.post_count += 1
+            db.session.add(self)
+            if not topic.hidden:
+                # the post needs an id before it can become the last post
+                db.session.flush()
+                self._update_counts_and_last_post(user, topic)
 
             # And commit it!
-            db.session.add(self)
             db.session.commit()
             pluggy.hook.flaskbb_event_post_save_after(post=self, is_new=True)
             return self
 
+    def _update_counts_and_last_post(self, user: "User", topic: "Topic"):
+        """Increments the post counts of the user, the topic and the forum
+        in the database and makes the post the last post of the topic and
+        the forum unless a newer post has been saved concurrently. No row
+        is read and rewritten, so concurrent replies don't lose updates.
+        """
+        from flaskbb.user.models import User
+
+        db.session.execute(
+            db.update(User)
+            .where(User.id == user.id)
+            .values(post_count=User.post_count + 1)
+        )
+        db.session.execute(
+            db.update(Topic)
+            .where(Topic.id == topic.id)
+            .values(post_count=Topic.post_count + 1)
+        )
+        db.session.execute(
+            db.update(Topic)
+            .where(
+                Topic.id == topic.id,
+                or_(
+                    Topic.last_post_id.is_(None), Topic.last_updated < self.date_created
+                ),
+            )
+            .values(last_post_id=self.id, last_updated=self.date_created)
+        )
+        db.session.execute(
+            db.update(Forum)
+            .where(Forum.id == topic.forum_id)
+            .values(post_count=Forum.post_count + 1)
+        )
+        db.session.execute(
+            db.update(Forum)
+            .where(
+                Forum.id == topic.forum_id,
+                or_(
+                    Forum.last_post_created.is_(None),
+                    Forum.last_post_created < self.date_created,
+                ),
+            )
+            .values(
+                last_post_id=self.id,
+                last_post_user_id=user.id,
+                last_post_title=topic.title,
+                last_post_username=user.username,
+                last_post_created=self.date_created,
+            )
+        )
+        # the loaded objects don't know about the changes
+        for instance in (user, topic, topic.forum):
+            db.session.expire(instance)
+
     @override
     def delete(self):
         """Deletes a post and returns self."""
@@ -486,6 +1016,19 @@ class Post(HideableCRUDMixin, db.Model):
 @make_comparable
 class Topic(HideableCRUDMixin, db.Model):
     __tablename__ = "topics"
+    __table_args__ = (
+        # the topics of a forum as they are listed in it
+        Index(
+            "ix_topics_forum_id_important_last_updated",
+            "forum_id",
+            "important",
+            "last_updated",
+        ),
+        Index("ix_topics_last_updated", "last_updated"),
+        Index("ix_topics_last_post_id", "last_post_id"),
+        # the topics of a user, most recent first
+        Index("ix_topics_user_id_id", "user_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     forum_id: Mapped[int] = mapped_column(
@@ -549,6 +1092,10 @@ class Topic(HideableCRUDMixin, db.Model):
         post_update=True,
     )
 
+    # the id of the first unread post if it has been resolved by
+    # resolve_first_unread, None if the topic has no unread posts
+    _first_unread_post_id = _UNRESOLVED
+
     @property
     def second_last_post(self):
         """Returns the second last post id or None."""
@@ -613,7 +1160,7 @@ class Topic(HideableCRUDMixin, db.Model):
         self,
         topicsread: "TopicsRead | None",
         user: "User",
-        forumsread: ForumsRead | None = None,
+        forumsread: ForumsRead | ReadMark | None = None,
     ):
         """Returns the url to the first unread post. If no unread posts exist
         it will return the url to the topic.
@@ -624,19 +1171,81 @@ class Topic(HideableCRUDMixin, db.Model):
         :param forumsread: The forumsread object in which the topic is. If you
                         also want to check if the user has marked the forum as
                         read, than you will also need to pass an forumsread
-                        object.
+                        object. If the read marks are used, these are the
+                        read marks of the user in the forum.
         """
+        # resolved for the whole page by resolve_first_unread
+        post_id = self._first_unread_post_id
+        if post_id is not _UNRESOLVED:
+            if post_id is None:
+                return self.url
+            return url_for("forum.view_post", post_id=post_id)
+
         # If the topic is unread try to get the first unread post
         if topic_is_unread(self, topicsread, user, forumsread):
             stmt = db.select(Post).filter(Post.topic_id == self.id)
-            if topicsread is not None:
-                stmt = stmt.filter(Post.date_created > topicsread.last_read)
+            last_read = self._last_read(topicsread, forumsread)
+            if last_read is not None:
+                stmt = stmt.filter(Post.date_created > last_read)
             post = db.session.execute(stmt.order_by(Post.id.asc())).scalar()
             if post is not None:
                 return post.url
 
         return self.url
 
+    def _last_read(
+        self,
+        topicsread: "TopicsRead | None",
+        forumsread: ForumsRead | ReadMark | None,
+    ) -> datetime | None:
+        """Returns when the user has read the topic the last time, as far
+        as the first unread post is concerned."""
+        if isinstance(forumsread, ReadMark):
+            return forumsread.last_read(self)
+        if topicsread is not None:
+            return topicsread.last_read
+        return None
+
+    @classmethod
+    def resolve_first_unread(
+        cls,
+        rows: "Iterable[tuple[Topic, TopicsRead | None, ForumsRead | ReadMark | None]]",
+        user: "User",
+    ):
+        """Resolves the first unread post of every topic of a page with
+        one grouped query, so that :meth:`first_unread` only has to build
+        the url afterwards.
+
+        :param rows: ``(topic, topicsread, forumsread)`` tuples of the
+                     topics on the page. If the read marks are used,
+                     ``forumsread`` are the read marks of the forum.
+        :param user: The user who is viewing the topics.
+        """
+        topics = {}
+        conditions = []
+        for topic, topicsread, forumsread in rows:
+            topic._first_unread_post_id = None
+            if not topic_is_unread(topic, topicsread, user, forumsread):
+                continue
+
+            topics[topic.id] = topic
+            condition = Post.topic_id == topic.id
+            last_read = topic._last_read(topicsread, forumsread)
+            if last_read is not None:
+                condition = db.and_(condition, Post.date_created > last_read)
+            conditions.append(condition)
+
+        if not conditions:
+            return
+
+        first_unread = db.session.execute(
+            db.select(Post.topic_id, db.func.min(Post.id))
+            .where(or_(*conditions))
+            .group_by(Post.topic_id)
+        )
+        for topic_id, post_id in first_unread:
+            topics[topic_id]._first_unread_post_id = post_id
+
     @classmethod
     def get_topic(cls, topic_id: int, user: "User"):
         topic = db.session.execute(
@@ -692,60 +1301,63 @@ class Topic(HideableCRUDMixin, db.Model):
         logger.debug("Topic is unread.")
         return True
 
-    def update_read(self, user: "User", forum: "Forum", forumsread: "ForumsRead"):
+    def update_read(
+        self,
+        user: "User",
+        forum: "Forum",
+        forumsread: "ForumsRead | ReadMark | None",
+    ):
         """Updates the topicsread and forumsread tracker for a specified user,
         if the topic contains new posts or the user hasn't read the topic.
         Returns True if the tracker has been updated.
 
+        The topicsread tracker is written with a single upsert which only
+        changes it if there are new posts, and everything is committed in
+        one transaction.
+
         :param user: The user for whom the readstracker should be updated.
         :param forum: The forum in which the topic is.
         :param forumsread: The forumsread object. It is used to check if there
                            is a new post since the forum has been marked as
-                           read.
+                           read. If the read marks of the user in the forum
+                           are passed instead, only they are updated.
         """
         # User is not logged in - abort
         if not user.is_authenticated:
             return False
 
-        topicsread = db.session.execute(
-            db.select(TopicsRead).filter_by(user_id=user.id, topic_id=self.id)
-        ).scalar_one_or_none()
+        if isinstance(forumsread, ReadMark):
+            if not forumsread.is_unread(self):
+                return False
 
-        if not self.tracker_needs_update(forumsread, topicsread):
-            return False
+            forumsread.mark_topic_read(self, compact=True)
+            forumsread.save()
+            return True
 
-        # Because we return True/False if the trackers have been
-        # updated, we need to store the status in a temporary variable
-        updated = False
-
-        # A new post has been submitted that the user hasn't read.
-        # Updating...
-        if topicsread:
-            logger.debug("Updating existing TopicsRead '{}' object.".format(topicsread))
-            topicsread.last_read = time_utcnow()
-            topicsread.save()
-            updated = True
-
-        # The user has not visited the topic before. Inserting him in
-        # the TopicsRead model.
-        elif not topicsread:
-            logger.debug("Creating new TopicsRead object.")
-            topicsread = TopicsRead()
-            topicsread.user = user
-            topicsread.topic = self
-            topicsread.forum = self.forum
-            topicsread.last_read = time_utcnow()
-            topicsread.save()
-            updated = True
-
-        # No unread posts
-        else:
-            updated = False
+        # the topicsread tracker is checked by the upsert itself
+        if not self.tracker_needs_update(forumsread, None):
+            return False
 
-        # Save True/False if the forums tracker has been updated.
-        updated = forum.update_read(user, forumsread, topicsread)
+        last_read = time_utcnow()
+        updated = upsert(
+            TopicsRead,
+            {
+                "user_id": user.id,
+                "topic_id": self.id,
+                "forum_id": self.forum_id,
+                "last_read": last_read,
+            },
+            index_elements=["user_id", "topic_id", "forum_id"],
+            set_={"last_read": last_read},
+            where=TopicsRead.last_read < self.last_post.date_created,
+        )
+        if not updated:
+            logger.debug("The last post in this topic has already been read.")
+            return False
 
-        return updated
+        forum.update_read(user, forumsread, last_read, commit=False)
+        db.session.commit()
+        return True
 
     def recalculate(self):
         """Recalculates the post count in the topic."""
@@ -830,11 +1442,17 @@ class Topic(HideableCRUDMixin, db.Model):
             # Create the topic post
             self._post.save(user, self)
 
-            # Update the first and last post id
-            self.last_post = self.first_post = self._post
+            # Update the first post id, the post has become the last
+            # post already
+            self.first_post = self._post
 
             # Update the topic count
-            forum.topic_count += 1
+            db.session.execute(
+                db.update(Forum)
+                .where(Forum.id == forum.id)
+                .values(topic_count=Forum.topic_count + 1)
+            )
+            db.session.expire(forum, ["topic_count"])
 
         db.session.commit()
         pluggy.hook.flaskbb_event_topic_save_after(topic=self, is_new=True)
@@ -1131,11 +1749,19 @@ class Forum(db.Model, CRUDMixin):
             db.session.commit()
 
     def update_read(
-        self, user: User, forumsread: ForumsRead | None, topicsread: TopicsRead | None
+        self,
+        user: User,
+        forumsread: ForumsRead | None,
+        topicsread: TopicsRead | datetime | None,
+        commit: bool = True,
     ):
         """Updates the ForumsRead status for the user. In order to work
         correctly, be sure that `topicsread is **not** `None`.
 
+        The forum is only checked for unread topics if it has new posts
+        since the user has read it completely and the check stops at the
+        first unread topic.
+
         :param user: The user for whom we should check if he has read the
                      forum.
 
@@ -1146,24 +1772,38 @@ class Forum(db.Model, CRUDMixin):
                            is still unread) we are just going to update the
                            entry in the `ForumsRead` relation.
 
-        :param topicsread: The topicsread object is used in combination
+        :param topicsread: The topicsread object or the time the topic has
+                           just been read. It is used in combination
                            with the forumsread object to check if the
                            forumsread relation should be updated and
                            therefore is unread.
+
+        :param commit: Whether the forumsread tracker should be committed.
         """
         if not user.is_authenticated or topicsread is None:
             return False
 
+        last_read = topicsread
+        if isinstance(topicsread, TopicsRead):
+            last_read = topicsread.last_read
+
+        if (
+            forumsread
+            and self.last_post_created is not None
+            and forumsread.last_read >= self.last_post_created
+        ):
+            logger.debug("No new posts since the forum has been read.")
+            return False
+
         read_cutoff = None
         if flaskbb_config["TRACKER_LENGTH"] > 0:
             read_cutoff = time_utcnow() - timedelta(
                 days=flaskbb_config["TRACKER_LENGTH"]
             )
 
-        # fetch the unread posts in the forum
-        unread_count = db.session.execute(
-            db.select(db.func.count())
-            .select_from(Topic)
+        # look for an unread topic in the forum
+        unread = db.session.execute(
+            db.select(Topic.id)
             .outerjoin(
                 TopicsRead,
                 db.and_(TopicsRead.topic_id == Topic.id, TopicsRead.user_id == user.id),
@@ -1187,46 +1827,31 @@ class Forum(db.Model, CRUDMixin):
                     ForumsRead.last_read < Topic.last_updated,
                 ),
             )
-        ).scalar_one()
-
-        # No unread topics available - trying to mark the forum as read
-        if unread_count == 0:
-            logger.debug("No unread topics. Trying to mark the forum as read.")
-
-            if forumsread and forumsread.last_read > topicsread.last_read:
-                logger.debug(
-                    "forumsread.last_read is newer than topicsread.last_read. Everything is read."
-                )
-                return False
+            .limit(1)
+        ).scalar()
 
-            # ForumRead Entry exists - Updating it because a new topic/post
-            # has been submitted and has read everything (obviously, else the
-            # unread_count would be useless).
-            elif forumsread:
-                logger.debug(
-                    "Updating existing ForumsRead '{}' object.".format(forumsread)
-                )
-                forumsread.last_read = time_utcnow()
-                forumsread.save()
-                return True
-
-            # No ForumRead Entry existing - creating one.
-            logger.debug("Creating new ForumsRead object.")
-            forumsread = ForumsRead()
-            forumsread.user = user
-            forumsread.forum = self
-            forumsread.last_read = time_utcnow()
-            forumsread.save()
-            return True
+        if unread is not None:
+            logger.debug("No ForumsRead object updated - there are unread topics.")
+            return False
 
-        # Nothing updated, because there are still more than 0 unread
-        # topicsread
-        logger.debug(
-            "No ForumsRead object updated - there are still {} unread topics.".format(
-                unread_count
+        # No unread topics available - trying to mark the forum as read
+        logger.debug("No unread topics. Trying to mark the forum as read.")
+        if forumsread and forumsread.last_read > last_read:
+            logger.debug(
+                "forumsread.last_read is newer than topicsread.last_read. Everything is read."
             )
+            return False
+
+        now = time_utcnow()
+        upsert(
+            ForumsRead,
+            {"user_id": user.id, "forum_id": self.id, "last_read": now},
+            index_elements=["user_id", "forum_id"],
+            set_={"last_read": now},
         )
-        return False
+        if commit:
+            db.session.commit()
+        return True
 
     def recalculate(self, last_post: bool = False):
         """Recalculates the post_count and topic_count in the forum.
@@ -1325,18 +1950,20 @@ class Forum(db.Model, CRUDMixin):
 
         :param forum_id: The forum id
         :param user: The user object is needed to check if we also need their
-                     forumsread object.
+                     forumsread object. If the read marks are used, the
+                     read marks of the user are returned instead.
         """
         if user.is_authenticated:
+            tracker = ReadMark if use_readmarks() else ForumsRead
             item = db.session.execute(
-                db.select(cls, ForumsRead)
+                db.select(cls, tracker)
                 .filter(cls.id == forum_id)
                 .options(db.joinedload(cls.category))
                 .outerjoin(
-                    ForumsRead,
+                    tracker,
                     db.and_(
-                        ForumsRead.forum_id == cls.id,
-                        ForumsRead.user_id == user.id,
+                        tracker.forum_id == cls.id,
+                        tracker.user_id == user.id,
                     ),
                 )
             ).first()
@@ -1356,17 +1983,36 @@ class Forum(db.Model, CRUDMixin):
         return forum, forumsread
 
     @classmethod
-    def get_topics(cls, forum_id: int, user: User, page: int = 1, per_page: int = 20):
+    def get_topics(
+        cls,
+        forum_id: int,
+        user: User,
+        page: int = 1,
+        per_page: int = 20,
+        cursor: str | None = None,
+        forumsread: ForumsRead | ReadMark | None = None,
+    ):
         """Get the topics for the forum. If the user is logged in,
         it will perform an outerjoin for the topics with the topicsread and
         forumsread relation to check if it is read or unread.
 
+        The adjacent pages are loaded by seeking on
+        ``(important, last_updated, id)`` if a cursor is given.
+
         :param forum_id: The forum id
         :param user: The user object
         :param page: The page whom should be loaded
         :param per_page: How many topics per page should be shown
+        :param cursor: The cursor which leads to the page, see
+                       :class:`~flaskbb.utils.queries.KeysetPagination`.
+        :param forumsread: The forumsread object of the user for the forum,
+                           it is needed to resolve the first unread posts
+                           of the topics. If the read marks are used, these
+                           are the read marks of the user and the topicsread
+                           objects of the topics are always ``None``.
         """
-        if user.is_authenticated:
+        track_topics = user.is_authenticated and not use_readmarks()
+        if track_topics:
             # Now thats intersting - if i don't do the add_entity(Post)
             # the n+1 still exists when trying to access 'topic.last_post'
             # but without it it will fire another query.
@@ -1383,22 +2029,43 @@ class Forum(db.Model, CRUDMixin):
                 )
                 .outerjoin(Post, Topic.last_post_id == Post.id)
                 .where(Topic.forum_id == forum_id)
-                .order_by(Topic.important.desc(), Topic.last_updated.desc())
             )
-            hidden(stmt)
-            topics = paginate(stmt, page=page, per_page=per_page)
         else:
             stmt = (
                 db.select(Topic, Post)
                 .outerjoin(Post, Topic.last_post_id == Post.id)
                 .where(Topic.forum_id == forum_id)
-                .order_by(Topic.important.desc(), Topic.last_updated.desc())
             )
-            stmt = hidden(stmt)
-            topics = paginate(stmt, page=page, per_page=per_page)
+        stmt = hidden(stmt)
+
+        # hidden topics are not included in the topic count of the forum
+        if user.permissions.get("viewhidden", False):
+            total = partial(approximate_count, stmt, f"forum-topics/{forum_id}")
+        else:
+            forum = db.session.get(Forum, forum_id)
+            total = forum.topic_count if forum is not None else 0
+
+        topics = paginate(
+            stmt,
+            page=page,
+            per_page=per_page,
+            keys=[Topic.important, Topic.last_updated, Topic.id],
+            descending=True,
+            cursor=cursor,
+            total=total,
+        )
+        if not track_topics:
             topics.items = [
                 (topic, last_post, None) for topic, last_post in topics.items
             ]
+        if user.is_authenticated:
+            Topic.resolve_first_unread(
+                [
+                    (topic, topicsread, forumsread)
+                    for topic, _, topicsread in topics.items
+                ],
+                user,
+            )
         return topics
 
 
@@ -1490,7 +2157,8 @@ class Category(db.Model, CRUDMixin):
              (<Category 2>, [(<Forum 3>, None), (<Forum 4>, None)])]
 
         :param user: The user object is needed to check if we also need their
-                     forumsread object.
+                     forumsread object. If the read marks are used, they
+                     take the place of the forumsread objects.
         """
         # import Group model locally to avoid cicular imports
         from flaskbb.user.models import Group
@@ -1506,20 +2174,21 @@ class Category(db.Model, CRUDMixin):
             )
 
             forum_alias = aliased(Forum, user_forums)
+            tracker = ReadMark if use_readmarks() else ForumsRead
             # get all
             forums = (
                 db.session.execute(
-                    db.select(cls, forum_alias, ForumsRead)
+                    db.select(cls, forum_alias, tracker)
                     .join(forum_alias, cls.id == forum_alias.category_id)
                     .outerjoin(
-                        ForumsRead,
+                        tracker,
                         db.and_(
-                            ForumsRead.forum_id == forum_alias.id,
-                            ForumsRead.user_id == user.id,
+                            tracker.forum_id == forum_alias.id,
+                            tracker.user_id == user.id,
                         ),
                     )
                     .add_columns(forum_alias)
-                    .add_columns(ForumsRead)
+                    .add_columns(tracker)
                     .order_by(Category.position, Category.id, forum_alias.position)
                 )
                 .unique()
@@ -1559,7 +2228,8 @@ class Category(db.Model, CRUDMixin):
 
         :param category_id: The category id
         :param user: The user object is needed to check if we also need their
-                     forumsread object.
+                     forumsread object. If the read marks are used, they
+                     take the place of the forumsread objects.
         """
         from flaskbb.user.models import Group
 
@@ -1574,20 +2244,21 @@ class Category(db.Model, CRUDMixin):
             )
 
             forum_alias = aliased(Forum, user_forums)
+            tracker = ReadMark if use_readmarks() else ForumsRead
             forums = (
                 db.session.execute(
-                    db.select(cls, forum_alias, ForumsRead)
+                    db.select(cls, forum_alias, tracker)
                     .filter(cls.id == category_id)
                     .join(forum_alias, cls.id == forum_alias.category_id)
                     .outerjoin(
-                        ForumsRead,
+                        tracker,
                         db.and_(
-                            ForumsRead.forum_id == forum_alias.id,
-                            ForumsRead.user_id == user.id,
+                            tracker.forum_id == forum_alias.id,
+                            tracker.user_id == user.id,
                         ),
                     )
                     .add_columns(forum_alias)
-                    .add_columns(ForumsRead)
+                    .add_columns(tracker)
                     .order_by(forum_alias.position)
                 )
                 .unique()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.forum.trackers
+~~~~~~~~~~~~~~~~~~~~~~
+
+Maintenance of the read trackers. Trackers which are older than the
+``TRACKER_LENGTH`` setting don't change if a topic is read or unread
+anymore, so they are deleted in small batches by a celery beat task or
+the ``flaskbb prune-trackers`` command.
+
+:copyright: (c) 2014-2018 the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import logging
+import time
+from datetime import datetime
+
+import attr
+from flask import current_app
+from sqlalchemy import tuple_
+
+from flaskbb.extensions import celery, db
+from flaskbb.forum.models import ForumsRead, TopicsRead, read_cutoff
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class PruneReport(object):
+    """How many trackers have been deleted from which table and how long
+    it took."""
+
+    deleted = attr.ib(factory=dict)
+    elapsed = attr.ib(default=0.0)
+
+    @property
+    def total(self) -> int:
+        return sum(self.deleted.values())
+
+
+class TrackerPruner(object):
+    """Deletes the expired topicsread and forumsread trackers.
+
+    Every batch selects the primary keys of at most ``batch_size``
+    expired trackers, deletes them and is committed on its own, so that
+    the rows are only locked for a short time. The expiry is checked
+    again while deleting, trackers which have been updated in the
+    meantime are kept.
+
+    :param batch_size: How many trackers are deleted in one transaction.
+    :param pause: How many seconds to wait between two batches, which
+                  limits the rate of deletes on a busy database.
+    """
+
+    def __init__(self, batch_size: int = 1000, pause: float = 0.0):
+        self.batch_size = batch_size
+        self.pause = pause
+
+    @classmethod
+    def from_config(cls) -> "TrackerPruner":
+        """Returns a pruner configured with ``TRACKER_PRUNE_BATCH_SIZE``
+        and ``TRACKER_PRUNE_PAUSE``."""
+        return cls(
+            batch_size=current_app.config["TRACKER_PRUNE_BATCH_SIZE"],
+            pause=current_app.config["TRACKER_PRUNE_PAUSE"],
+        )
+
+    def prune(self, cutoff: datetime | None = None) -> PruneReport:
+        """Deletes the trackers which are older than ``cutoff`` and returns
+        a :class:`PruneReport`. Nothing is deleted if the read tracker is
+        disabled.
+
+        :param cutoff: Defaults to ``TRACKER_LENGTH`` days ago.
+        """
+        start = time.monotonic()
+        report = PruneReport()
+        if cutoff is None:
+            cutoff = read_cutoff()
+        if cutoff is None:
+            logger.debug("Readtracker is disabled, nothing to prune.")
+            return report
+
+        tables = [
+            (TopicsRead, TopicsRead.last_read < cutoff),
+            (
+                ForumsRead,
+                db.and_(
+                    ForumsRead.last_read < cutoff,
+                    db.or_(ForumsRead.cleared.is_(None), ForumsRead.cleared < cutoff),
+                ),
+            ),
+        ]
+        for model, expired in tables:
+            name = model.__tablename__
+            report.deleted[name] = 0
+            while True:
+                selected, deleted = self._delete_batch(model, expired)
+                report.deleted[name] += deleted
+                if selected < self.batch_size:
+                    break
+                if self.pause:
+                    time.sleep(self.pause)
+
+        report.elapsed = time.monotonic() - start
+        logger.info(
+            f"Pruned {report.total} read trackers in {report.elapsed:.2f}s: "
+            f"{report.deleted}"
+        )
+        return report
+
+    def _delete_batch(self, model, expired) -> tuple[int, int]:
+        """Returns how many expired trackers have been selected and how
+        many of them have been deleted."""
+        columns = list(model.__table__.primary_key.columns)
+        try:
+            keys = db.session.execute(
+                db.select(*columns).where(expired).limit(self.batch_size)
+            ).all()
+            if not keys:
+                db.session.rollback()
+                return 0, 0
+
+            deleted = db.session.execute(
+                db.delete(model).where(
+                    tuple_(*columns).in_([tuple(key) for key in keys]), expired
+                ),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(keys), deleted
+
+
+@celery.task
+def prune_trackers():
+    """Deletes the read trackers that are older than ``TRACKER_LENGTH``
+    days. Scheduled by celery beat every ``TRACKER_PRUNE_INTERVAL``
+    seconds.
+    """
+    report = TrackerPruner.from_config().prune()
+    return {"deleted": report.deleted, "elapsed": report.elapsed}
@@ -10,8 +10,10 @@ topics and posts.
 :license: BSD, see LICENSE for more details.
 """
 
+import hashlib
 import logging
 import math
+from functools import partial
 
 from flask import (
     Blueprint,
@@ -30,7 +32,8 @@ from flask_login import current_user, login_required
 from pluggy import HookimplMarker
 from sqlalchemy import asc, desc
 
-from flaskbb.extensions import allows, db, pluggy
+from flaskbb.extensions import allows, cache, db, limiter, pluggy
+from flaskbb.forum.counters import topic_view_counter
 from flaskbb.forum.forms import (
     EditTopicForm,
     NewTopicForm,
@@ -45,11 +48,12 @@ from flaskbb.forum.models import (
     Forum,
     ForumsRead,
     Post,
+    ReadMark,
     Topic,
     TopicsRead,
     topictracker,
+    use_readmarks,
 )
-from flaskbb.markup import make_renderer
 from flaskbb.user.models import User
 from flaskbb.utils.helpers import (
     FlashAndRedirect,
@@ -60,9 +64,8 @@ from flaskbb.utils.helpers import (
     register_view,
     render_template,
     time_diff,
-    time_utcnow,
 )
-from flaskbb.utils.queries import first_or_404, hidden, paginate
+from flaskbb.utils.queries import approximate_count, first_or_404, hidden, paginate
 from flaskbb.utils.requirements import (
     CanAccessForum,
     CanDeletePost,
@@ -154,6 +157,8 @@ class ViewForum(MethodView):
             user=real(current_user),
             page=page,
             per_page=flaskbb_config["TOPICS_PER_PAGE"],
+            cursor=request.args.get("cursor"),
+            forumsread=forumsread,
         )
 
         return render_template(
@@ -215,13 +220,14 @@ class ViewTopic(MethodView):
         # Fetch some information about the topic
         topic = Topic.get_topic(topic_id=topic_id, user=real(current_user))
 
-        # Count the topic views
-        topic.views += 1
-        topic.save()
+        # Count the topic views, they are written to the database in batches
+        topic_view_counter.add(topic.id)
 
         # Update the topicsread status if the user hasn't read it
         forumsread = None
-        if current_user.is_authenticated:
+        if current_user.is_authenticated and use_readmarks():
+            forumsread = ReadMark.for_user(real(current_user), topic.forum_id)
+        elif current_user.is_authenticated:
             forumsread = db.session.execute(
                 db.select(ForumsRead).where(
                     ForumsRead.user_id == current_user.id,
@@ -234,12 +240,25 @@ class ViewTopic(MethodView):
         # fetch the posts in the topic
         stmt = (
             db.select(Post, User)
-            .options(db.joinedload(Post.user))
+            .outerjoin(User, Post.user_id == User.id)
+            .options(db.contains_eager(Post.user))
             .where(Post.topic_id == topic.id)
-            .order_by(Post.id.asc())
         )
+        stmt = hidden(stmt)
+
+        # Hidden posts are not included in the post count of the topic
+        total = topic.post_count
+        if current_user.permissions.get("viewhidden", False):
+            total = partial(approximate_count, stmt, f"topic-posts/{topic.id}")
+
+        # seeks on the post id when moving to the next or previous page
         posts = paginate(
-            hidden(stmt), page=page, per_page=flaskbb_config["POSTS_PER_PAGE"]
+            stmt,
+            page=page,
+            per_page=flaskbb_config["POSTS_PER_PAGE"],
+            keys=[Post.id],
+            cursor=request.args.get("cursor"),
+            total=total,
         )
 
         # Abort if there are no posts on this page
@@ -411,6 +430,8 @@ class ManageForum(MethodView):
             user=real(current_user),
             page=page,
             per_page=flaskbb_config["TOPICS_PER_PAGE"],
+            cursor=request.args.get("cursor"),
+            forumsread=forumsread,
         )
 
         return render_template(
@@ -729,35 +750,46 @@ class TopicTracker(MethodView):
 
     def get(self):
         page = request.args.get("page", 1, type=int)
-        stmt = (
-            db.select(Topic, Post, TopicsRead, ForumsRead)
-            .where(
-                db.and_(
-                    topictracker.c.topic_id == Topic.id,
-                    topictracker.c.user_id == current_user.id,
-                )
-            )
-            .outerjoin(
+        # the read marks of the forum replace the topicsread objects
+        if use_readmarks():
+            tracker = ReadMark
+            stmt = db.select(Topic, Post, db.null(), ReadMark)
+        else:
+            tracker = ForumsRead
+            stmt = db.select(Topic, Post, TopicsRead, ForumsRead).outerjoin(
                 TopicsRead,
                 db.and_(
                     TopicsRead.topic_id == Topic.id,
                     TopicsRead.user_id == current_user.id,
                 ),
             )
+        stmt = (
+            stmt.where(
+                db.and_(
+                    topictracker.c.topic_id == Topic.id,
+                    topictracker.c.user_id == current_user.id,
+                )
+            )
             .outerjoin(Post, Topic.last_post_id == Post.id)
             .outerjoin(Forum, Topic.forum_id == Forum.id)
             .outerjoin(
-                ForumsRead,
+                tracker,
                 db.and_(
-                    ForumsRead.forum_id == Forum.id,
-                    ForumsRead.user_id == current_user.id,
+                    tracker.forum_id == Forum.id,
+                    tracker.user_id == current_user.id,
                 ),
             )
-            .where()
             .order_by(Topic.last_updated.desc())
         )
 
         topics = paginate(stmt, page=page)
+        Topic.resolve_first_unread(
+            [
+                (topic, topicsread, forumsread)
+                for topic, _, topicsread, forumsread in topics.items
+            ],
+            real(current_user),
+        )
 
         return render_template("forum/topictracker.html", topics=topics)
 
@@ -785,16 +817,29 @@ class Search(MethodView):
     form = SearchPageForm
 
     def get(self):
-        return render_template("forum/search_form.html", form=self.form())
+        # the further pages of the results are requested with the query args
+        if "search_query" not in request.args:
+            return render_template("forum/search_form.html", form=self.form())
+
+        form = self.form(request.args, meta={"csrf": False})
+        if form.validate():
+            return self.render_results(form)
+        return render_template("forum/search_form.html", form=form)
 
     def post(self):
         form = self.form()
         if form.validate_on_submit():
-            result = form.get_results()
-            return render_template("forum/search_result.html", form=form, result=result)
+            return self.render_results(form)
 
         return render_template("forum/search_form.html", form=form)
 
+    def render_results(self, form: SearchPageForm):
+        result = form.get_results(
+            page=request.args.get("page", 1, type=int),
+            per_page=flaskbb_config["TOPICS_PER_PAGE"],
+        )
+        return render_template("forum/search_result.html", form=form, result=result)
+
 
 class DeleteTopic(MethodView):
     decorators = [
@@ -958,33 +1003,12 @@ class MarkRead(MethodView):
     ]
 
     def post(self, forum_id: int | None = None, slug: str | None = None):
+        tracker = ReadMark if use_readmarks() else ForumsRead
+
         # Mark a single forum as read
         if forum_id is not None:
             forum_instance = first_or_404(db.select(Forum).where(Forum.id == forum_id))
-            forumsread = db.session.execute(
-                db.select(ForumsRead).where(
-                    ForumsRead.user_id == real(current_user).id,
-                    ForumsRead.forum_id == forum_instance.id,
-                )
-            ).scalar()
-
-            db.session.execute(
-                db.delete(TopicsRead).where(
-                    TopicsRead.user_id == real(current_user).id,
-                    TopicsRead.forum_id == forum_instance.id,
-                )
-            )
-
-            if not forumsread:
-                forumsread = ForumsRead()
-                forumsread.user = real(current_user)
-                forumsread.forum = forum_instance
-
-            forumsread.last_read = time_utcnow()
-            forumsread.cleared = time_utcnow()
-
-            db.session.add(forumsread)
-            db.session.commit()
+            tracker.mark_read(real(current_user), forum_instance.id)
 
             flash(
                 _("Forum %(forum)s marked as read.", forum=forum_instance.title),
@@ -994,26 +1018,7 @@ class MarkRead(MethodView):
             return redirect(forum_instance.url)
 
         # Mark all forums as read
-
-        db.session.execute(
-            db.delete(ForumsRead).where(ForumsRead.user_id == real(current_user).id)
-        )
-        db.session.execute(
-            db.delete(TopicsRead).where(TopicsRead.user_id == real(current_user).id)
-        )
-
-        forums = db.session.execute(db.select(Forum)).scalars()
-        forumsread_list = []
-        for forum_instance in forums:
-            forumsread = ForumsRead()
-            forumsread.user = real(current_user)
-            forumsread.forum = forum_instance
-            forumsread.last_read = time_utcnow()
-            forumsread.cleared = time_utcnow()
-            forumsread_list.append(forumsread)
-
-        db.session.add_all(forumsread_list)
-        db.session.commit()
+        tracker.mark_all_read(real(current_user))
 
         flash(_("All forums marked as read."), "success")
 
@@ -1156,21 +1161,40 @@ class UnhidePost(MethodView):
         return redirect(post.topic.url)
 
 
+def preview_rate_limit_key():
+    """Rate limits the markdown previews per user, or per ip for guests."""
+    if current_user.is_authenticated:
+        return f"user/{current_user.id}"
+    return f"ip/{request.remote_addr}"
+
+
 class MarkdownPreview(MethodView):
+    decorators = [
+        limiter.limit(
+            lambda: current_app.config["MARKDOWN_PREVIEW_RATE_LIMIT"],
+            key_func=preview_rate_limit_key,
+        )
+    ]
+
     def post(self, mode: str | None = None):
         text = request.data.decode("utf-8")
-
-        if mode == "nonpost":
-            render_classes = pluggy.hook.flaskbb_load_nonpost_markdown_class(
-                app=current_app
-            )
-        else:
-            render_classes = pluggy.hook.flaskbb_load_post_markdown_class(
-                app=current_app
-            )
-
-        renderer = make_renderer(render_classes)
-        preview = renderer(text)
+        mode = "nonpost" if mode == "nonpost" else "post"
+
+        # the same preview requested again (e.g. by clicking the preview
+        # button twice) is served from the cache
+        debounce = current_app.config["MARKDOWN_PREVIEW_DEBOUNCE"]
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        key = f"markdown-preview/{preview_rate_limit_key()}/{mode}/{digest}"
+        if debounce:
+            preview = cache.get(key)
+            if preview is not None:
+                return preview
+
+        # uses the renderers which have been set up by flaskbb_jinja_directives
+        filter_name = "nonpost_markup" if mode == "nonpost" else "markup"
+        preview = str(current_app.jinja_env.filters[filter_name](text))
+        if debounce:
+            cache.set(key, preview, timeout=debounce)
         return preview
 
 
@@ -10,8 +10,10 @@ This module contains all management related models.
 """
 
 import logging
+import uuid
 from typing import override
 
+from flask import g, has_app_context
 from sqlalchemy import Enum, ForeignKey, PickleType, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -22,6 +24,11 @@ from flaskbb.utils.queries import first_or_404
 
 logger = logging.getLogger(__name__)
 
+#: The cache key that holds the version stamp of the settings.
+SETTINGS_VERSION_KEY = "settings-version"
+#: The attribute on :data:`flask.g` that memoizes the settings per request.
+SETTINGS_REQUEST_KEY = "_flaskbb_settings"
+
 
 class SettingsGroup(db.Model, CRUDMixin):
     __tablename__ = "settingsgroup"
@@ -148,7 +155,32 @@ class Setting(db.Model, CRUDMixin):
 
         return settings
 
+    @classmethod
+    def get_version(cls) -> str | None:
+        """Returns the current version stamp of the settings. The stamp
+        changes every time the settings are invalidated and is used by
+        processes that keep their own copy of the settings to find out if
+        they need to reload them.
+
+        Returns ``None`` if the cache can't hold the stamp (i.e. the
+        ``NullCache``), in which case the settings have to be reloaded
+        every time.
+        """
+        version = cache.get(SETTINGS_VERSION_KEY)
+        if version is None:
+            # the stamp got evicted (or was never set) - everyone reloads once
+            cache.add(SETTINGS_VERSION_KEY, uuid.uuid4().hex, timeout=0)
+            version = cache.get(SETTINGS_VERSION_KEY)
+        return version
+
     @classmethod
     def invalidate_cache(cls):
-        """Invalidates this objects cached metadata."""
+        """Invalidates this objects cached metadata and bumps the version
+        stamp of the settings."""
         cache.delete_memoized(cls.as_dict, cls)
+        # A random stamp instead of an incrementing counter, so that an
+        # evicted counter can never be reset to a value a process already saw
+        cache.set(SETTINGS_VERSION_KEY, uuid.uuid4().hex, timeout=0)
+
+        if has_app_context():
+            g.pop(SETTINGS_REQUEST_KEY, None)
@@ -636,6 +636,8 @@ class EditGroup(MethodView):
 
             if group.guest:
                 Guest.invalidate_cache()
+            else:
+                Group.invalidate_cache()
 
             flash(_("Group updated."), "success")
             return redirect(url_for("management.groups", group_id=group.id))
@@ -678,6 +680,7 @@ class DeleteGroup(MethodView):
                             "reverse_url": None,
                         }
                     )
+                Group.invalidate_cache()
 
                 return jsonify(
                     message="{} groups deleted.".format(len(data)),
@@ -705,6 +708,7 @@ class DeleteGroup(MethodView):
 
             group = Group.get_by_or_404(id=group_id)
             group.delete()
+            Group.invalidate_cache()
             flash(_("Group deleted."), "success")
             return redirect(url_for("management.groups"))
 
@@ -9,12 +9,16 @@ A module for all markup related stuff.
 :license: BSD, see LICENSE for more details.
 """
 
+import functools
+import hashlib
 import logging
 import re
-from typing import Callable
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable
 
 import mistune
-from flask import Flask, url_for
+from flask import Flask, current_app, url_for
 from markupsafe import Markup
 from mistune.plugins import PluginRef
 from mistune.plugins.abbr import abbr
@@ -35,11 +39,16 @@ from mistune.plugins.url import url
 from pluggy import HookimplMarker
 from pygments import highlight
 from pygments.formatters import HtmlFormatter
+from pygments.lexer import Lexer
 from pygments.lexers import get_lexer_by_name
 from pygments.util import ClassNotFound
 from typing_extensions import Iterable
 
-from flaskbb.extensions import pluggy
+from flaskbb.extensions import cache, pluggy
+
+if TYPE_CHECKING:
+    from flaskbb.forum.models import Post
+    from flaskbb.user.models import User
 
 impl = HookimplMarker("flaskbb")
 
@@ -103,23 +112,39 @@ DEFAULT_PLUGINS = [
 ]
 
 
+#: The formatter is stateless and therefore shared by all code blocks
+formatter = HtmlFormatter()
+
+
+@functools.lru_cache(maxsize=128)
+def get_lexer(alias: str) -> Lexer | None:
+    """Returns the lexer for a language alias or ``None`` if there is no
+    such lexer. Looking up a lexer is expensive, therefore the instances
+    are cached.
+
+    :param alias: The alias of the language, e.g. ``python``.
+    """
+    try:
+        return get_lexer_by_name(alias, stripall=True)
+    except ClassNotFound:
+        return None
+
+
 class FlaskBBRenderer(mistune.HTMLRenderer):
     """Mistune renderer that uses pygments to apply code highlighting."""
 
+    #: Code blocks larger than this (in characters) are not highlighted
+    max_highlight_size = 20 * 1024
+
     def __init__(self, **kwargs):
         super(FlaskBBRenderer, self).__init__(**kwargs)
 
     def block_code(self, code: str, info: str | None = None):
-        if info:
-            try:
-                lexer = get_lexer_by_name(info, stripall=True)
-            except ClassNotFound:
-                lexer = None
-        else:
-            lexer = None
+        lexer = None
+        if info and info.strip() and len(code) <= self.max_highlight_size:
+            lexer = get_lexer(info.split(None, 1)[0].lower())
         if not lexer:
             return "\n<pre><code>%s</code></pre>\n" % mistune.escape(code)
-        formatter = HtmlFormatter()
         return highlight(code, lexer, formatter)
 
 
@@ -133,18 +158,177 @@ def flaskbb_load_nonpost_markdown_class():
     return FlaskBBRenderer
 
 
+class LocalRenderCache(object):
+    """Keeps the rendered markup in a LRU cache inside the process."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SharedRenderCache(object):
+    """Keeps the rendered markup in the configured cache (see
+    ``CACHE_TYPE``) which can be shared between processes."""
+
+    def __init__(self, timeout: int | None = None):
+        self.timeout = timeout
+
+    def get(self, key: str) -> Any:
+        return cache.get(key)
+
+    def set(self, key: str, value: Any):
+        cache.set(key, value, timeout=self.timeout)
+
+    def delete(self, key: str):
+        cache.delete(key)
+
+
+class MarkupCache(object):
+    """Caches the rendered HTML of posts and signatures.
+
+    An entry is stored per object together with a stamp of the rendered
+    version, i.e. the modification date of a post. If the stamp doesn't
+    match anymore, the markup is rendered again and replaces the entry.
+    The keys contain a hash of the renderer configuration, so changing the
+    renderer classes or markdown plugins invalidates all entries.
+
+    :param renderer: The renderer, see :func:`make_renderer`.
+    :param config_hash: A hash of the configuration of the renderer,
+                        see :func:`renderer_config_hash`.
+    :param backend: Where the markup is cached. If ``None``, the markup is
+                    always rendered.
+    """
+
+    def __init__(
+        self,
+        renderer: Callable[[str], Markup],
+        config_hash: str,
+        backend: LocalRenderCache | SharedRenderCache | None = None,
+    ):
+        self.renderer = renderer
+        self.config_hash = config_hash
+        self.backend = backend
+
+    def key(self, kind: str, obj_id: int) -> str:
+        return f"markup/{self.config_hash}/{kind}/{obj_id}"
+
+    def render(self, kind: str, obj_id: int | None, stamp: str, text: str) -> Markup:
+        """Returns the rendered markup for ``text`` which belongs to the
+        object ``obj_id`` of type ``kind``.
+        """
+        if self.backend is None or obj_id is None:
+            return self.renderer(text)
+
+        key = self.key(kind, obj_id)
+        cached = self.backend.get(key)
+        if cached is not None and cached[0] == stamp:
+            return Markup(cached[1])
+
+        html = self.renderer(text)
+        self.backend.set(key, (stamp, str(html)))
+        return html
+
+    def render_post(self, post: "Post | None") -> Markup:
+        """Returns the rendered content of the post."""
+        if post is None:
+            return Markup("")
+        modified = post.date_modified or post.date_created
+        stamp = modified.isoformat() if modified else ""
+        return self.render("post", post.id, stamp, post.content)
+
+    def render_signature(self, user: "User") -> Markup:
+        """Returns the rendered signature of the user."""
+        signature = str(user.signature or "")
+        stamp = hashlib.sha1(signature.encode("utf-8")).hexdigest()
+        return self.render("signature", user.id, stamp, signature)
+
+    def invalidate(self, kind: str, obj_id: int):
+        """Removes the cached markup of an object."""
+        if self.backend is not None:
+            self.backend.delete(self.key(kind, obj_id))
+
+
+def renderer_config_hash(
+    classes: Iterable[type], plugins: Iterable[PluginRef] | None = None
+) -> str:
+    """Returns a hash which identifies the renderer classes and plugins."""
+
+    def name(obj: Any) -> str:
+        if isinstance(obj, str):
+            return obj
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)}"
+
+    names = [name(cls) for cls in classes]
+    names.extend(name(plugin) for plugin in plugins or [])
+    names.append(mistune.__version__)
+    return hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()[:12]
+
+
+def make_markup_cache_backend(
+    app: Flask,
+) -> LocalRenderCache | SharedRenderCache | None:
+    backend = app.config["MARKUP_CACHE"]
+    if backend == "local":
+        return LocalRenderCache(app.config["MARKUP_CACHE_SIZE"])
+    elif backend == "shared":
+        return SharedRenderCache(app.config["MARKUP_CACHE_TIMEOUT"])
+    return None
+
+
+@impl
+def flaskbb_event_post_save_after(post: "Post", is_new: bool):
+    """Renders the post right away so that it is already cached when the
+    topic is viewed the next time."""
+    markup_cache: MarkupCache | None = current_app.extensions.get("markup_cache")
+    if markup_cache is None:
+        return
+
+    try:
+        markup_cache.invalidate("post", post.id)
+        markup_cache.render_post(post)
+    except Exception:
+        logger.exception(f"Couldn't render post {post.id}.")
+
+
 @impl
 def flaskbb_jinja_directives(app: Flask):
     render_classes = pluggy.hook.flaskbb_load_post_markdown_class(app=app)
     plugins = DEFAULT_PLUGINS[:]
     pluggy.hook.flaskbb_load_post_markdown_plugins(plugins=plugins, app=app)
-    app.jinja_env.filters["markup"] = make_renderer(render_classes, plugins)
+    renderer = make_renderer(render_classes, plugins)
+    app.jinja_env.filters["markup"] = renderer
+
+    markup_cache = MarkupCache(
+        renderer,
+        renderer_config_hash(render_classes, plugins),
+        make_markup_cache_backend(app),
+    )
+    app.extensions["markup_cache"] = markup_cache
+    app.jinja_env.filters["post_markup"] = markup_cache.render_post
+    app.jinja_env.filters["signature_markup"] = markup_cache.render_signature
 
     render_classes = pluggy.hook.flaskbb_load_nonpost_markdown_class(app=app)
     plugins = DEFAULT_PLUGINS[:]
-    plugins = pluggy.hook.flaskbb_load_nonpost_markdown_plugins(
-        plugins=plugins, app=app
-    )
+    pluggy.hook.flaskbb_load_nonpost_markdown_plugins(plugins=plugins, app=app)
     app.jinja_env.filters["nonpost_markup"] = make_renderer(render_classes, plugins)
 
 
@@ -0,0 +1,41 @@
+"""Add forum indexes
+
+Revision ID: 543a15711cbb
+Revises: 5945d8081a95
+Create Date: 2026-10-17 12:00:00
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "543a15711cbb"
+down_revision = "5945d8081a95"
+branch_labels = ()
+depends_on = None
+
+
+INDEXES = [
+    ("ix_posts_topic_id_id", "posts", ["topic_id", "id"]),
+    ("ix_posts_user_id_id", "posts", ["user_id", "id"]),
+    (
+        "ix_topics_forum_id_important_last_updated",
+        "topics",
+        ["forum_id", "important", "last_updated"],
+    ),
+    ("ix_topics_last_updated", "topics", ["last_updated"]),
+    ("ix_topics_last_post_id", "topics", ["last_post_id"]),
+    ("ix_topics_user_id_id", "topics", ["user_id", "id"]),
+    ("ix_topicsread_user_id_forum_id", "topicsread", ["user_id", "forum_id"]),
+    ("ix_topictracker_user_id_topic_id", "topictracker", ["user_id", "topic_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
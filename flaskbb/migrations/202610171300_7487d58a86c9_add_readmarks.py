@@ -0,0 +1,41 @@
+"""Add readmarks
+
+Revision ID: 7487d58a86c9
+Revises: 543a15711cbb
+Create Date: 2026-10-17 13:00:00
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+import flaskbb
+
+# revision identifiers, used by Alembic.
+revision = "7487d58a86c9"
+down_revision = "543a15711cbb"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    # the existing read trackers are converted with
+    # "flaskbb migrate-readmarks"
+    op.create_table(
+        "readmarks",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("forum_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "watermark",
+            flaskbb.utils.database.UTCDateTime(timezone=True),
+            nullable=True,
+        ),
+        sa.Column("read_topics", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["forum_id"], ["forums.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "forum_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("readmarks")
@@ -0,0 +1,54 @@
+"""Add the tables of the database search backend
+
+Revision ID: 0f6c2a9b3d41
+Revises: 7487d58a86c9
+Create Date: 2026-10-17 14:00:00
+
+"""
+
+from alembic import op
+from flask import current_app
+
+# revision identifiers, used by Alembic.
+revision = "0f6c2a9b3d41"
+down_revision = "7487d58a86c9"
+branch_labels = ()
+depends_on = None
+
+# the searchable fields of the documents by table
+search_tables = {
+    "search_post": ["content", "modified_by", "username"],
+    "search_topic": ["content", "title", "username"],
+    "search_forum": ["description", "title"],
+    "search_user": ["email", "username"],
+}
+
+
+def upgrade():
+    # the tables are only needed by the database search backend, they are
+    # created and filled with "flaskbb reindex" when switching to it
+    if current_app.config["SEARCH_BACKEND"] != "database":
+        return
+
+    dialect = op.get_bind().dialect.name
+    for table, fields in search_tables.items():
+        if dialect == "sqlite":
+            op.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                f"USING fts5({', '.join(fields)})"
+            )
+        elif dialect == "postgresql":
+            op.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(id INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)"
+            )
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_document "
+                f"ON {table} USING GIN (document)"
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name in ("sqlite", "postgresql"):
+        for table in search_tables:
+            op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,31 @@
+"""Add tracker last_read indexes
+
+Revision ID: b5d1e84c27f3
+Revises: 0f6c2a9b3d41
+Create Date: 2026-10-17 15:00:00
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b5d1e84c27f3"
+down_revision = "0f6c2a9b3d41"
+branch_labels = ()
+depends_on = None
+
+
+INDEXES = [
+    ("ix_topicsread_last_read", "topicsread", ["last_read"]),
+    ("ix_forumsread_last_read", "forumsread", ["last_read"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
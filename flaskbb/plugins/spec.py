@@ -368,11 +368,18 @@ def flaskbb_registration_post_processor(user):
 
 
 @spec(firstresult=True)
-def flaskbb_authenticate(identifier, secret):
+def flaskbb_authenticate(identifier, secret, attempt):
     """Hook for authenticating users in FlaskBB.
     This hook should return either an instance of
     :class:`flaskbb.user.models.User` or None.
 
+    ``attempt`` is the
+    :class:`~flaskbb.auth.services.AuthenticationAttempt` that is shared
+    by all implementations of this hook and of
+    :func:`flaskbb_authentication_failed` during one login attempt. Use
+    ``attempt.user`` instead of looking up the user with the identifier
+    again.
+
     If a hook decides that all attempts for authentication
     should end, it may raise a
     :class:`flaskbb.core.exceptions.StopAuthentication`
@@ -407,14 +414,7 @@ def flaskbb_authenticate(identifier, secret):
 
     Example of ending authentication::
 
-        def prevent_login_with_too_many_failed_attempts(identifier):
-            user = User.get(
-                db.or_(
-                    User.username == identifier,
-                    User.email == identifier
-                )
-            )
-
+        def prevent_login_with_too_many_failed_attempts(user):
             if user is not None:
                 if has_too_many_failed_logins(user):
                     raise StopAuthentication(_(
@@ -423,8 +423,8 @@ def flaskbb_authenticate(identifier, secret):
                     ))
 
         @impl(tryfirst=True)
-        def flaskbb_authenticate(user, identifier):
-            prevent_login_with_too_many_failed_attempts(identifier)
+        def flaskbb_authenticate(attempt):
+            prevent_login_with_too_many_failed_attempts(attempt.user)
 
     """
 
@@ -460,32 +460,36 @@ def flaskbb_post_authenticate(user):
 
 
 @spec
-def flaskbb_authentication_failed(identifier):
+def flaskbb_authentication_failed(identifier, attempt):
     """Hook for handling authentication failure events.
     This hook will only be called when no authentication
     providers successfully return a user or a
     :class:`flaskbb.core.exceptions.StopAuthentication`
     is raised during the login process.
 
+    ``attempt`` is the same
+    :class:`~flaskbb.auth.services.AuthenticationAttempt` that was passed
+    to :func:`flaskbb_authenticate`.
+
     See also:
     :class:`AuthenticationFailureHandler<flaskbb.core.auth.AuthenticationFailureHandler>`
 
     Example::
 
-        def mark_failed_logins(identifier):
-            user = User.get(
-                db.or_(
-                    User.username == identifier,
-                    User.email == identifier
+        def mark_failed_logins(user):
+            if user is not None:
+                db.session.execute(
+                    db.update(User)
+                    .where(User.id == user.id)
+                    .values(
+                        login_attempts=User.login_attempts + 1,
+                        last_failed_login=utcnow(),
+                    )
                 )
-            )
 
-            if user is not None:
-                if user.login_attempts is None:
-                    user.login_attempts = 1
-                else:
-                    user.login_attempts += 1
-                user.last_failed_login = utcnow()
+        @impl
+        def flaskbb_authentication_failed(attempt):
+            mark_failed_logins(attempt.user)
     """
 
 
@@ -10,10 +10,16 @@ This module provides the models for the user.
 """
 
 import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from datetime import datetime
+from functools import partial
 from typing import override
 
-from flask import url_for
+from flask import current_app, g, has_request_context, url_for
 from flask.helpers import abort
 from flask_login import AnonymousUserMixin, UserMixin
 from sqlalchemy import ForeignKey
@@ -24,17 +30,22 @@ from sqlalchemy.orm import (
     relationship,
     synonym,
 )
-from sqlalchemy.types import DateTime, String, Text
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy.types import Boolean, DateTime, String, Text
 
 from flaskbb.extensions import cache, db
 from flaskbb.forum.models import Forum, Post, Topic, topictracker
 from flaskbb.utils.database import CRUDMixin, UTCDateTime, make_comparable
 from flaskbb.utils.helpers import time_utcnow
+from flaskbb.utils.passwords import password_hasher
+from flaskbb.utils.queries import approximate_count, paginate
 from flaskbb.utils.settings import flaskbb_config
 
 logger = logging.getLogger(__name__)
 
+#: The cache key that holds the version stamp of the groups.
+GROUPS_VERSION_KEY = "groups-version"
+GROUPS_VERSION_REQUEST_KEY = "_flaskbb_groups_version"
+
 
 groups_users = db.Table(
     "groups_users",
@@ -88,6 +99,47 @@ class Group(db.Model, CRUDMixin):
         """
         return "<{} {} {}>".format(self.__class__.__name__, self.id, self.name)
 
+    @property
+    def permission_bits(self) -> int:
+        """Returns the permissions of the group as a bitmask, see
+        :data:`PERMISSION_BITS`."""
+        bits = 0
+        for name, bit in PERMISSION_BITS.items():
+            if getattr(self, name):
+                bits |= bit
+        return bits
+
+    @classmethod
+    def get_version(cls) -> str | None:
+        """Returns the current version stamp of the groups. The stamp changes
+        every time the groups or the memberships of a user are invalidated
+        and expires the permissions that the processes have compiled.
+        Inside a request, the stamp is fetched only once and memoized on
+        :data:`flask.g`.
+
+        Returns ``None`` if the cache can't hold the stamp (i.e. the
+        ``NullCache``).
+        """
+        in_request = has_request_context()
+        version = g.get(GROUPS_VERSION_REQUEST_KEY) if in_request else None
+        if version is None:
+            version = cache.get(GROUPS_VERSION_KEY)
+            if version is None:
+                # the stamp got evicted (or was never set) - everyone recompiles
+                cache.add(GROUPS_VERSION_KEY, uuid.uuid4().hex, timeout=0)
+                version = cache.get(GROUPS_VERSION_KEY)
+            if in_request:
+                setattr(g, GROUPS_VERSION_REQUEST_KEY, version)
+        return version
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Bumps the version stamp of the groups."""
+        version = uuid.uuid4().hex
+        cache.set(GROUPS_VERSION_KEY, version, timeout=0)
+        if has_request_context():
+            setattr(g, GROUPS_VERSION_REQUEST_KEY, version)
+
     @classmethod
     def selectable_groups_choices(cls):
         return db.session.execute(
@@ -114,6 +166,164 @@ class Group(db.Model, CRUDMixin):
         ).scalar_one_or_none()
 
 
+#: The bit of every permission column of :class:`Group`.
+PERMISSION_BITS: dict[str, int] = {
+    column.key: 1 << index
+    for index, column in enumerate(
+        column for column in Group.__table__.columns if isinstance(column.type, Boolean)
+    )
+}
+
+
+#: The bitmask of all permissions.
+ALL_PERMISSIONS = sum(PERMISSION_BITS.values())
+
+
+class Permissions(Mapping[str, bool]):
+    """The permissions of a user, stored as a bitmask of the permissions
+    of their groups. Behaves like a read-only ``dict`` of the permission
+    names.
+
+    :param bits: The bitmask, see :data:`PERMISSION_BITS`.
+    :param names: The bitmask of the permissions that are contained,
+                  defaults to all of them.
+    """
+
+    __slots__ = ("bits", "names")
+
+    def __init__(self, bits: int = 0, names: int = ALL_PERMISSIONS):
+        self.bits = bits & names
+        self.names = names
+
+    @classmethod
+    def from_groups(cls, groups: Iterable[Group]) -> "Permissions":
+        """Combines the permissions of the groups."""
+        bits = 0
+        for group in groups:
+            bits |= group.permission_bits
+        return cls(bits)
+
+    def exclude(self, names: Iterable[str]) -> "Permissions":
+        """Returns the permissions without the given ones."""
+        mask = 0
+        for name in names:
+            mask |= PERMISSION_BITS.get(name, 0)
+        return Permissions(self.bits, self.names & ~mask)
+
+    def has(self, name: str) -> bool:
+        """Checks if the permission is granted. Unknown permissions are
+        never granted."""
+        return bool(self.bits & PERMISSION_BITS.get(name, 0))
+
+    @override
+    def __getitem__(self, name: str) -> bool:
+        bit = PERMISSION_BITS[name]
+        if not self.names & bit:
+            raise KeyError(name)
+        return bool(self.bits & bit)
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, bit in PERMISSION_BITS.items() if self.names & bit)
+
+    @override
+    def __len__(self) -> int:
+        return self.names.bit_count()
+
+    @override
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Permissions):
+            return self.bits == other.bits and self.names == other.names
+        return super(Permissions, self).__eq__(other)
+
+    @override
+    def __hash__(self) -> int:
+        return hash((self.bits, self.names))
+
+    @override
+    def __repr__(self):
+        return "<{} {}>".format(
+            self.__class__.__name__, ",".join(name for name in self if self[name])
+        )
+
+
+class PermissionCache(object):
+    """Keeps the compiled permissions of the users in a LRU cache inside the
+    process. The entries are keyed by the user, their primary group and the
+    version stamp of the groups (see :meth:`Group.get_version`), so they
+    expire as soon as the stamp is bumped.
+
+    A stamp bumped in a cache that isn't shared by the processes (e.g. the
+    ``SimpleCache``) isn't seen by the other processes, therefore the
+    entries also expire after ``timeout`` seconds. If the cache can't hold
+    the stamp at all, the permissions are compiled every time.
+
+    :param maxsize: The maximum number of cached users.
+    :param timeout: The number of seconds an entry is kept. Defaults to
+                    ``CACHE_DEFAULT_TIMEOUT``, ``0`` keeps them until
+                    the stamp is bumped.
+    """
+
+    def __init__(self, maxsize: int = 4096, timeout: int | None = None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            tuple[int | None, int | None, str], tuple[Permissions, float | None]
+        ] = OrderedDict()
+
+    def get(
+        self,
+        user_id: int | None,
+        primary_group_id: int | None,
+        groups: Callable[[], Iterable[Group]],
+    ) -> Permissions:
+        """Returns the permissions of a user.
+
+        :param user_id: The id of the user or ``None`` for a guest.
+        :param primary_group_id: The id of the primary group of the user.
+        :param groups: Returns the groups of the user, only called when
+                       the permissions need to be compiled.
+        """
+        version = Group.get_version()
+        if version is None:
+            return Permissions.from_groups(groups())
+
+        key = (user_id, primary_group_id, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        permissions = Permissions.from_groups(groups())
+        timeout = self.timeout
+        if timeout is None:
+            timeout = current_app.config["CACHE_DEFAULT_TIMEOUT"]
+        with self._lock:
+            self._entries[key] = (permissions, now + timeout if timeout else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return permissions
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+permission_cache = PermissionCache()
+
+
+def _exclude_permissions(
+    permissions: Permissions, exclude: set[str] | None
+) -> Permissions:
+    if not exclude:
+        return permissions
+    return permissions.exclude(exclude)
+
+
 class User(db.Model, UserMixin, CRUDMixin):
     __tablename__: str = "users"
 
@@ -268,7 +478,7 @@ class User(db.Model, UserMixin, CRUDMixin):
         """Generates a password hash for the provided password."""
         if not password:
             return
-        self._password = generate_password_hash(password)
+        self._password = password_hasher.hash(password)
 
     # Hide password encryption by exposing password field only.
     password = synonym("_password", descriptor=property(_get_password, _set_password))
@@ -278,7 +488,7 @@ class User(db.Model, UserMixin, CRUDMixin):
 
         if self.password is None:
             return False
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
     def recalculate(self):
         """Recalculates the post count from the user."""
@@ -296,19 +506,32 @@ class User(db.Model, UserMixin, CRUDMixin):
                        accessible to the viewer will be returned.
         :rtype: flask_sqlalchemy.Pagination
         """
-        group_ids = [g.id for g in viewer.groups]
+        group_ids = sorted(g.id for g in viewer.groups)
+        view_hidden = viewer.permissions.get("viewhidden", False)
         stmt = (
             db.select(Topic)
+            .join(Forum, Topic.forum_id == Forum.id)
             .where(
                 Topic.user_id == self.id,
                 Forum.groups.any(Group.id.in_(group_ids)),
             )
             .order_by(Topic.id.desc())
         )
-        topics = db.paginate(
-            stmt, page=page, per_page=flaskbb_config["TOPICS_PER_PAGE"]
+        if not view_hidden:
+            stmt = stmt.where(Topic.hidden == False)
+
+        # there is no denormalised topic count for the users
+        return paginate(
+            stmt,
+            page=page,
+            per_page=flaskbb_config["TOPICS_PER_PAGE"],
+            total=partial(
+                approximate_count,
+                stmt,
+                _viewer_key(f"user-topics/{self.id}", group_ids, view_hidden),
+            ),
+            scalars=True,
         )
-        return topics
 
     def all_posts(self, page: int, viewer: "User"):
         """Posts made by a given user, most recent first.
@@ -318,17 +541,38 @@ class User(db.Model, UserMixin, CRUDMixin):
                        accessible to the viewer will be returned.
         :rtype: flask_sqlalchemy.Pagination
         """
-        group_ids = [g.id for g in viewer.groups]
+        group_ids = sorted(g.id for g in viewer.groups)
+        view_hidden = viewer.permissions.get("viewhidden", False)
         stmt = (
             db.select(Post)
+            .join(Topic, Post.topic_id == Topic.id)
+            .join(Forum, Topic.forum_id == Forum.id)
             .where(
                 Post.user_id == self.id,
                 Forum.groups.any(Group.id.in_(group_ids)),
             )
             .order_by(Post.id.desc())
         )
-        posts = db.paginate(stmt, page=page, per_page=flaskbb_config["TOPICS_PER_PAGE"])
-        return posts
+        if not view_hidden:
+            stmt = stmt.where(Post.hidden == False, Topic.hidden == False)
+
+        # The post count of the user only includes the visible posts and
+        # can only be used if the viewer can access every forum.
+        if not view_hidden and _can_access_all_forums(group_ids):
+            total = self.post_count
+        else:
+            total = partial(
+                approximate_count,
+                stmt,
+                _viewer_key(f"user-posts/{self.id}", group_ids, view_hidden),
+            )
+        return paginate(
+            stmt,
+            page=page,
+            per_page=flaskbb_config["TOPICS_PER_PAGE"],
+            total=total,
+            scalars=True,
+        )
 
     def track_topic(self, topic: Topic):
         """Tracks the specified topic.
@@ -390,27 +634,27 @@ class User(db.Model, UserMixin, CRUDMixin):
         """Returns all the groups the user is in."""
         return [self.primary_group] + list(self.secondary_groups)
 
-    @cache.memoize()
-    def get_permissions(self, exclude: set[str] | None = None):
-        """Returns a dictionary with all permissions the user has"""
-        if exclude:
-            exclude = set(exclude)
-        else:
-            exclude = set()
-        exclude.update(["id", "name", "description"])
+    def _load_groups(self) -> list[Group]:
+        """Loads the current state of the groups the user is in."""
+        secondary = db.select(groups_users.c.group_id).where(
+            groups_users.c.user_id == self.id
+        )
+        stmt = db.select(Group).where(
+            db.or_(Group.id == self.primary_group_id, Group.id.in_(secondary))
+        )
+        return db.session.execute(stmt).scalars().all()
 
-        perms: dict[str, bool] = {}
-        # Get the Guest group
-        for group in self.groups:
-            columns = set(group.__table__.columns.keys()) - set(exclude)
-            for c in columns:
-                perms[c] = getattr(group, c) or perms.get(c, False)
-        return perms
+    def get_permissions(self, exclude: set[str] | None = None) -> Permissions:
+        """Returns the permissions the user has."""
+        permissions = permission_cache.get(
+            self.id, self.primary_group_id, self._load_groups
+        )
+        return _exclude_permissions(permissions, exclude)
 
     def invalidate_cache(self):
         """Invalidates this objects cached metadata."""
-        cache.delete_memoized(self.get_permissions, self)
         cache.delete_memoized(self.get_groups, self)
+        Group.invalidate_cache()
 
     def ban(self):
         """Bans the user. Returns True upon success."""
@@ -489,6 +733,19 @@ class User(db.Model, UserMixin, CRUDMixin):
         return self
 
 
+def _viewer_key(prefix: str, group_ids: list[int], view_hidden: bool) -> str:
+    """Returns a cache key for something that depends on what the viewer
+    is allowed to see."""
+    groups = "-".join(str(group_id) for group_id in group_ids)
+    return f"{prefix}/{groups}/{int(view_hidden)}"
+
+
+def _can_access_all_forums(group_ids: list[int]) -> bool:
+    """Checks if the groups grant access to every forum."""
+    stmt = db.select(Forum.id).where(~Forum.groups.any(Group.id.in_(group_ids)))
+    return approximate_count(stmt, _viewer_key("forums-denied", group_ids, False)) == 0
+
+
 class Guest(AnonymousUserMixin):
     @property
     def permissions(self):
@@ -500,28 +757,20 @@ class Guest(AnonymousUserMixin):
 
     @cache.memoize()
     def get_groups(self):
+        return self._load_groups()
+
+    def _load_groups(self) -> list[Group]:
         stmt = db.select(Group).where(Group.guest == True)
         result = db.session.execute(stmt).scalars().all()
         return result
 
-    @cache.memoize()
-    def get_permissions(self, exclude: set[str] | None = None):
-        """Returns a dictionary with all permissions the user has"""
-        if exclude:
-            exclude = set(exclude)
-        else:
-            exclude = set()
-        exclude.update(["id", "name", "description"])
-
-        perms: dict[str, bool] = {}
-        # Get the Guest group
-        for group in self.groups:
-            columns = set(group.__table__.columns.keys()) - set(exclude)
-            for c in columns:
-                perms[c] = getattr(group, c) or perms.get(c, False)
-        return perms
+    def get_permissions(self, exclude: set[str] | None = None) -> Permissions:
+        """Returns the permissions the user has."""
+        permissions = permission_cache.get(None, None, self._load_groups)
+        return _exclude_permissions(permissions, exclude)
 
     @classmethod
     def invalidate_cache(cls):
         """Invalidates this objects cached metadata."""
-        cache.delete_memoized(cls.get_permissions, cls)
+        cache.delete_memoized(cls.get_groups)
+        Group.invalidate_cache()
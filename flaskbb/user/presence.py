@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.user.presence
+~~~~~~~~~~~~~~~~~~~~~
+
+Keeps track of when the users have been seen the last time without
+writing to the database on every request.
+
+:copyright: (c) 2014 by the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from flask import Flask, current_app
+from pytz import UTC
+from sqlalchemy import bindparam, or_, update
+
+from flaskbb.extensions import celery, db
+from flaskbb.user.models import User
+from flaskbb.utils.flushers import BufferedFlusher
+from flaskbb.utils.helpers import get_online_users_activity, time_utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class LastseenWriter(BufferedFlusher):
+    """Throttles the writes of ``User.lastseen``.
+
+    ``lastseen`` is only persisted once it has moved more than
+    ``LASTSEEN_GRANULARITY`` seconds. The pending updates are coalesced
+    and written in one batched ``UPDATE`` every ``LASTSEEN_FLUSH_INTERVAL``
+    seconds.
+
+    If redis is enabled, the activity recorded by
+    :func:`~flaskbb.utils.helpers.mark_online` is used as the source of
+    truth and nothing has to be buffered in the process itself.
+    """
+
+    flush_interval_key = "LASTSEEN_FLUSH_INTERVAL"
+    description = "lastseen updates"
+
+    def __init__(self, app: Flask | None = None):
+        self._lastseen: dict[int, datetime] = {}
+        super(LastseenWriter, self).__init__(app)
+
+    @property
+    def granularity(self) -> timedelta:
+        return timedelta(seconds=current_app.config["LASTSEEN_GRANULARITY"])
+
+    def touch(self, user: User, now: datetime | None = None) -> bool:
+        """Records that the user has been seen. Returns ``True`` if
+        an update has been queued.
+
+        :param user: The user who has been seen.
+        :param now: When the user has been seen. Defaults to now.
+        """
+        if self.use_redis:
+            # already recorded by mark_online
+            return False
+
+        now = now or time_utcnow()
+        with self._lock:
+            lastseen = self._lastseen.get(user.id, user.lastseen)
+            if lastseen is not None and now - lastseen < self.granularity:
+                return False
+            self._lastseen[user.id] = now
+        return True
+
+    def pending(self) -> dict[int, datetime]:
+        """Returns the process local updates that haven't been flushed yet."""
+        with self._lock:
+            return dict(self._lastseen)
+
+    def flush(self) -> int:
+        """Writes the pending ``lastseen`` updates to the database in one
+        batched update and returns the number of users that have been
+        considered. ``lastseen`` is never moved backwards.
+
+        The updates are written in a transaction on their own connection,
+        so that nothing that is pending in the session of the current
+        request is committed along with them.
+        """
+        if self.use_redis:
+            lastseen = self._take_from_redis()
+        else:
+            with self._lock:
+                lastseen, self._lastseen = self._lastseen, {}
+
+        if not lastseen:
+            return 0
+
+        users = User.__table__
+        key = users.c.username if self.use_redis else users.c.id
+        stmt = (
+            update(users)
+            .where(key == bindparam("key"))
+            .where(
+                or_(
+                    users.c.lastseen.is_(None),
+                    users.c.lastseen < bindparam("threshold"),
+                )
+            )
+            .values(lastseen=bindparam("new_lastseen"))
+        )
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    stmt,
+                    [
+                        {
+                            "key": k,
+                            "new_lastseen": v,
+                            "threshold": v - self.granularity,
+                        }
+                        for k, v in sorted(lastseen.items())
+                    ],
+                )
+        except Exception:
+            if not self.use_redis:
+                with self._lock:
+                    for user_id, seen in lastseen.items():
+                        self._lastseen[user_id] = max(
+                            seen, self._lastseen.get(user_id, seen)
+                        )
+            raise
+
+        logger.debug(f"Flushed lastseen of {len(lastseen)} users.")
+        return len(lastseen)
+
+    def _take_from_redis(self) -> dict[str, datetime]:
+        return {
+            username: datetime.fromtimestamp(timestamp, UTC)
+            for username, timestamp in get_online_users_activity().items()
+        }
+
+
+lastseen_writer = LastseenWriter()
+
+
+@celery.task
+def flush_lastseen():
+    """Writes the activity of the online users recorded in redis to the
+    database. Scheduled by celery beat every ``LASTSEEN_FLUSH_INTERVAL``
+    seconds.
+    """
+    return lastseen_writer.flush()
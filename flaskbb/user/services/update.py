@@ -10,10 +10,12 @@ User update services.
 """
 
 import attr
+from flask_babelplus import gettext as _
 
 from ...core.changesets import ChangeSetHandler
-from ...core.exceptions import accumulate_errors
+from ...core.exceptions import StopValidation, accumulate_errors
 from ...utils.database import try_commit
+from ...utils.passwords import PasswordHasherBusy
 
 
 @attr.s(eq=False, order=False, frozen=True, repr=True, hash=False)
@@ -46,8 +48,18 @@ class DefaultPasswordUpdateHandler(ChangeSetHandler):
     validators = attr.ib(factory=list)
 
     def apply_changeset(self, model, changeset):
-        accumulate_errors(lambda v: v.validate(model, changeset), self.validators)
-        model.password = changeset.new_password
+        try:
+            accumulate_errors(lambda v: v.validate(model, changeset), self.validators)
+            model.password = changeset.new_password
+        except PasswordHasherBusy:
+            raise StopValidation(
+                [
+                    (
+                        "new_password",
+                        _("The server is busy at the moment, please try again later."),
+                    )
+                ]
+            )
         try_commit(self.db.session, "Could not update password")
         self.plugin_manager.hook.flaskbb_password_updated(user=model)
 
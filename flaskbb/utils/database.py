@@ -185,3 +185,60 @@ def try_commit(session, message="Error while saving"):
         session.commit()
     except Exception:
         raise PersistenceError(message)
+
+
+def upsert(
+    model: type,
+    values: dict[str, t.Any],
+    index_elements: list[str],
+    set_: dict[str, t.Any],
+    where: sa.ColumnExpressionArgument[bool] | None = None,
+) -> int:
+    """Inserts a row or updates it if it already exists and returns the
+    number of changed rows. It doesn't commit.
+
+    On SQLite and PostgreSQL this is a single
+    ``INSERT ... ON CONFLICT DO UPDATE`` statement, on other databases
+    the row is updated and only inserted if the update didn't find it.
+    If another transaction inserts the row in the meantime, the insert
+    is undone with a savepoint and the update is retried.
+
+    :param model: The model of the row.
+    :param values: The values of the row that is inserted.
+    :param index_elements: The columns of the unique index on which the
+                           insert conflicts, usually the primary key.
+    :param set_: The values that are set if the row already exists.
+    :param where: Only update the existing row if this condition is true.
+                  ``0`` is returned if it isn't.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(model).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements, set_=set_, where=where
+        )
+        return db.session.execute(stmt).rowcount
+
+    key = [getattr(model, name) == values[name] for name in index_elements]
+    update = sa.update(model).where(*key).values(**set_)
+    if where is not None:
+        update = update.where(where)
+    changed = db.session.execute(update).rowcount
+    if changed:
+        return changed
+
+    exists = db.session.execute(sa.select(sa.literal(1)).where(*key)).scalar()
+    if exists is not None:
+        return 0
+
+    try:
+        with db.session.begin_nested():
+            return db.session.execute(sa.insert(model).values(**values)).rowcount
+    except sa.exc.IntegrityError:
+        logger.debug("The row has been inserted concurrently, updating it.")
+    return db.session.execute(update).rowcount
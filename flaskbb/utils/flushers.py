@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.utils.flushers
+~~~~~~~~~~~~~~~~~~~~~~
+
+The base class of the buffers which collect writes during the requests
+and write them in batches, either periodically after a request, by a
+celery beat task or when the process exits.
+
+:copyright: (c) 2014-2018 the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from flask import Flask, current_app
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedFlusher(ABC):
+    """Collects writes in a buffer and flushes them in batches.
+
+    If redis is enabled, subclasses are expected to buffer in redis, so
+    that any process can flush the buffer. Otherwise the buffer is process
+    local and flushed by the process itself after a request once the
+    number of seconds in the ``flush_interval_key`` setting have passed
+    and when the process exits.
+
+    :meth:`flush` runs in the teardown of a request and must not use the
+    session of the request, which may still hold the changes of a failed
+    request. It should write the batch on its own connection instead,
+    i.e. with ``db.engine.begin()``.
+    """
+
+    #: The config key which holds the number of seconds between two flushes
+    flush_interval_key: str
+    #: What is flushed, used in the log messages
+    description = "buffer"
+
+    def __init__(self, app: Flask | None = None):
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._atexit_registered = False
+        self.app: Flask | None = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.app = app
+        app.teardown_request(self.flush_if_due)
+        # the handler flushes the buffer of the last initialized app and
+        # must only run once, no matter how many apps have been created
+        if not self._atexit_registered:
+            atexit.register(self._flush_at_exit)
+            self._atexit_registered = True
+
+    @property
+    def use_redis(self) -> bool:
+        return current_app.config["REDIS_ENABLED"]
+
+    @abstractmethod
+    def flush(self) -> int:
+        """Writes the buffer and returns how many entries were written."""
+        pass
+
+    def flush_if_due(self, exc: BaseException | None = None):
+        """Flushes the buffer if enough seconds have passed since the last
+        flush. Meant to be used as a teardown handler and therefore never
+        raises.
+        """
+        interval = current_app.config[self.flush_interval_key]
+        if interval is None or time.monotonic() - self._last_flush < interval:
+            return
+
+        self._last_flush = time.monotonic()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception(f"Couldn't flush the {self.description}.")
+
+    def _flush_at_exit(self):
+        if self.app is None:  # pragma: no cover
+            return
+
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception:
+            logger.exception(f"Couldn't flush the {self.description} on exit.")
@@ -42,7 +42,14 @@ from werkzeug.utils import ImportStringError, import_string
 from flaskbb.extensions import babel, redis_store
 
 if TYPE_CHECKING:
-    from flaskbb.forum.models import Category, Forum, ForumsRead, Topic, TopicsRead
+    from flaskbb.forum.models import (
+        Category,
+        Forum,
+        ForumsRead,
+        ReadMark,
+        Topic,
+        TopicsRead,
+    )
     from flaskbb.user.models import User
 
 from flaskbb.utils.http import is_safe_url
@@ -283,16 +290,21 @@ def get_forums(
 
 
 def forum_is_unread(
-    forum: "Forum | None", forumsread: "ForumsRead | None", user: "User"
+    forum: "Forum | None",
+    forumsread: "ForumsRead | ReadMark | None",
+    user: "User",
 ):
     """Checks if a forum is unread
 
     :param forum: The forum that should be checked if it is unread
 
-    :param forumsread: The forumsread object for the forum
+    :param forumsread: The forumsread object or the read marks of the user
+                       for the forum
 
     :param user: The user who should be checked if he has read the forum
     """
+    from flaskbb.forum.models import ReadMark
+
     # If the user is not signed in, every forum is marked as read
     if not user.is_authenticated or not forum:
         return False
@@ -320,6 +332,13 @@ def forum_is_unread(
     if forumsread is None:
         return forum.last_post_created > read_cutoff
 
+    # the watermark passes the last post once every topic has been read
+    if isinstance(forumsread, ReadMark):
+        return (
+            forumsread.watermark is None
+            or forum.last_post_created > forumsread.watermark
+        )
+
     # else just check if the user has read the last post
     return forum.last_post_created > forumsread.last_read
 
@@ -328,7 +347,7 @@ def topic_is_unread(
     topic: "Topic",
     topicsread: "TopicsRead | None",
     user: "User",
-    forumsread: "ForumsRead | None" = None,
+    forumsread: "ForumsRead | ReadMark | None" = None,
 ):
     """Checks if a topic is unread.
 
@@ -342,11 +361,17 @@ def topic_is_unread(
     :param forumsread: The forumsread object in which the topic is. If you
                        also want to check if the user has marked the forum as
                        read, than you will also need to pass an forumsread
-                       object.
+                       object. If the read marks are used, pass the read
+                       marks of the user for the forum instead.
     """
+    from flaskbb.forum.models import ReadMark
+
     if not user.is_authenticated:
         return False
 
+    if isinstance(forumsread, ReadMark):
+        return forumsread.is_unread(topic)
+
     read_cutoff = time_utcnow() - timedelta(days=flaskbb_config["TRACKER_LENGTH"])
 
     # disable tracker if read_cutoff is set to 0
@@ -416,6 +441,24 @@ def get_online_users(guest=False):  # pragma: no cover
     return [to_unicode(u) for u in users]
 
 
+def get_online_users_activity():  # pragma: no cover
+    """Returns a dict which maps the online users to the unix timestamp
+    of their last activity as recorded by :func:`mark_online`.
+    """
+    users = get_online_users()
+    if not users:
+        return {}
+
+    timestamps = redis_store.mget(
+        ["user-activity/%s" % to_bytes(user) for user in users]
+    )
+    return {
+        user: int(timestamp)
+        for user, timestamp in zip(users, timestamps)
+        if timestamp is not None
+    }
+
+
 def crop_title(title, length=None, suffix="..."):
     """Crops the title to a specified length
 
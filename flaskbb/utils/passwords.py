@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.utils.passwords
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Hashes and verifies the passwords of the users. The algorithm and its
+cost are configured with ``PASSWORD_HASH_METHOD``, hashes with other
+parameters are still accepted and are replaced when the user logs in.
+
+Hashing is slow on purpose, so only a few passwords are hashed at the
+same time per process, on a small pool of threads. This caps how many
+hashes run at once, it doesn't move the hashing off the request: the
+thread of the request still waits until its hash has been computed. If
+every worker and every place in the queue is taken, the hash is refused
+with :class:`PasswordHasherBusy`, right away by default, so a burst of
+logins fails fast instead of tying up every worker of the app server.
+
+:copyright: (c) 2014-2018 the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import logging
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised if a password can't be hashed because too many hashes are
+    waiting to be computed."""
+
+
+class PasswordHasher(object):
+    """Hashes passwords with werkzeug on a bounded pool of threads. The
+    calling thread blocks until the hash has been computed.
+
+    :param method: The werkzeug hash method including its cost, e.g.
+                   ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``.
+    :param salt_length: The length of the salts.
+    :param workers: How many passwords are hashed at the same time.
+                    ``0`` hashes on the calling thread.
+    :param queue_size: How many passwords may wait for a worker.
+    :param timeout: How many seconds to wait for a place in the queue
+                    before :class:`PasswordHasherBusy` is raised. ``0``
+                    raises it right away, ``None`` waits forever.
+    """
+
+    def __init__(
+        self,
+        method: str = "scrypt",
+        salt_length: int = 16,
+        workers: int = 0,
+        queue_size: int = 0,
+        timeout: float | None = None,
+    ):
+        self._executor: ThreadPoolExecutor | None = None
+        self.configure(method, salt_length, workers, queue_size, timeout)
+
+    def init_app(self, app: Flask):
+        self.configure(
+            method=app.config["PASSWORD_HASH_METHOD"],
+            salt_length=app.config["PASSWORD_HASH_SALT_LENGTH"],
+            workers=app.config["PASSWORD_HASH_WORKERS"],
+            queue_size=app.config["PASSWORD_HASH_QUEUE_SIZE"],
+            timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+        )
+        # compute the dummy hash now instead of during the first login
+        self.warm_up()
+        app.extensions["password_hasher"] = self
+
+    def configure(
+        self,
+        method: str,
+        salt_length: int,
+        workers: int,
+        queue_size: int,
+        timeout: float | None,
+    ):
+        self._method = method
+        self._dummy_hash: str | None = None
+        self.salt_length = salt_length
+        self.timeout = timeout
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="flaskbb-passwords"
+            )
+        self._slots = threading.BoundedSemaphore(max(workers + queue_size, 1))
+
+    def warm_up(self):
+        """Computes the dummy hash if it hasn't been computed yet."""
+        if self._dummy_hash is None:
+            self._dummy_hash = generate_password_hash(
+                secrets.token_urlsafe(), self._method, self.salt_length
+            )
+
+    @property
+    def dummy_hash(self) -> str:
+        """The hash of a random password that is verified if a user
+        doesn't exist."""
+        self.warm_up()
+        return self._dummy_hash
+
+    @property
+    def method(self) -> str:
+        """The configured method as werkzeug stores it in the hashes, e.g.
+        ``scrypt:32768:8:1`` for ``scrypt``."""
+        return self.dummy_hash.split("$", 1)[0]
+
+    def hash(self, password: str) -> str:
+        """Returns the hash of a password."""
+        return self._run(
+            generate_password_hash, password, self.method, self.salt_length
+        )
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        """Checks a password against its hash."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def verify_dummy(self, password: str) -> bool:
+        """Takes as long as verifying a password of an existing user, so
+        that the response time doesn't tell if the user exists."""
+        self.verify(self.dummy_hash, password)
+        return False
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Checks if a hash has been computed with other parameters than
+        the configured ones."""
+        method, _, salt_and_hash = pwhash.partition("$")
+        salt = salt_and_hash.partition("$")[0]
+        return method != self.method or len(salt) != self.salt_length
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+
+password_hasher = PasswordHasher()
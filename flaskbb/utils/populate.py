@@ -83,6 +83,7 @@ def create_settings_from_fixture(fixture):
                 setting.save()
                 created_settings[group].append(setting)
 
+    Setting.invalidate_cache()
     return created_settings
 
 
@@ -158,6 +159,8 @@ def update_settings_from_fixture(
 
                 setting.save()
                 updated_settings[group].append(setting)
+
+    Setting.invalidate_cache()
     return updated_settings
 
 
@@ -11,13 +11,15 @@ Some database helpers such as a CRUD mixin.
 
 from __future__ import annotations
 
+import datetime
 import typing as t
 
 import sqlalchemy as sa
-from flask import abort
+from flask import abort, current_app
 from flask_login import current_user
+from itsdangerous import BadData, URLSafeSerializer
 
-from flaskbb.extensions import db
+from flaskbb.extensions import cache, db
 from flaskbb.utils.database import HideableMixin
 
 if t.TYPE_CHECKING:
@@ -39,9 +41,16 @@ class SelectAllPagination(Pagination):
         select = self._query_args["select"]
         select = select.limit(self.per_page).offset(self._query_offset)
         session = self._query_args["session"]
-        return session.execute(select).all()
+        result = session.execute(select)
+        if self._query_args.get("scalars"):
+            return result.unique().scalars().all()
+        return result.all()
 
     def _query_count(self) -> int:
+        total = self._query_args.get("total")
+        if total is not None:
+            return total() if callable(total) else total
+
         select = self._query_args["select"]
         sub = select.options(sa_orm.lazyload("*")).order_by(None).subquery()
         session = self._query_args["session"]
@@ -49,6 +58,134 @@ class SelectAllPagination(Pagination):
         return out  # type: ignore[no-any-return]
 
 
+class KeysetPagination(SelectAllPagination):
+    """Seeks on the ``keys`` of the select instead of skipping the rows of
+    the previous pages with ``OFFSET`` when moving to the next or previous
+    page. The items of a page are used to create opaque cursors
+    (:attr:`next_cursor` and :attr:`prev_cursor`) which point to the
+    adjacent pages. Pages that are requested without a (valid) cursor are
+    still loaded with ``OFFSET``.
+
+    The ``keys`` have to identify a row uniquely and are all sorted in the
+    same direction.
+    """
+
+    def __init__(
+        self,
+        *,
+        keys: t.Sequence[sa.ColumnElement[t.Any]],
+        descending: bool = False,
+        cursor: str | None = None,
+        **kwargs: t.Any,
+    ) -> None:
+        self.keys = list(keys)
+        self.descending = descending
+        self._cursor = cursor
+        self._first_keys: tuple[t.Any, ...] | None = None
+        self._last_keys: tuple[t.Any, ...] | None = None
+        super().__init__(**kwargs)
+
+    @property
+    def _serializer(self) -> URLSafeSerializer:
+        return URLSafeSerializer(current_app.secret_key, salt="flaskbb-pagination")
+
+    def _load_cursor(self) -> tuple[str, list[t.Any]] | None:
+        """Returns the direction and the keys stored in the cursor or
+        ``None`` if the cursor is invalid or doesn't lead to this page.
+        """
+        if not self._cursor:
+            return None
+        try:
+            page, direction, keys = self._serializer.loads(self._cursor)
+        except (BadData, TypeError, ValueError):
+            return None
+
+        if page != self.page or direction not in ("next", "prev"):
+            return None
+        if not isinstance(keys, list) or len(keys) != len(self.keys):
+            return None
+        return direction, [_load_key(key) for key in keys]
+
+    def _dump_cursor(self, page: int, direction: str, keys: t.Sequence[t.Any]) -> str:
+        return self._serializer.dumps([page, direction, [_dump_key(k) for k in keys]])
+
+    def _query_items(self) -> list[t.Any]:
+        select = self._query_args["select"]
+        session = self._query_args["session"]
+        columns = len(select.column_descriptions)
+
+        cursor = self._load_cursor()
+        # the previous page is loaded in the reverse order
+        reverse = cursor is not None and cursor[0] == "prev"
+        descending = self.descending != reverse
+
+        select = select.add_columns(
+            *[key.label(f"_keyset_{i}") for i, key in enumerate(self.keys)]
+        ).order_by(None)
+        select = select.order_by(
+            *[key.desc() if descending else key.asc() for key in self.keys]
+        )
+
+        if cursor is not None:
+            keys = sa.tuple_(*self.keys)
+            values = sa.tuple_(
+                *[
+                    sa.bindparam(None, value, type_=key.type)
+                    for key, value in zip(self.keys, cursor[1])
+                ]
+            )
+            select = select.where(keys < values if descending else keys > values)
+            select = select.limit(self.per_page)
+        else:
+            select = select.limit(self.per_page).offset(self._query_offset)
+
+        rows = session.execute(select).all()
+        if reverse:
+            rows.reverse()
+
+        self._first_keys = tuple(rows[0][columns:]) if rows else None
+        self._last_keys = tuple(rows[-1][columns:]) if rows else None
+        if self._query_args.get("scalars"):
+            return [row[0] for row in rows]
+        return [tuple(row[:columns]) for row in rows]
+
+    @property
+    def next_cursor(self) -> str | None:
+        """The cursor which leads to the next page."""
+        if not self.has_next or self._last_keys is None:
+            return None
+        return self._dump_cursor(self.page + 1, "next", self._last_keys)
+
+    @property
+    def prev_cursor(self) -> str | None:
+        """The cursor which leads to the previous page."""
+        if not self.has_prev or self._first_keys is None:
+            return None
+        return self._dump_cursor(self.page - 1, "prev", self._first_keys)
+
+    def cursor_for(self, page: int) -> str | None:
+        """Returns the cursor for ``page`` if it is adjacent to the current
+        page. Other pages can only be loaded by their page number.
+        """
+        if page == self.page + 1:
+            return self.next_cursor
+        if page == self.page - 1:
+            return self.prev_cursor
+        return None
+
+
+def _dump_key(value: t.Any) -> t.Any:
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load_key(value: t.Any) -> t.Any:
+    if isinstance(value, dict):
+        return datetime.datetime.fromisoformat(value["dt"])
+    return value
+
+
 def paginate(
     select: sa.sql.Select[t.Any],
     *,
@@ -57,13 +194,18 @@ def paginate(
     max_per_page: int | None = None,
     error_out: bool = True,
     count: bool = True,
+    keys: t.Sequence[sa.ColumnElement[t.Any]] | None = None,
+    descending: bool = False,
+    cursor: str | None = None,
+    total: int | t.Callable[[], int] | None = None,
+    scalars: bool = False,
 ) -> Pagination:
     """Apply an offset and limit to a select statment based on the current page and
     number of items per page, returning a :class:`.Pagination` object.
 
-    The statement should select a model class, like ``select(User)``. This applies
-    ``unique()`` and ``scalars()`` modifiers to the result, so compound selects will
-    not return the expected results.
+    Unlike :meth:`.SQLAlchemy.paginate`, the items are the selected rows, so
+    compound selects like ``select(Topic, Post)`` can be paginated. Pass
+    ``scalars=True`` to get the model instances of ``select(User)`` instead.
 
     :param select: The ``select`` statement to paginate.
     :param page: The current page, used to calculate the offset. Defaults to the
@@ -80,11 +222,39 @@ def paginate(
         query. For very complex queries this may be inaccurate or slow, so it can be
         disabled and set manually if necessary.
 
+    :param keys: Columns which identify a row uniquely. If given, the
+        adjacent pages are loaded by seeking on them (keyset pagination)
+        instead of using an offset. See :class:`KeysetPagination`. The
+        ordering of the ``select`` is replaced by the ordering of the keys.
+    :param descending: Sort the ``keys`` in descending order.
+    :param cursor: The cursor that leads to the current page.
+    :param total: The total number of items, or a callable which returns
+        it, if it is already known (e.g. from a denormalised counter). Replaces
+        the ``count`` query. See also :func:`approximate_count`.
+    :param scalars: Return the first entity of every row instead of the
+        rows, like :meth:`.SQLAlchemy.paginate`.
+
     .. versionchanged:: 3.0
         The ``count`` query is more efficient.
 
     .. versionadded:: 3.0
     """
+    if keys is not None:
+        return KeysetPagination(
+            select=select,
+            session=db.session,
+            page=page,
+            per_page=per_page,
+            max_per_page=max_per_page,
+            error_out=error_out,
+            count=count,
+            keys=keys,
+            descending=descending,
+            cursor=cursor,
+            total=total,
+            scalars=scalars,
+        )
+
     return SelectAllPagination(
         select=select,
         session=db.session,
@@ -93,9 +263,34 @@ def paginate(
         max_per_page=max_per_page,
         error_out=error_out,
         count=count,
+        total=total,
+        scalars=scalars,
     )
 
 
+def approximate_count(select: sa.sql.Select[t.Any], key: str) -> int:
+    """Counts the rows returned by ``select`` and caches the result for
+    ``COUNT_CACHE_TIMEOUT`` seconds. The count may therefore be slightly
+    off, which is fine for calculating the number of pages.
+
+    :param select: The ``select`` statement whose rows should be counted.
+    :param key: The cache key for the count.
+    """
+    timeout = current_app.config["COUNT_CACHE_TIMEOUT"]
+    key = f"count/{key}"
+    if timeout is not None:
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+    sub = select.options(sa_orm.lazyload("*")).order_by(None).subquery()
+    count = db.session.execute(sa.select(sa.func.count()).select_from(sub)).scalar()
+
+    if timeout is not None:
+        cache.set(key, count, timeout=timeout)
+    return count  # type: ignore[no-any-return]
+
+
 def hidden(
     stmt: sa.Select[t.Any], hidden: bool | None = None, *entities: type[HideableMixin]
 ):
@@ -10,6 +10,7 @@ Authorization requirements for FlaskBB.
 
 import logging
 
+from flask import g, has_request_context
 from flask_allows2 import And, Or, Permission, Requirement
 from sqlalchemy import select
 
@@ -20,6 +21,8 @@ from flaskbb.user.models import User
 
 logger = logging.getLogger(__name__)
 
+REQUIREMENTS_REQUEST_KEY = "_flaskbb_requirements"
+
 
 class Has(Requirement):
     def __init__(self, permission: str):
@@ -29,7 +32,7 @@ class Has(Requirement):
         return "<Has({!s})>".format(self.permission)
 
     def fulfill(self, user: User):
-        return user.permissions.get(self.permission, False)
+        return user.permissions.has(self.permission)
 
 
 class IsAuthed(Requirement):
@@ -182,6 +185,50 @@ class CanAccessForum(Requirement):
         return bool(forum_groups & user_groups)
 
 
+class Memoized(Requirement):
+    """Remembers the result of a requirement for the rest of the request.
+
+    The result is stored per ``key`` and user, therefore the key has to
+    identify everything the requirement depends on besides the user, e.g.
+    the id of the topic. Outside of a request, the requirement is always
+    evaluated.
+
+    :param requirement: The requirement whose result is remembered.
+    :param key: The key of the result, e.g. ``("post_reply", topic.id)``.
+    """
+
+    def __init__(self, requirement: Requirement, *key):
+        self.requirement = requirement
+        self.key = key
+
+    def __repr__(self):
+        return "<Memoized({!r}, {!r})>".format(self.requirement, self.key)
+
+    def fulfill(self, user: User):
+        memo = requirement_memo()
+        if memo is None:
+            return self.requirement(user)
+
+        key = self.key + (getattr(user, "id", None),)
+        if key not in memo:
+            memo[key] = self.requirement(user)
+        return memo[key]
+
+
+def requirement_memo() -> dict | None:
+    """Returns the results of the :class:`Memoized` requirements that have
+    been evaluated during the current request. They are kept on
+    :data:`flask.g`."""
+    if not has_request_context():
+        return None
+
+    memo = g.get(REQUIREMENTS_REQUEST_KEY)
+    if memo is None:
+        memo = {}
+        setattr(g, REQUIREMENTS_REQUEST_KEY, memo)
+    return memo
+
+
 def IsAtleastModeratorInForum(forum_id: int | None = None, forum: Forum | None = None):
     return Or(
         IsAtleastSuperModerator,
@@ -265,6 +312,14 @@ def can_moderate(user: User, forum: Forum | int | None):
     return Permission(IsAtleastModeratorInForum(**kwargs), identity=user)
 
 
+def _topic_id(topic_or_post: Topic | Post | int | None) -> int | None:
+    if isinstance(topic_or_post, Topic):
+        return topic_or_post.id
+    elif isinstance(topic_or_post, Post):
+        return topic_or_post.topic_id
+    return topic_or_post
+
+
 def can_post_reply(user: User, topic: Topic | int | None = None):
     kwargs = {}
 
@@ -273,14 +328,16 @@ def can_post_reply(user: User, topic: Topic | int | None = None):
     elif isinstance(topic, Topic):
         kwargs["topic"] = topic
 
-    return Permission(
-        Or(
-            IsAtleastSuperModerator,
-            IsModeratorInForum(),
-            And(Has("postreply"), TopicNotLocked(**kwargs)),
-        ),
-        identity=user,
+    requirement = Or(
+        IsAtleastSuperModerator,
+        IsModeratorInForum(),
+        And(Has("postreply"), TopicNotLocked(**kwargs)),
     )
+    if topic is not None:
+        # only depends on the topic, evaluated once per page
+        requirement = Memoized(requirement, "post_reply", _topic_id(topic))
+
+    return Permission(requirement, identity=user)
 
 
 def can_edit_post(user: User, topic_or_post: Topic | Post | int | None = None):
@@ -293,16 +350,17 @@ def can_edit_post(user: User, topic_or_post: Topic | Post | int | None = None):
     elif isinstance(topic_or_post, Post):
         kwargs["post"] = topic_or_post
 
+    moderates = Or(IsAtleastSuperModerator, And(IsModeratorInForum(), Has("editpost")))
+    may_edit_own = And(Has("editpost"), TopicNotLocked(**kwargs))
+    if topic_or_post is not None:
+        # the checks of the topic and forum are evaluated once per page,
+        # only the author is compared for every post
+        topic_id = _topic_id(topic_or_post)
+        moderates = Memoized(moderates, "moderate_posts", topic_id)
+        may_edit_own = Memoized(may_edit_own, "edit_own_post", topic_id)
+
     return Permission(
-        Or(
-            IsAtleastSuperModerator,
-            And(IsModeratorInForum(), Has("editpost")),
-            And(
-                IsSameUser(topic_or_post),
-                Has("editpost"),
-                TopicNotLocked(**kwargs),
-            ),
-        ),
+        Or(moderates, And(IsSameUser(topic_or_post), may_edit_own)),
         identity=user,
     )
 
@@ -333,11 +391,12 @@ def can_delete_topic(user: User, topic: Topic | int | None = None):
     elif isinstance(topic, Topic):
         kwargs["topic"] = topic
 
-    return Permission(
-        Or(
-            IsAtleastSuperModerator,
-            And(IsModeratorInForum(), Has("deletetopic")),
-            And(IsSameUser(), Has("deletetopic"), TopicNotLocked(**kwargs)),
-        ),
-        identity=user,
+    requirement = Or(
+        IsAtleastSuperModerator,
+        And(IsModeratorInForum(), Has("deletetopic")),
+        And(IsSameUser(), Has("deletetopic"), TopicNotLocked(**kwargs)),
     )
+    if topic is not None:
+        requirement = Memoized(requirement, "delete_topic", _topic_id(topic))
+
+    return Permission(requirement, identity=user)
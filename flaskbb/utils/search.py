@@ -4,25 +4,45 @@ flaskbb.utils.search
 ~~~~~~~~~~~~~~~~~~~~
 
 This module contains all the whoosheers for FlaskBB's
-full text search.
+full text search and the queue which keeps their indexes up to date.
 
 :copyright: (c) 2016 by the FlaskBB Team.
 :license: BSD, see LICENSE for more details.
 """
 
+import hashlib
+import json
 import logging
+import os
+import time
+from collections import deque
+from functools import partial
 
 import whoosh
+from flask import Flask, current_app, has_app_context
+from flask_login import current_user
+from flask_sqlalchemy.pagination import Pagination
 from flask_whooshee import AbstractWhoosheer
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, joinedload, object_session
 
+from flaskbb.extensions import cache, celery, db, redis_store
 from flaskbb.forum.models import Forum, Post, Topic
-from flaskbb.user.models import User
+from flaskbb.user.models import Group, User
+from flaskbb.utils.flushers import BufferedFlusher
+from flaskbb.utils.search_backends import (
+    DatabaseBackend,
+    Document,
+    get_search_backend,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class PostWhoosheer(AbstractWhoosheer):
     models = [Post]
+    # indexed by the search index queue
+    auto_update = False
 
     schema = whoosh.fields.Schema(
         post_id=whoosh.fields.NUMERIC(stored=True, unique=True),
@@ -31,6 +51,13 @@ class PostWhoosheer(AbstractWhoosheer):
         content=whoosh.fields.TEXT(),
     )
 
+    @classmethod
+    def documents(cls):
+        """Returns the columns of the documents, selected by the indexers."""
+        return select(
+            Post.id.label("post_id"), Post.username, Post.modified_by, Post.content
+        )
+
     @classmethod
     def update_post(cls, writer, post):
         writer.update_document(
@@ -56,6 +83,8 @@ class PostWhoosheer(AbstractWhoosheer):
 
 class TopicWhoosheer(AbstractWhoosheer):
     models = [Topic]
+    # indexed by the search index queue
+    auto_update = False
 
     schema = whoosh.fields.Schema(
         topic_id=whoosh.fields.NUMERIC(stored=True, unique=True),
@@ -64,6 +93,13 @@ class TopicWhoosheer(AbstractWhoosheer):
         content=whoosh.fields.TEXT(),
     )
 
+    @classmethod
+    def documents(cls):
+        """Returns the columns of the documents, selected by the indexers."""
+        return select(
+            Topic.id.label("topic_id"), Topic.title, Topic.username, Post.content
+        ).outerjoin(Post, Post.id == Topic.first_post_id)
+
     @classmethod
     def update_topic(cls, writer, topic):
         writer.update_document(
@@ -89,6 +125,8 @@ class TopicWhoosheer(AbstractWhoosheer):
 
 class ForumWhoosheer(AbstractWhoosheer):
     models = [Forum]
+    # indexed by the search index queue
+    auto_update = False
 
     schema = whoosh.fields.Schema(
         forum_id=whoosh.fields.NUMERIC(stored=True, unique=True),
@@ -96,6 +134,11 @@ class ForumWhoosheer(AbstractWhoosheer):
         description=whoosh.fields.TEXT(),
     )
 
+    @classmethod
+    def documents(cls):
+        """Returns the columns of the documents, selected by the indexers."""
+        return select(Forum.id.label("forum_id"), Forum.title, Forum.description)
+
     @classmethod
     def update_forum(cls, writer, forum):
         writer.update_document(
@@ -119,6 +162,8 @@ class ForumWhoosheer(AbstractWhoosheer):
 
 class UserWhoosheer(AbstractWhoosheer):
     models = [User]
+    # indexed by the search index queue
+    auto_update = False
 
     schema = whoosh.fields.Schema(
         user_id=whoosh.fields.NUMERIC(stored=True, unique=True),
@@ -126,6 +171,11 @@ class UserWhoosheer(AbstractWhoosheer):
         email=whoosh.fields.TEXT(),
     )
 
+    @classmethod
+    def documents(cls):
+        """Returns the columns of the documents, selected by the indexers."""
+        return select(User.id.label("user_id"), User.username, User.email)
+
     @classmethod
     def update_user(cls, writer, user):
         writer.update_document(
@@ -141,3 +191,678 @@ class UserWhoosheer(AbstractWhoosheer):
     @classmethod
     def delete_user(cls, writer, user):
         writer.delete_by_term("user_id", user.id)
+
+
+#: The whoosheers of FlaskBB
+whoosheers = (PostWhoosheer, TopicWhoosheer, ForumWhoosheer, UserWhoosheer)
+
+
+@event.listens_for(db.metadata, "after_create")
+def create_search_tables(target, connection, **kw):
+    """Creates the tables of the database search backend together with
+    the other tables, i.e. by ``db.create_all`` on a fresh install, if it
+    is the configured backend. ``flaskbb reindex`` creates them otherwise.
+    """
+    if has_app_context() and isinstance(
+        current_app.extensions.get("search_backend"), DatabaseBackend
+    ):
+        DatabaseBackend.create_tables(connection, whoosheers)
+
+
+@event.listens_for(db.metadata, "after_drop")
+def drop_search_tables(target, connection, **kw):
+    DatabaseBackend.drop_tables(connection, whoosheers)
+
+
+def document(row, key: str) -> Document:
+    """Turns a row selected by ``documents()`` into a document."""
+    return {
+        field: value if field == key else str(value)
+        for field, value in row._mapping.items()
+    }
+
+
+class SearchIndexQueue(BufferedFlusher):
+    """Keeps the search indexes up to date without writing to them inside
+    the request that changed the data.
+
+    The changes to the models of the registered whoosheers are recorded as
+    ``(model, id, operation)`` tuples when the session is committed (and
+    dropped if it is rolled back). The queue is then flushed in batches
+    with one index writer per whoosheer and batch. Repeated changes of the
+    same document in a batch are indexed only once and every document is
+    indexed from its current state in the database (a document whose row
+    is gone is deleted), so the order in which batches are flushed
+    doesn't matter.
+
+    If redis is enabled, the changes are queued in a redis list which can
+    be flushed by any process, e.g. by the celery beat task. Otherwise they
+    are queued in a process local buffer which is flushed by the process
+    itself after a request once ``SEARCH_INDEX_FLUSH_INTERVAL`` seconds
+    have passed and when the process exits. If ``SEARCH_INDEX_ASYNC`` is
+    disabled, the changes are indexed right after the commit.
+    """
+
+    #: The redis list in which the changes are queued
+    redis_key = "search-index-queue"
+    flush_interval_key = "SEARCH_INDEX_FLUSH_INTERVAL"
+    description = "search index queue"
+
+    def __init__(self, app: Flask | None = None):
+        self._queue: deque[tuple[str, int, str, float]] = deque()
+        self._listeners: dict[type[AbstractWhoosheer], list] = {}
+        self.whoosheers: dict[str, tuple[type[AbstractWhoosheer], type]] = {}
+        #: The number of documents that have been indexed
+        self.indexed = 0
+        #: The number of batches that have been flushed
+        self.batches = 0
+        #: The age (in seconds) of the oldest change in the last batch
+        self.last_lag = 0.0
+        super(SearchIndexQueue, self).__init__(app)
+
+    def register(self, wh: type[AbstractWhoosheer]):
+        """Records the changes of the models of a whoosheer. The whoosheer
+        should disable the ``auto_update`` of flask_whooshee, otherwise
+        its documents are indexed twice.
+
+        :param wh: The whoosheer which should be kept up to date.
+        """
+        if wh in self._listeners:
+            return wh
+
+        if not self._listeners:
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+
+        listeners = []
+        for model in wh.models:
+            self.whoosheers[model.__name__.lower()] = (wh, model)
+            for op in ("insert", "update", "delete"):
+                listener = partial(self._record, op)
+                event.listen(model, f"after_{op}", listener)
+                listeners.append((model, f"after_{op}", listener))
+        self._listeners[wh] = listeners
+        return wh
+
+    def unregister(self, wh: type[AbstractWhoosheer]):
+        """Stops recording the changes of the models of a whoosheer.
+
+        :param wh: The previously registered whoosheer.
+        """
+        for model, identifier, listener in self._listeners.pop(wh, []):
+            event.remove(model, identifier, listener)
+        for model in wh.models:
+            self.whoosheers.pop(model.__name__.lower(), None)
+
+        if not self._listeners and event.contains(
+            Session, "after_commit", self._after_commit
+        ):
+            event.remove(Session, "after_commit", self._after_commit)
+            event.remove(Session, "after_rollback", self._after_rollback)
+
+    def add(self, model: str, obj_id: int, op: str = "update"):
+        """Queues a change of a document.
+
+        :param model: The lowercased name of the model, e.g. ``post``.
+        :param obj_id: The id of the changed object.
+        :param op: ``insert``, ``update`` or ``delete``.
+        """
+        self.extend([(model, obj_id, op)])
+
+    def extend(self, changes):
+        """Queues several changes at once. See :meth:`add`."""
+        now = time.time()
+        entries = [(model, obj_id, op, now) for model, obj_id, op in changes]
+        if not entries:
+            return
+
+        if self.use_redis:
+            redis_store.rpush(self.redis_key, *[json.dumps(e) for e in entries])
+        else:
+            with self._lock:
+                self._queue.extend(entries)
+
+    def pending(self) -> int:
+        """Returns the number of queued changes."""
+        if self.use_redis:
+            return redis_store.llen(self.redis_key)
+        with self._lock:
+            return len(self._queue)
+
+    def lag(self) -> float:
+        """Returns the age (in seconds) of the oldest queued change."""
+        if self.use_redis:
+            oldest = redis_store.lindex(self.redis_key, 0)
+            oldest = json.loads(oldest) if oldest else None
+        else:
+            with self._lock:
+                oldest = self._queue[0] if self._queue else None
+        return time.time() - oldest[3] if oldest else 0.0
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns the metrics of the queue."""
+        return {
+            "pending": self.pending(),
+            "lag": self.lag(),
+            "last_lag": self.last_lag,
+            "indexed": self.indexed,
+            "batches": self.batches,
+        }
+
+    def flush(self, batch_size: int | None = None) -> int:
+        """Indexes the queued changes batch by batch and returns the number
+        of indexed documents. If a batch fails, it is put back into the
+        queue so that the changes are not lost.
+
+        :param batch_size: The maximum number of changes per batch.
+                           Defaults to ``SEARCH_INDEX_BATCH_SIZE``.
+        """
+        batch_size = batch_size or current_app.config["SEARCH_INDEX_BATCH_SIZE"]
+        indexed = 0
+        while True:
+            entries = self._take(batch_size)
+            if not entries:
+                return indexed
+
+            try:
+                indexed += self._index(entries)
+            except Exception:
+                self._restore(entries)
+                raise
+
+            self.batches += 1
+            self.last_lag = time.time() - min(e[3] for e in entries)
+            logger.debug(
+                f"Indexed {len(entries)} changes, the oldest one was queued "
+                f"{self.last_lag:.2f}s ago."
+            )
+
+    def _index(self, entries) -> int:
+        # the last change of a document wins
+        changes: dict[str, dict[int, str]] = {}
+        for model, obj_id, op, _ in entries:
+            changes.setdefault(model, {})[int(obj_id)] = op
+
+        backend = get_search_backend()
+        indexed = 0
+        with Session(db.engine) as session:
+            for name, ops in changes.items():
+                if name not in self.whoosheers:
+                    logger.warning(f"No whoosheer for the queued {name} changes.")
+                    continue
+
+                wh, model = self.whoosheers[name]
+                ids = [obj_id for obj_id, op in ops.items() if op != "delete"]
+                rows = (
+                    session.execute(wh.documents().where(model.id.in_(ids))).all()
+                    if ids
+                    else []
+                )
+                documents = [document(row, f"{name}_id") for row in rows]
+                deleted = set(ops) - {doc[f"{name}_id"] for doc in documents}
+
+                with backend.writer(wh) as writer:
+                    for doc in documents:
+                        writer.update(doc)
+                    for obj_id in sorted(deleted):
+                        writer.delete(obj_id)
+                search_result_cache.bump(name)
+                indexed += len(ops)
+
+        self.indexed += indexed
+        return indexed
+
+    def _record(self, op, mapper, connection, target):
+        session = object_session(target)
+        if session is None or target.id is None:  # pragma: no cover
+            return
+        session.info.setdefault("search_index_changes", []).append(
+            (type(target).__name__.lower(), target.id, op)
+        )
+
+    def _after_commit(self, session):
+        changes = session.info.pop("search_index_changes", None)
+        if not changes:
+            return
+
+        config = current_app.extensions["whooshee"]
+        if config.get("enable_indexing") is False:
+            return
+
+        self.extend(changes)
+        if not current_app.config["SEARCH_INDEX_ASYNC"]:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Couldn't update the search index.")
+
+    def _after_rollback(self, session):
+        session.info.pop("search_index_changes", None)
+
+    def _take(self, count: int):
+        if self.use_redis:
+            pipe = redis_store.pipeline()
+            pipe.lrange(self.redis_key, 0, count - 1)
+            pipe.ltrim(self.redis_key, count, -1)
+            entries, _ = pipe.execute()
+            return [tuple(json.loads(e)) for e in entries]
+
+        with self._lock:
+            return [self._queue.popleft() for _ in range(min(count, len(self._queue)))]
+
+    def _restore(self, entries):
+        if self.use_redis:
+            redis_store.lpush(
+                self.redis_key, *[json.dumps(e) for e in reversed(entries)]
+            )
+        else:
+            with self._lock:
+                self._queue.extendleft(reversed(entries))
+
+
+search_index_queue = SearchIndexQueue()
+
+
+@celery.task
+def flush_search_index():
+    """Indexes the changes that have been queued in redis. Scheduled by
+    celery beat every ``SEARCH_INDEX_FLUSH_INTERVAL`` seconds.
+    """
+    return search_index_queue.flush()
+
+
+class SearchReindexer(object):
+    """Rebuilds the search indexes without loading the models.
+
+    The rows are streamed in chunks of ``chunk_size`` rows, ordered by their
+    primary key and selected with only the columns that are indexed. Every
+    ``commit_every`` rows, the index writer is committed and the id of the
+    last indexed row is stored in the checkpoint file, so that a reindex
+    that has been interrupted continues from there. If ``procs`` is greater
+    than 1, the documents are indexed by a pool of processes which write
+    one segment each (whoosh's multi-segment writer).
+
+    :param whoosheers: The whoosheers to reindex by their model name.
+    :param checkpoint: The path of the checkpoint file.
+    :param chunk_size: The number of rows per select.
+    :param commit_every: The number of rows per index commit.
+    :param procs: The number of indexing processes.
+    """
+
+    def __init__(
+        self,
+        whoosheers: dict[str, type[AbstractWhoosheer]],
+        checkpoint: str | None = None,
+        chunk_size: int = 1000,
+        commit_every: int = 50000,
+        procs: int = 1,
+    ):
+        self.whoosheers = whoosheers
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.commit_every = commit_every
+        self.procs = procs
+
+    def load_checkpoint(self) -> dict[str, int]:
+        """Returns the id of the last indexed row by model name."""
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return {}
+        with open(self.checkpoint) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoints: dict[str, int]):
+        if not self.checkpoint:
+            return
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoints, f)
+        os.replace(tmp, self.checkpoint)
+
+    def count(self, name: str, since_id: int = 0) -> int:
+        """Returns the number of rows of a model that will be indexed."""
+        model = self.whoosheers[name].models[0]
+        return db.session.scalar(
+            select(func.count(model.id)).where(model.id > since_id)
+        )
+
+    def run(self, names=None, since_id: int | None = None, progress=None):
+        """Reindexes the given models and returns the number of indexed
+        documents by model name.
+
+        Without ``since_id``, the index is cleared and rebuilt, unless
+        there is a checkpoint to continue from. With ``since_id``, only
+        the rows with a greater id are (re)indexed.
+
+        :param names: The model names to reindex. Defaults to all.
+        :param since_id: Only reindex the rows with a greater id.
+        :param progress: Called as ``progress(name, indexed, total)``
+                         at the start of every model and after every chunk.
+        """
+        names = list(names or self.whoosheers)
+        checkpoints = self.load_checkpoint()
+        indexed = {}
+        for name in names:
+            resume = since_id is None and name in checkpoints
+            start = since_id if since_id is not None else checkpoints.get(name, 0)
+            total = self.count(name, start)
+            if progress:
+                progress(name, 0, total)
+            indexed[name] = self._reindex(
+                name,
+                start,
+                clear=since_id is None and not resume,
+                update=since_id is not None,
+                checkpoints=checkpoints,
+                total=total,
+                progress=progress,
+            )
+
+        # the reindexed models start from scratch the next time, the other
+        # models keep their resume points
+        for name in names:
+            checkpoints.pop(name, None)
+        if checkpoints:
+            self.save_checkpoint(checkpoints)
+        elif self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        return indexed
+
+    def _reindex(
+        self, name, last_id, clear, update, checkpoints, total, progress
+    ) -> int:
+        wh = self.whoosheers[name]
+        model = wh.models[0]
+        key = f"{name}_id"
+        backend = get_search_backend()
+
+        if clear:
+            backend.clear(wh)
+            search_result_cache.bump(name)
+
+        indexed = 0
+        writer = None
+        pending = 0
+        try:
+            while True:
+                rows = db.session.execute(
+                    wh.documents()
+                    .where(model.id > last_id)
+                    .order_by(model.id)
+                    .limit(self.chunk_size)
+                ).all()
+                if not rows:
+                    break
+
+                if writer is None:
+                    writer = backend.writer(wh, procs=self.procs)
+                write = writer.update if update else writer.add
+                for row in rows:
+                    write(document(row, key))
+                last_id = rows[-1]._mapping[key]
+                pending += len(rows)
+                indexed += len(rows)
+
+                if pending >= self.commit_every:
+                    writer.commit()
+                    search_result_cache.bump(name)
+                    writer, pending = None, 0
+                    checkpoints[name] = last_id
+                    self.save_checkpoint(checkpoints)
+
+                if progress:
+                    progress(name, indexed, total)
+        except BaseException:
+            if writer is not None:
+                writer.cancel()
+            raise
+
+        if writer is not None:
+            writer.commit()
+            search_result_cache.bump(name)
+        checkpoints[name] = last_id
+        self.save_checkpoint(checkpoints)
+        return indexed
+
+
+class SearchResultCache(object):
+    """Caches the ranked ids of the search results the viewer may see.
+
+    The results are cached by the normalised search string, the content
+    type and the groups and ``viewhidden`` permission of the viewer for
+    ``SEARCH_CACHE_TIMEOUT`` seconds. Every content type has a generation
+    counter which is bumped whenever its documents are (re)indexed and is
+    part of the key, so the cached results of a type are dropped as soon as
+    it changes. The forum groups decide which posts and topics can be seen,
+    therefore a change to the forums invalidates them as well.
+
+    The cache is disabled if ``SEARCH_CACHE_TIMEOUT`` is ``None`` and
+    while testing.
+    """
+
+    #: The content types whose results depend on another type
+    dependents = {"forum": ("forum", "post", "topic")}
+
+    def __init__(self):
+        #: The number of searches answered from the cache
+        self.hits = 0
+        #: The number of searches that had to query the index
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            not current_app.testing
+            and current_app.config["SEARCH_CACHE_TIMEOUT"] is not None
+        )
+
+    def generation(self, name: str) -> int:
+        return cache.get(f"search-generation/{name}") or 0
+
+    def bump(self, name: str):
+        """Invalidates the cached results of a content type."""
+        if not self.enabled:
+            return
+        for dependent in self.dependents.get(name, (name,)):
+            key = f"search-generation/{dependent}"
+            # the counters must not expire and are incremented atomically
+            # by the cache backend (INCR in redis) so that concurrent bumps
+            # don't get lost
+            cache.add(key, 0, timeout=0)
+            cache.cache.inc(key)
+
+    def key(self, name: str, query: str, viewer) -> str:
+        normalised = " ".join(query.replace("*", "").lower().split())
+        digest = hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+        groups = "-".join(
+            str(group_id) for group_id in sorted(g.id for g in viewer.groups)
+        )
+        view_hidden = int(bool(viewer.permissions.get("viewhidden", False)))
+        return f"search/{name}/{self.generation(name)}/{groups}/{view_hidden}/{digest}"
+
+    def get(self, name: str, query: str, viewer):
+        """Returns the cached ``(id, score)`` tuples or ``None``."""
+        if not self.enabled:
+            return None
+
+        ranked = cache.get(self.key(name, query, viewer))
+        if ranked is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return ranked
+
+    def set(self, name: str, query: str, viewer, ranked: list[tuple[int, float]]):
+        if self.enabled:
+            cache.set(
+                self.key(name, query, viewer),
+                ranked,
+                timeout=current_app.config["SEARCH_CACHE_TIMEOUT"],
+            )
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+search_result_cache = SearchResultCache()
+
+
+class SearchPagination(Pagination):
+    """A page of search results. Takes the ranked ``ids`` of all results
+    and a ``load`` function that returns the objects of the ids of a page
+    in the same order. Only the objects of the current page are loaded.
+    """
+
+    def _query_items(self) -> list:
+        ids = self._query_args["ids"][
+            self._query_offset : self._query_offset + self.per_page
+        ]
+        return self._query_args["load"](ids) if ids else []
+
+    def _query_count(self) -> int:
+        return len(self._query_args["ids"])
+
+    @property
+    def scores(self) -> dict[int, float]:
+        """The relevance score of the results by their id."""
+        return self._query_args["scores"]
+
+
+class SearchService(object):
+    """Searches the indexes of the whoosheers and loads the results.
+
+    The ids of the ``SEARCH_RESULT_LIMIT`` best matches are taken from the
+    index and reduced to the ones the viewer is allowed to see with one
+    select per model (``filter_<model>``). Only the results of the
+    requested page are then loaded with a single ``IN`` select per model
+    which eagerly loads the relations used by the templates
+    (``options_<model>``). The results are ordered by their relevance.
+
+    :param whoosheers: The whoosheers to search by their model name.
+    :param cache: The cache of the ranked results.
+    """
+
+    def __init__(
+        self,
+        whoosheers: dict[str, type[AbstractWhoosheer]] | None = None,
+        cache: SearchResultCache | None = None,
+    ):
+        self.cache = cache or search_result_cache
+        self.whoosheers = whoosheers or {
+            "post": PostWhoosheer,
+            "topic": TopicWhoosheer,
+            "forum": ForumWhoosheer,
+            "user": UserWhoosheer,
+        }
+
+    def search(
+        self, query: str, types, viewer=None, page: int = 1, per_page: int = 20
+    ) -> dict[str, SearchPagination]:
+        """Returns a page of results by model name.
+
+        :param query: The search string.
+        :param types: The model names to search, e.g. ``["post", "user"]``.
+        :param viewer: The user who searches. Defaults to the current user.
+        :param page: The page of the results.
+        :param per_page: The number of results per page.
+        """
+        viewer = viewer or current_user
+        results = {}
+        for name in self.whoosheers:
+            if name in types:
+                results[name] = self.paginate(name, query, viewer, page, per_page)
+        return results
+
+    def paginate(
+        self, name: str, query: str, viewer, page: int = 1, per_page: int = 20
+    ) -> SearchPagination:
+        ranked = self.cache.get(name, query, viewer)
+        if ranked is None:
+            hits = self.hits(name, query)
+            visible = self.visible_ids(name, [obj_id for obj_id, _ in hits], viewer)
+            # the hits are ordered by their relevance
+            ranked = [(obj_id, score) for obj_id, score in hits if obj_id in visible]
+            self.cache.set(name, query, viewer, ranked)
+
+        return SearchPagination(
+            page=page,
+            per_page=per_page,
+            error_out=False,
+            ids=[obj_id for obj_id, _ in ranked],
+            scores=dict(ranked),
+            load=partial(self.load, name),
+        )
+
+    def hits(self, name: str, query: str, limit: int | None = None):
+        """Returns the ``(id, score)`` tuples of the best matches.
+
+        :param name: The model name.
+        :param query: The search string.
+        :param limit: The maximum number of matches. Defaults to
+                      ``SEARCH_RESULT_LIMIT``.
+        """
+        limit = limit or current_app.config["SEARCH_RESULT_LIMIT"]
+        return get_search_backend().search(self.whoosheers[name], query, limit)
+
+    def visible_ids(self, name: str, ids: list[int], viewer) -> set[int]:
+        """Returns the ids the viewer is allowed to see."""
+        if not ids:
+            return set()
+        model = self.whoosheers[name].models[0]
+        stmt = select(model.id).where(model.id.in_(ids))
+        stmt = getattr(self, f"filter_{name}")(
+            stmt,
+            [group.id for group in viewer.groups],
+            viewer.permissions.get("viewhidden", False),
+        )
+        return set(db.session.scalars(stmt))
+
+    def load(self, name: str, ids: list[int]) -> list:
+        """Loads the objects of the ids in the same order."""
+        model = self.whoosheers[name].models[0]
+        stmt = select(model).where(model.id.in_(ids))
+        stmt = stmt.options(*getattr(self, f"options_{name}")())
+        objs = {obj.id: obj for obj in db.session.scalars(stmt).unique()}
+        return [objs[obj_id] for obj_id in ids if obj_id in objs]
+
+    def filter_post(self, stmt, group_ids: list[int], view_hidden: bool):
+        stmt = (
+            stmt.join(Topic, Post.topic_id == Topic.id)
+            .join(Forum, Topic.forum_id == Forum.id)
+            .where(Forum.groups.any(Group.id.in_(group_ids)))
+        )
+        if not view_hidden:
+            stmt = stmt.where(Post.hidden == False, Topic.hidden == False)
+        return stmt
+
+    def filter_topic(self, stmt, group_ids: list[int], view_hidden: bool):
+        stmt = stmt.join(Forum, Topic.forum_id == Forum.id).where(
+            Forum.groups.any(Group.id.in_(group_ids))
+        )
+        if not view_hidden:
+            stmt = stmt.where(Topic.hidden == False)
+        return stmt
+
+    def filter_forum(self, stmt, group_ids: list[int], view_hidden: bool):
+        return stmt.where(Forum.groups.any(Group.id.in_(group_ids)))
+
+    def filter_user(self, stmt, group_ids: list[int], view_hidden: bool):
+        return stmt
+
+    def options_post(self):
+        return [joinedload(Post.user)]
+
+    def options_topic(self):
+        return [
+            joinedload(Topic.user),
+            joinedload(Topic.last_post).joinedload(Post.user),
+        ]
+
+    def options_forum(self):
+        # the moderators and groups are always joined
+        return []
+
+    def options_user(self):
+        return []
+
+
+search_service = SearchService()
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""
+flaskbb.utils.search_backends
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+The backends which store the search indexes. The documents and their
+fields are described by the whoosheers in :mod:`flaskbb.utils.search`,
+a backend only has to store and search them.
+
+:copyright: (c) 2014-2018 the FlaskBB Team.
+:license: BSD, see LICENSE for more details.
+"""
+
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any
+
+from flask import Flask, current_app
+from flask_whooshee import AbstractWhoosheer, Whooshee
+from sqlalchemy import bindparam, make_url, text
+from sqlalchemy.engine import Connection
+from werkzeug.utils import import_string
+from whoosh.qparser import MultifieldParser, OrGroup
+from whoosh.writing import CLEAR
+
+from flaskbb.extensions import db
+
+logger = logging.getLogger(__name__)
+
+Document = dict[str, Any]
+
+
+def document_name(wh: type[AbstractWhoosheer]) -> str:
+    """Returns the name of the documents of a whoosheer, e.g. ``post``."""
+    return wh.models[0].__name__.lower()
+
+
+def document_key(wh: type[AbstractWhoosheer]) -> str:
+    """Returns the field that holds the id of a document, e.g. ``post_id``."""
+    return f"{document_name(wh)}_id"
+
+
+def document_fields(wh: type[AbstractWhoosheer]) -> list[str]:
+    """Returns the searchable fields of the documents of a whoosheer."""
+    key = document_key(wh)
+    return [field for field in wh.schema.names() if field != key]
+
+
+class DocumentWriter(ABC):
+    """Writes the documents of a whoosheer. The changes are visible once
+    they are committed. Can be used as a context manager which commits
+    when the block is left and cancels the changes if it raises.
+    """
+
+    @abstractmethod
+    def add(self, document: Document):
+        """Adds a document that isn't in the index yet."""
+        pass
+
+    @abstractmethod
+    def update(self, document: Document):
+        """Adds a document or replaces it if it is already in the index."""
+        pass
+
+    @abstractmethod
+    def delete(self, obj_id: int):
+        """Deletes the document of an object."""
+        pass
+
+    @abstractmethod
+    def commit(self):
+        """Makes the changes visible."""
+        pass
+
+    @abstractmethod
+    def cancel(self):
+        """Discards the changes."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.cancel()
+
+
+class SearchBackend(ABC):
+    """The interface of the search backends.
+
+    :param app: The application for which the backend is used.
+    """
+
+    def __init__(self, app: Flask | None = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.extensions["search_backend"] = self
+
+    def create_indexes(self, whoosheers):
+        """Creates the indexes of the whoosheers if they don't exist yet.
+        Called by ``flaskbb reindex`` before the indexes are filled.
+
+        :param whoosheers: The whoosheers whose indexes are created.
+        """
+        pass
+
+    @abstractmethod
+    def writer(self, wh: type[AbstractWhoosheer], procs: int = 1) -> DocumentWriter:
+        """Returns a writer for the documents of a whoosheer.
+
+        :param wh: The whoosheer whose documents are written.
+        :param procs: The number of processes the backend may use to
+                      index the documents.
+        """
+        pass
+
+    @abstractmethod
+    def clear(self, wh: type[AbstractWhoosheer]):
+        """Deletes all documents of a whoosheer."""
+        pass
+
+    @abstractmethod
+    def search(
+        self, wh: type[AbstractWhoosheer], query: str, limit: int
+    ) -> list[tuple[int, float]]:
+        """Returns the ``(id, score)`` tuples of the best matching
+        documents, the best match first.
+
+        :param wh: The whoosheer whose documents are searched.
+        :param query: The search string.
+        :param limit: The maximum number of matches.
+        """
+        pass
+
+
+class WhooshDocumentWriter(DocumentWriter):
+    def __init__(self, writer, key: str):
+        self.writer = writer
+        self.key = key
+
+    def add(self, document: Document):
+        self.writer.add_document(**document)
+
+    def update(self, document: Document):
+        self.writer.update_document(**document)
+
+    def delete(self, obj_id: int):
+        self.writer.delete_by_term(self.key, obj_id)
+
+    def commit(self):
+        self.writer.commit()
+
+    def cancel(self):
+        self.writer.cancel()
+
+
+class WhooshBackend(SearchBackend):
+    """Stores the documents in the whoosh indexes of flask_whooshee.
+
+    Whoosh allows only one writer per index and the index directory has
+    to be shared by all processes. The search matches substrings.
+    """
+
+    def index(self, wh: type[AbstractWhoosheer]):
+        return Whooshee.get_or_create_index(current_app, wh)
+
+    def writer(self, wh: type[AbstractWhoosheer], procs: int = 1) -> DocumentWriter:
+        config = current_app.extensions["whooshee"]
+        index = self.index(wh)
+        if procs > 1 and not config["memory_storage"]:
+            writer = index.writer(procs=procs, multisegment=True)
+        else:
+            writer = index.writer(timeout=config["writer_timeout"])
+        return WhooshDocumentWriter(writer, document_key(wh))
+
+    def clear(self, wh: type[AbstractWhoosheer]):
+        self.index(wh).writer().commit(mergetype=CLEAR)
+
+    def search(
+        self, wh: type[AbstractWhoosheer], query: str, limit: int
+    ) -> list[tuple[int, float]]:
+        index = self.index(wh)
+        key = document_key(wh)
+        with index.searcher() as searcher:
+            parser = MultifieldParser(wh.schema.names(), index.schema, group=OrGroup)
+            parsed = parser.parse(wh.prep_search_string(query, True))
+            return [
+                (hit[key], hit.score) for hit in searcher.search(parsed, limit=limit)
+            ]
+
+
+class DatabaseDocumentWriter(DocumentWriter):
+    def __init__(self, backend: "DatabaseBackend", wh: type[AbstractWhoosheer]):
+        self.backend = backend
+        self.wh = wh
+        self.key = document_key(wh)
+        self._documents: dict[int, Document] = {}
+        self._deleted: set[int] = set()
+
+    def add(self, document: Document):
+        self._documents[document[self.key]] = document
+
+    def update(self, document: Document):
+        self.add(document)
+        self._deleted.add(document[self.key])
+
+    def delete(self, obj_id: int):
+        self._documents.pop(obj_id, None)
+        self._deleted.add(obj_id)
+
+    def commit(self):
+        documents, deleted = self._documents, self._deleted
+        self.cancel()
+        if documents or deleted:
+            self.backend.write(self.wh, list(documents.values()), deleted)
+
+    def cancel(self):
+        self._documents, self._deleted = {}, set()
+
+
+class DatabaseBackend(SearchBackend):
+    """Stores the documents in the database, so that all processes and
+    app servers share the same index without a shared directory.
+
+    SQLite uses a FTS5 virtual table and PostgreSQL a table with a
+    ``tsvector`` column and a GIN index per whoosheer. The tables are
+    created and filled by ``flaskbb reindex``. If the backend is configured
+    on a fresh install, they are also created by the migrations (or
+    together with the other tables by ``db.create_all``). Unlike whoosh,
+    only the prefixes of words are matched.
+    """
+
+    #: The databases which can store the documents
+    dialects = ("sqlite", "postgresql")
+    #: The PostgreSQL text search configuration
+    ts_config = "simple"
+
+    def init_app(self, app: Flask):
+        dialect = make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name()
+        if dialect not in self.dialects:
+            raise RuntimeError(
+                f"The database search backend doesn't support {dialect}."
+            )
+        super(DatabaseBackend, self).init_app(app)
+
+    @property
+    def dialect(self) -> str:
+        return db.engine.dialect.name
+
+    @staticmethod
+    def table(wh: type[AbstractWhoosheer]) -> str:
+        return f"search_{document_name(wh)}"
+
+    @classmethod
+    def schema(cls, dialect: str, wh: type[AbstractWhoosheer]) -> list[str]:
+        """Returns the statements which create the table of a whoosheer."""
+        return getattr(cls, f"_{dialect}_schema")(wh, cls.table(wh))
+
+    @classmethod
+    def create_tables(cls, conn: Connection, whoosheers):
+        """Creates the tables of the whoosheers if the database is
+        supported.
+
+        :param conn: The connection on which the tables are created.
+        :param whoosheers: The whoosheers whose tables are created.
+        """
+        if conn.dialect.name not in cls.dialects:
+            return
+        for wh in whoosheers:
+            for stmt in cls.schema(conn.dialect.name, wh):
+                conn.execute(text(stmt))
+
+    @classmethod
+    def drop_tables(cls, conn: Connection, whoosheers):
+        """Drops the tables of the whoosheers."""
+        if conn.dialect.name not in cls.dialects:
+            return
+        for wh in whoosheers:
+            conn.execute(text(f"DROP TABLE IF EXISTS {cls.table(wh)}"))
+
+    def create_indexes(self, whoosheers):
+        with db.engine.begin() as conn:
+            self.create_tables(conn, whoosheers)
+
+    def writer(self, wh: type[AbstractWhoosheer], procs: int = 1) -> DocumentWriter:
+        # the database indexes the documents itself
+        return DatabaseDocumentWriter(self, wh)
+
+    def write(
+        self, wh: type[AbstractWhoosheer], documents: list[Document], deleted: set[int]
+    ):
+        """Deletes the ``deleted`` documents and inserts the ``documents``
+        in one transaction."""
+        table = self.table(wh)
+        key = document_key(wh)
+        with db.engine.begin() as conn:
+            if deleted:
+                conn.execute(
+                    text(
+                        f"DELETE FROM {table} WHERE {self._id_column} IN :ids"
+                    ).bindparams(bindparam("ids", expanding=True)),
+                    {"ids": sorted(deleted)},
+                )
+            if documents:
+                getattr(self, f"_{self.dialect}_insert")(
+                    conn, wh, table, sorted(documents, key=lambda d: d[key])
+                )
+
+    def clear(self, wh: type[AbstractWhoosheer]):
+        table = self.table(wh)
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {table}"))
+
+    def search(
+        self, wh: type[AbstractWhoosheer], query: str, limit: int
+    ) -> list[tuple[int, float]]:
+        terms = [
+            term
+            for term in re.findall(r"\w+", query.lower())
+            if len(term) >= current_app.config["WHOOSHEE_MIN_STRING_LEN"]
+        ]
+        if not terms:
+            return []
+
+        stmt, params = getattr(self, f"_{self.dialect}_search")(
+            self.table(wh), terms, limit
+        )
+        with db.engine.connect() as conn:
+            return [(row[0], float(row[1])) for row in conn.execute(text(stmt), params)]
+
+    @property
+    def _id_column(self) -> str:
+        return "rowid" if self.dialect == "sqlite" else "id"
+
+    @staticmethod
+    def _sqlite_schema(wh, table):
+        columns = ", ".join(document_fields(wh))
+        return [f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns})"]
+
+    def _sqlite_insert(self, conn, wh, table, documents):
+        key = document_key(wh)
+        fields = document_fields(wh)
+        conn.execute(
+            text(
+                f"INSERT INTO {table} (rowid, {', '.join(fields)}) "
+                f"VALUES (:{key}, {', '.join(':' + f for f in fields)})"
+            ),
+            documents,
+        )
+
+    def _sqlite_search(self, table, terms, limit):
+        # bm25 returns lower values for better matches
+        match = " OR ".join(f'"{term}"*' for term in terms)
+        return (
+            f"SELECT rowid, -bm25({table}) AS score FROM {table} "
+            f"WHERE {table} MATCH :match ORDER BY bm25({table}) LIMIT :limit",
+            {"match": match, "limit": limit},
+        )
+
+    @staticmethod
+    def _postgresql_schema(wh, table):
+        return [
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(id INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_document "
+            f"ON {table} USING GIN (document)",
+        ]
+
+    def _postgresql_insert(self, conn, wh, table, documents):
+        key = document_key(wh)
+        fields = document_fields(wh)
+        conn.execute(
+            text(
+                f"INSERT INTO {table} (id, document) "
+                f"VALUES (:id, to_tsvector(CAST(:config AS regconfig), :document)) "
+                "ON CONFLICT (id) DO UPDATE SET document = excluded.document"
+            ),
+            [
+                {
+                    "id": document[key],
+                    "config": self.ts_config,
+                    "document": " ".join(document[field] for field in fields),
+                }
+                for document in documents
+            ],
+        )
+
+    def _postgresql_search(self, table, terms, limit):
+        return (
+            f"SELECT id, ts_rank(document, query) AS score "
+            f"FROM {table}, to_tsquery(CAST(:config AS regconfig), :query) query "
+            "WHERE document @@ query ORDER BY score DESC LIMIT :limit",
+            {
+                "config": self.ts_config,
+                "query": " | ".join(f"{term}:*" for term in terms),
+                "limit": limit,
+            },
+        )
+
+
+search_backends: dict[str, type[SearchBackend]] = {
+    "whoosh": WhooshBackend,
+    "database": DatabaseBackend,
+}
+
+
+def make_search_backend(app: Flask) -> SearchBackend:
+    """Creates the backend configured by ``SEARCH_BACKEND``, either the
+    name of a builtin backend or the import path of a backend class."""
+    name = app.config["SEARCH_BACKEND"]
+    cls = search_backends.get(name) or import_string(name)
+    return cls(app)
+
+
+def get_search_backend() -> SearchBackend:
+    """Returns the search backend of the current app."""
+    return current_app.extensions["search_backend"]
@@ -11,26 +11,105 @@ configuration.
 """
 
 import logging
+import threading
 from collections.abc import MutableMapping
 from typing import Any, override
 
-from flaskbb.management.models import Setting
+from flask import g, has_request_context
+
+from flaskbb.management.models import SETTINGS_REQUEST_KEY, Setting
 
 logger = logging.getLogger(__name__)
 
 
+class SettingsSnapshot(object):
+    """Holds a process local copy of the settings which is only reloaded
+    when the version stamp of the settings (see :meth:`Setting.get_version`)
+    has changed. Inside a request the settings are additionally memoized
+    on :data:`flask.g`, so that a request fetches them at most once.
+
+    If the cache can't hold the version stamp, the settings are reloaded
+    on every fetch, i.e. once per request.
+
+    The snapshot keeps track of how often the settings have been fetched
+    and how often they had to be reloaded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version: str | None = None
+        self.settings: dict[str, Any] | None = None
+        #: How often the settings were fetched (version checks)
+        self.fetches = 0
+        #: How often the snapshot had to be reloaded
+        self.reloads = 0
+
+    def get(self) -> dict[str, Any]:
+        """Returns the settings as a dict."""
+        if not has_request_context():
+            return self.fetch()
+
+        g.flaskbb_settings_lookups = g.get("flaskbb_settings_lookups", 0) + 1
+        settings = g.get(SETTINGS_REQUEST_KEY)
+        if settings is None:
+            settings = self.fetch()
+            setattr(g, SETTINGS_REQUEST_KEY, settings)
+        return settings
+
+    def fetch(self) -> dict[str, Any]:
+        """Checks the version stamp and reloads the snapshot if needed."""
+        self.fetches += 1
+        self._count("flaskbb_settings_fetches")
+        version = Setting.get_version()
+        settings = self.settings
+        if settings is not None and version is not None and version == self.version:
+            return settings
+
+        with self._lock:
+            if (
+                self.settings is not None
+                and version is not None
+                and version == self.version
+            ):
+                return self.settings
+
+            settings = Setting.as_dict()
+            self.reloads += 1
+            self._count("flaskbb_settings_reloads")
+            logger.debug(f"Reloaded settings snapshot (version {version}).")
+            # don't hold on to an empty snapshot, i.e. before the settings
+            # have been created during the installation
+            if settings:
+                self.settings = settings
+                self.version = version
+        return settings
+
+    @staticmethod
+    def _count(name: str):
+        """Counts the fetches and reloads of the current request."""
+        if has_request_context():
+            setattr(g, name, g.get(name, 0) + 1)
+
+    def clear(self):
+        """Drops the snapshot. The next fetch will reload it."""
+        with self._lock:
+            self.settings = None
+            self.version = None
+
+
 class FlaskBBConfig(MutableMapping[str, Any | None]):
     """Provides a dictionary like interface for interacting with FlaskBB's
     Settings cache.
     """
 
     def __init__(self, *args, **kwargs):
+        self.snapshot = SettingsSnapshot()
         self.update(dict(*args, **kwargs))
 
     @override
     def __getitem__(self, key: str) -> Any:
         try:
-            return Setting.as_dict()[key]
+            return self.snapshot.get()[key]
         except KeyError:
             logger.info(f"Couldn't find setting for key ${key}")
             return None
@@ -43,10 +122,24 @@ class FlaskBBConfig(MutableMapping[str, Any | None]):
         pass
 
     def __iter__(self):
-        return iter(Setting.as_dict())
+        return iter(self.snapshot.get())
 
     def __len__(self):
-        return len(Setting.as_dict())
+        return len(self.snapshot.get())
+
+    def teardown_request(self, exc: BaseException | None = None):
+        """Drops the settings memoized for the request and logs how often
+        the request had to fetch them.
+        """
+        g.pop(SETTINGS_REQUEST_KEY, None)
+        lookups = g.pop("flaskbb_settings_lookups", 0)
+        fetches = g.pop("flaskbb_settings_fetches", 0)
+        reloads = g.pop("flaskbb_settings_reloads", 0)
+        logger.debug(
+            f"Request looked up the settings {lookups} time(s), fetched "
+            f"them {fetches} time(s) and reloaded the snapshot {reloads} "
+            f"time(s)."
+        )
 
 
 flaskbb_config = FlaskBBConfig()
@@ -1,8 +1,11 @@
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 
 from flaskbb import create_app
 from flaskbb.configs.testing import TestingConfig as Config
-from flaskbb.extensions import db
+from flaskbb.extensions import cache, db
 from flaskbb.utils.populate import create_default_groups, create_default_settings
 
 
@@ -56,3 +59,32 @@ def database():
 
     db.drop_all()
     db.session.close()
+    # the cached data (e.g. the compiled permissions keyed by the version
+    # stamp of the groups) refers to rows which are gone now
+    cache.clear()
+
+
+@pytest.fixture()
+def count_queries(database):
+    """Returns a context manager which collects the SQL statements that
+    are executed while it is active::
+
+        with count_queries() as statements:
+            ...
+        assert len(statements) == 1
+    """
+
+    @contextmanager
+    def count_queries():
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(database.engine, "before_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(database.engine, "before_cursor_execute", count)
+
+    return count_queries
@@ -3,11 +3,15 @@ import datetime
 import pytest
 from freezegun import freeze_time
 from pluggy import HookimplMarker
+from werkzeug.security import generate_password_hash
 
+from flaskbb.auth import plugins as auth_plugins
 from flaskbb.auth.services import authentication as auth
+from flaskbb.auth.services.lockout import FailedLoginConfiguration
 from flaskbb.core.auth.authentication import (
     AuthenticationFailureHandler,
     AuthenticationProvider,
+    AuthenticationUnavailable,
     PostAuthenticationHandler,
     StopAuthentication,
 )
@@ -17,9 +21,7 @@ pytestmark = pytest.mark.usefixtures("default_settings")
 
 class TestBlockTooManyFailedLogins(object):
     provider = auth.BlockTooManyFailedLogins(
-        auth.FailedLoginConfiguration(
-            limit=1, lockout_window=datetime.timedelta(hours=1)
-        )
+        FailedLoginConfiguration(limit=1, lockout_window=datetime.timedelta(hours=1))
     )
 
     @freeze_time(datetime.datetime(2018, 1, 1, 13, 30))
@@ -74,6 +76,38 @@ class TestDefaultFlaskBBAuthProvider(object):
 
         assert result.username == Fred.username
 
+    def test_verifies_the_dummy_hash_if_user_doesnt_exist(self, Fred, mocker):
+        verify_dummy = mocker.spy(auth.password_hasher, "verify_dummy")
+
+        self.provider.authenticate("completely@made.up", "lolnope")
+
+        verify_dummy.assert_called_once_with("lolnope")
+
+    def test_rehashes_password_with_outdated_parameters(self, Fred):
+        Fred._password = generate_password_hash("fred", "pbkdf2:sha256:2000")
+
+        assert self.provider.authenticate(Fred.email, "fred") == Fred
+        assert not auth.password_hasher.needs_rehash(Fred.password)
+        assert Fred.check_password("fred")
+
+    def test_skips_rehash_if_hasher_is_busy(self, Fred, mocker):
+        old_hash = generate_password_hash("fred", "pbkdf2:sha256:2000")
+        Fred._password = old_hash
+        mocker.patch.object(
+            auth.password_hasher, "hash", side_effect=auth.PasswordHasherBusy
+        )
+
+        assert self.provider.authenticate(Fred.email, "fred") == Fred
+        assert Fred.password == old_hash
+
+    def test_stops_authentication_if_hasher_is_busy(self, Fred, mocker):
+        mocker.patch.object(
+            auth.password_hasher, "verify", side_effect=auth.PasswordHasherBusy
+        )
+
+        with pytest.raises(AuthenticationUnavailable):
+            self.provider.authenticate(Fred.email, "fred")
+
 
 class TestMarkFailedLoginAttempt(object):
     handler = auth.MarkFailedLogin()
@@ -89,6 +123,53 @@ class TestMarkFailedLoginAttempt(object):
     def test_handles_if_user_doesnt_exist(self, Fred):
         self.handler.handle_authentication_failure("completely@made.up")
 
+    def test_increments_the_attempts_stored_in_the_database(self, Fred, database):
+        database.session.execute(
+            database.update(auth.User)
+            .where(auth.User.id == Fred.id)
+            .values(login_attempts=3)
+        )
+        attempt = auth.AuthenticationAttempt(Fred.username)
+        attempt.user = Fred
+
+        self.handler.handle_authentication_failure(Fred.username, attempt)
+
+        assert Fred.login_attempts == 4
+
+    def test_handles_if_attempt_has_no_user(self, Fred):
+        attempt = auth.AuthenticationAttempt("completely@made.up")
+        self.handler.handle_authentication_failure(attempt.identifier, attempt)
+
+        assert Fred.login_attempts == 0
+
+
+class TestAuthenticationAttempt(object):
+    @pytest.mark.parametrize("identifier", ["Fred", "fred@fred.fred"])
+    def test_resolves_the_user_once(self, Fred, count_queries, identifier):
+        attempt = auth.AuthenticationAttempt(identifier)
+        with count_queries() as statements:
+            assert attempt.user == Fred
+            assert attempt.user == Fred
+
+        assert len(statements) == 1
+        assert "UNION" in statements[0]
+
+    def test_unknown_identifier(self, Fred):
+        assert auth.AuthenticationAttempt("completely@made.up").user is None
+
+    def test_is_shared_by_the_login_hooks(self, plugin_manager, Fred, database, mocker):
+        plugin_manager.register(auth_plugins)
+        find_user = mocker.spy(auth, "find_user")
+        service = auth.PluginAuthenticationManager(
+            plugin_manager, session=database.session
+        )
+
+        with pytest.raises(StopAuthentication):
+            service.authenticate(Fred.email, "not fred")
+
+        assert find_user.call_count == 1
+        assert Fred.login_attempts == 1
+
 
 class TestClearFailedLogins(object):
     handler = auth.ClearFailedLogins()
@@ -0,0 +1,203 @@
+import datetime
+
+import pytest
+
+from flaskbb.auth import plugins as auth_plugins
+from flaskbb.auth.services import lockout
+from flaskbb.auth.services.authentication import (
+    AuthenticationAttempt,
+    PluginAuthenticationManager,
+)
+from flaskbb.auth.services.reauthentication import (
+    ClearFailedLoginsOnReauth,
+    MarkFailedReauth,
+    PluginReauthenticationManager,
+)
+from flaskbb.core.auth.authentication import (
+    AuthenticationUnavailable,
+    StopAuthentication,
+)
+from flaskbb.utils.passwords import PasswordHasherBusy, password_hasher
+
+pytestmark = pytest.mark.usefixtures("default_settings")
+
+WINDOW = datetime.timedelta(minutes=15)
+
+
+class FakeRedis(object):
+    """Implements the sorted set commands the redis store uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        low = float(low)
+        entries = self.data.get(key, {})
+        for member, score in list(entries.items()):
+            if low <= score <= high:
+                del entries[member]
+
+    def zcount(self, key, low, high):
+        high = float(high)
+        return sum(low <= score <= high for score in self.data.get(key, {}).values())
+
+    def expire(self, key, seconds):
+        self.expires[key] = seconds
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class FakePipeline(object):
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.commands.append((getattr(self.redis, name), args))
+
+        return command
+
+    def execute(self):
+        return [func(*args) for func, args in self.commands]
+
+
+@pytest.fixture
+def redis_store():
+    configuration = lockout.FailedLoginConfiguration(
+        limit=3, lockout_window=WINDOW, ip_limit=5
+    )
+    return lockout.RedisLockoutStore(configuration, FakeRedis())
+
+
+class TestRedisLockoutStore(object):
+    def test_locks_out_identifier_after_limit(self, redis_store):
+        attempt = AuthenticationAttempt("Fred", remote_addr="10.0.0.1")
+
+        for _ in range(3):
+            assert not redis_store.is_locked_out(attempt)
+            redis_store.record_failure(attempt)
+
+        assert redis_store.is_locked_out(attempt)
+        # the identifier is normalized
+        assert redis_store.is_locked_out(AuthenticationAttempt(" fred"))
+        assert redis_store.redis.expires[redis_store.identifier_key("fred")] == 900
+
+    def test_locks_out_ip_after_limit(self, redis_store):
+        for name in ["a", "b", "c", "d", "e"]:
+            attempt = AuthenticationAttempt(name, remote_addr="10.0.0.1")
+            redis_store.record_failure(attempt)
+
+        assert redis_store.is_locked_out(
+            AuthenticationAttempt("f", remote_addr="10.0.0.1")
+        )
+        assert not redis_store.is_locked_out(
+            AuthenticationAttempt("f", remote_addr="10.0.0.2")
+        )
+
+    def test_failures_slide_out_of_the_window(self, redis_store, monkeypatch):
+        attempt = AuthenticationAttempt("Fred")
+        now = 1_000_000.0
+        monkeypatch.setattr(lockout.time, "time", lambda: now)
+        for _ in range(3):
+            redis_store.record_failure(attempt)
+        assert redis_store.is_locked_out(attempt)
+
+        now += WINDOW.total_seconds() + 1
+        assert not redis_store.is_locked_out(attempt)
+
+    def test_counts_the_failures_of_a_user_together(self, redis_store, Fred):
+        for identifier in [Fred.username, Fred.email, Fred.username]:
+            assert not redis_store.is_locked_out(AuthenticationAttempt(identifier))
+            redis_store.record_failure(AuthenticationAttempt(identifier))
+
+        assert redis_store.is_locked_out(AuthenticationAttempt(Fred.email))
+        assert len(redis_store.redis.data[redis_store.user_key(Fred)]) == 3
+
+    def test_reauth_failures_are_recorded_in_the_store(self, redis_store, Fred):
+        for _ in range(3):
+            MarkFailedReauth(redis_store).handle_reauth_failure(Fred)
+
+        assert redis_store.is_locked_out(AuthenticationAttempt(Fred.email))
+        assert Fred.login_attempts == 0
+
+        ClearFailedLoginsOnReauth(redis_store).handle_post_reauth(Fred)
+        assert not redis_store.is_locked_out(AuthenticationAttempt(Fred.email))
+
+    def test_clear_keeps_the_failures_of_the_ip(self, redis_store, Fred):
+        attempts = [
+            AuthenticationAttempt(Fred.username, remote_addr="10.0.0.1"),
+            AuthenticationAttempt(Fred.email, remote_addr="10.0.0.1"),
+        ]
+        for attempt in attempts * 2:
+            redis_store.record_failure(attempt)
+
+        redis_store.clear(Fred)
+
+        assert redis_store.redis.data[redis_store.ip_key("10.0.0.1")]
+        assert not redis_store.redis.data.get(redis_store.identifier_key(Fred.username))
+        assert not redis_store.redis.data.get(redis_store.identifier_key(Fred.email))
+
+    def test_doesnt_touch_the_database(self, redis_store, Fred, count_queries):
+        attempt = AuthenticationAttempt(Fred.username, remote_addr="10.0.0.1")
+        # the user is looked up once per attempt by the providers
+        assert attempt.user == Fred
+        with count_queries() as statements:
+            redis_store.is_locked_out(attempt)
+            redis_store.record_failure(attempt)
+
+        assert statements == []
+
+
+class TestLoginLockout(object):
+    def test_locks_out_after_failed_logins(
+        self, application, plugin_manager, Fred, database, monkeypatch
+    ):
+        monkeypatch.setitem(application.config, "LOGIN_LOCKOUT_ATTEMPTS", 2)
+        plugin_manager.register(auth_plugins)
+        service = PluginAuthenticationManager(plugin_manager, session=database.session)
+
+        for _ in range(2):
+            with pytest.raises(StopAuthentication) as excinfo:
+                service.authenticate(Fred.username, "not fred")
+            assert excinfo.value.reason == "Wrong username or password."
+
+        with pytest.raises(StopAuthentication) as excinfo:
+            service.authenticate(Fred.username, "fred")
+        assert "locked out" in excinfo.value.reason
+
+    def test_busy_hasher_doesnt_count_as_failed_login(
+        self, application, plugin_manager, Fred, database, monkeypatch, mocker
+    ):
+        monkeypatch.setitem(application.config, "LOGIN_LOCKOUT_ATTEMPTS", 2)
+        plugin_manager.register(auth_plugins)
+        service = PluginAuthenticationManager(plugin_manager, session=database.session)
+        reauth = PluginReauthenticationManager(plugin_manager, session=database.session)
+        verify = mocker.patch.object(
+            password_hasher, "verify", side_effect=PasswordHasherBusy
+        )
+
+        for _ in range(3):
+            with pytest.raises(AuthenticationUnavailable):
+                service.authenticate(Fred.username, "fred")
+            with pytest.raises(AuthenticationUnavailable):
+                reauth.reauthenticate(Fred, "fred")
+
+        assert Fred.login_attempts == 0
+        verify.side_effect = None
+        verify.return_value = True
+        assert service.authenticate(Fred.username, "fred") == Fred
+
+    def test_uses_redis_if_enabled(self, application, monkeypatch):
+        monkeypatch.setitem(application.config, "REDIS_ENABLED", True)
+
+        assert isinstance(lockout.lockout_store_factory(), lockout.RedisLockoutStore)
@@ -5,6 +5,7 @@ from flaskbb.auth.services import password
 from flaskbb.core.exceptions import StopValidation, ValidationError
 from flaskbb.core.tokens import Token, TokenActions, TokenError
 from flaskbb.user.models import User
+from flaskbb.utils.passwords import PasswordHasherBusy, password_hasher
 
 pytestmark = pytest.mark.usefixtures("default_settings")
 
@@ -47,6 +48,21 @@ class TestPasswordReset(object):
         service.reset_password(token, Fred.email, "newpasswordwhodis")
         assert check_password_hash(Fred.password, "newpasswordwhodis")
 
+    def test_raises_StopValidation_if_hasher_is_busy(
+        self, token_serializer, Fred, mocker
+    ):
+        token = token_serializer.dumps(
+            Token(user_id=Fred.id, operation=TokenActions.RESET_PASSWORD)
+        )
+        service = password.ResetPasswordService(token_serializer, User, [])
+        mocker.patch.object(password_hasher, "hash", side_effect=PasswordHasherBusy)
+
+        with pytest.raises(StopValidation) as excinfo:
+            service.reset_password(token, Fred.email, "newpasswordwhodis")
+
+        assert [attr for attr, _ in excinfo.value.reasons] == ["password"]
+        assert check_password_hash(Fred.password, "fred")
+
     # need fred to initiate Users
     def test_initiate_raises_if_user_doesnt_exist(self, token_serializer, Fred):
         service = password.ResetPasswordService(token_serializer, User, [])
@@ -3,9 +3,11 @@ from datetime import UTC, datetime
 import pytest
 from freezegun import freeze_time
 from pluggy import HookimplMarker
+from werkzeug.security import generate_password_hash
 
 from flaskbb.auth.services import reauthentication as reauth
 from flaskbb.core.auth.authentication import (
+    AuthenticationUnavailable,
     PostReauthenticateHandler,
     ReauthenticateFailureHandler,
     ReauthenticateProvider,
@@ -21,6 +23,28 @@ def test_default_reauth_returns_true_if_secret_matches_user(Fred):
     assert service.reauthenticate(Fred, "fred")
 
 
+def test_default_reauth_stops_if_hasher_is_busy(Fred, mocker):
+    service = reauth.DefaultFlaskBBReauthProvider()
+    mocker.patch.object(
+        reauth.password_hasher, "verify", side_effect=reauth.PasswordHasherBusy
+    )
+
+    with pytest.raises(AuthenticationUnavailable):
+        service.reauthenticate(Fred, "fred")
+
+
+def test_default_reauth_skips_rehash_if_hasher_is_busy(Fred, mocker):
+    service = reauth.DefaultFlaskBBReauthProvider()
+    old_hash = generate_password_hash("fred", "pbkdf2:sha256:2000")
+    Fred._password = old_hash
+    mocker.patch.object(
+        reauth.password_hasher, "hash", side_effect=reauth.PasswordHasherBusy
+    )
+
+    assert service.reauthenticate(Fred, "fred")
+    assert Fred.password == old_hash
+
+
 def test_clears_failed_logins_attempts(Fred):
     service = reauth.ClearFailedLoginsOnReauth()
     Fred.login_attempts = 1000
@@ -14,6 +14,7 @@ from flaskbb.core.exceptions import (
     ValidationError,
 )
 from flaskbb.user.models import User
+from flaskbb.utils.passwords import PasswordHasherBusy, password_hasher
 
 pytestmark = pytest.mark.usefixtures("default_settings")
 
@@ -83,6 +84,18 @@ class TestRegistrationService(object):
         with pytest.raises(PersistenceError):
             service.register(self.fred)
 
+    def test_raises_stop_validation_if_hasher_is_busy(
+        self, database, plugin_manager, mocker
+    ):
+        service = self._get_service(plugin_manager, database)
+        mocker.patch.object(password_hasher, "hash", side_effect=PasswordHasherBusy)
+
+        with pytest.raises(StopValidation) as excinfo:
+            service.register(self.fred)
+
+        assert [attr for attr, _ in excinfo.value.reasons] == ["password"]
+        assert User.get_by(username="Fred") is None
+
     @staticmethod
     def _get_service(plugin_manager, db):
         return RegistrationService(plugins=plugin_manager, users=User, db=db)
@@ -0,0 +1,89 @@
+import pytest
+from flask import Flask
+from sqlalchemy.engine import Connection
+
+from flaskbb.forum.counters import TopicViewCounter
+
+
+class TestTopicViewCounter(object):
+    def test_flush_writes_buffered_views(self, database, topic):
+        counter = TopicViewCounter()
+        for _ in range(3):
+            counter.add(topic.id)
+
+        assert counter.pending() == {topic.id: 3}
+        assert counter.flush() == 1
+        assert counter.pending() == {}
+
+        database.session.refresh(topic)
+        assert topic.views == 3
+
+    def test_views_are_not_lost_across_a_flush(self, database, topic):
+        counter = TopicViewCounter()
+        counter.add(topic.id, 2)
+        counter.flush()
+        counter.add(topic.id, 5)
+
+        # nothing left to flush for the already flushed views
+        database.session.refresh(topic)
+        assert topic.views == 2
+
+        counter.flush()
+        assert counter.flush() == 0
+        database.session.refresh(topic)
+        assert topic.views == 7
+
+    def test_views_are_restored_if_flush_fails(self, database, topic, mocker):
+        counter = TopicViewCounter()
+        counter.add(topic.id, 4)
+
+        mocker.patch.object(
+            Connection, "execute", side_effect=RuntimeError("db is gone")
+        )
+        with pytest.raises(RuntimeError):
+            counter.flush()
+        mocker.stopall()
+
+        assert counter.pending() == {topic.id: 4}
+        counter.add(topic.id)
+        counter.flush()
+
+        database.session.refresh(topic)
+        assert topic.views == 5
+
+    def test_flush_if_due_respects_interval(
+        self, application, database, topic, monkeypatch
+    ):
+        counter = TopicViewCounter()
+        counter.add(topic.id)
+
+        monkeypatch.setitem(application.config, "TOPIC_VIEWS_FLUSH_INTERVAL", 3600)
+        counter.flush_if_due()
+        assert counter.pending() == {topic.id: 1}
+
+        monkeypatch.setitem(application.config, "TOPIC_VIEWS_FLUSH_INTERVAL", 0)
+        counter.flush_if_due()
+        assert counter.pending() == {}
+        database.session.refresh(topic)
+        assert topic.views == 1
+
+    def test_flush_does_not_commit_the_session(self, database, topic):
+        counter = TopicViewCounter()
+        counter.add(topic.id, 2)
+        topic.title = "Changed by a failed request"
+
+        counter.flush()
+        database.session.rollback()
+
+        database.session.refresh(topic)
+        assert topic.views == 2
+        assert topic.title == "Test Topic Normal"
+
+    def test_init_app_registers_exit_handler_once(self, mocker):
+        register = mocker.patch("flaskbb.utils.flushers.atexit.register")
+        counter = TopicViewCounter()
+
+        counter.init_app(Flask(__name__))
+        counter.init_app(Flask(__name__))
+
+        register.assert_called_once_with(counter._flush_at_exit)
@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from flaskbb.forum.models import Forum, Post
+from flaskbb.forum.trackers import TrackerPruner
+from flaskbb.utils.queries import paginate
+
+
+@pytest.fixture
+def query_plans(database):
+    """Runs ``EXPLAIN QUERY PLAN`` for every statement executed inside the
+    returned context manager and collects the plans."""
+    if database.engine.dialect.name != "sqlite":  # pragma: no cover
+        pytest.skip("EXPLAIN QUERY PLAN is SQLite specific")
+
+    @contextmanager
+    def capture():
+        plans = []
+
+        def explain(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                plans.append([row[-1] for row in cursor.fetchall()])
+
+        event.listen(database.engine, "before_cursor_execute", explain)
+        try:
+            yield plans
+        finally:
+            event.remove(database.engine, "before_cursor_execute", explain)
+
+    return capture
+
+
+def assert_uses_index(plans, table, index):
+    details = [detail for plan in plans for detail in plan]
+    assert any(index in detail for detail in details), details
+    # "SCAN <table>" without an index is a full table scan
+    assert f"SCAN {table}" not in details, details
+
+
+def test_forum_get_topics_uses_index(query_plans, forum, topic, user):
+    with query_plans() as plans:
+        Forum.get_topics(forum_id=forum.id, user=user)
+
+    assert_uses_index(plans, "topics", "ix_topics_forum_id_important_last_updated")
+
+
+def test_view_topic_posts_use_index(query_plans, database, topic):
+    stmt = (
+        database.select(Post).where(Post.topic_id == topic.id).order_by(Post.id.asc())
+    )
+    with query_plans() as plans:
+        paginate(stmt, page=1, per_page=10)
+
+    assert_uses_index(plans, "posts", "ix_posts_topic_id_id")
+
+
+def test_view_post_position_uses_index(query_plans, database, topic):
+    post = topic.first_post
+    stmt = database.select(database.func.count(Post.id)).where(
+        Post.topic_id == post.topic_id, Post.id <= post.id
+    )
+    with query_plans() as plans:
+        database.session.execute(stmt).scalar()
+
+    assert_uses_index(plans, "posts", "ix_posts_topic_id_id")
+
+
+def test_forum_update_read_uses_index(query_plans, forum, user, topicsread, forumsread):
+    with query_plans() as plans:
+        forum.update_read(user, forumsread, topicsread)
+
+    assert_uses_index(plans, "topics", "ix_topics_forum_id_important_last_updated")
+
+
+def test_user_all_posts_uses_index(query_plans, topic, user):
+    with query_plans() as plans:
+        user.all_posts(page=1, viewer=user)
+
+    assert_uses_index(plans, "posts", "ix_posts_user_id_id")
+
+
+def test_topictracker_uses_index(query_plans, topic, user):
+    user.track_topic(topic)
+    user.save()
+
+    with query_plans() as plans:
+        user.is_tracking_topic(topic)
+
+    assert_uses_index(plans, "topictracker", "ix_topictracker_user_id_topic_id")
+
+
+def test_tracker_pruner_uses_index(query_plans, topicsread, forumsread):
+    with query_plans() as plans:
+        TrackerPruner(batch_size=10, pause=0).prune()
+
+    assert_uses_index(plans, "topicsread", "ix_topicsread_last_read")
+    assert_uses_index(plans, "forumsread", "ix_forumsread_last_read")
@@ -0,0 +1,62 @@
+import pytest
+from flask import g
+from flask.testing import FlaskClient
+
+from flaskbb.extensions import cache, limiter
+
+
+@pytest.fixture
+def preview_client(application, default_settings, monkeypatch):
+    # the app is shared by the package, don't inherit the forum or the
+    # login client other tests left behind
+    g.pop("forum", None)
+    monkeypatch.setattr(application, "test_client_class", FlaskClient)
+    monkeypatch.setitem(application.config, "WTF_CSRF_ENABLED", False)
+    cache.clear()
+    limiter.reset()
+    return application.test_client()
+
+
+class TestMarkdownPreview(object):
+    def test_renders_with_the_markdown_plugins(self, preview_client):
+        response = preview_client.post("/markdown", data="~~gone~~ @user")
+
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert "<del>gone</del>" in html
+        assert "/user/user" in html
+
+    def test_renders_nonpost_markup(self, preview_client):
+        response = preview_client.post("/markdown/nonpost", data="**bold**")
+
+        assert "<strong>bold</strong>" in response.get_data(as_text=True)
+
+    def test_identical_previews_are_debounced(
+        self, application, preview_client, monkeypatch
+    ):
+        calls = []
+        markup = application.jinja_env.filters["markup"]
+
+        def renderer(text):
+            calls.append(text)
+            return markup(text)
+
+        monkeypatch.setitem(application.jinja_env.filters, "markup", renderer)
+
+        first = preview_client.post("/markdown", data="*same*")
+        second = preview_client.post("/markdown", data="*same*")
+        preview_client.post("/markdown", data="*other*")
+
+        assert first.get_data() == second.get_data()
+        assert calls == ["*same*", "*other*"]
+
+    def test_previews_are_rate_limited(self, application, preview_client, monkeypatch):
+        monkeypatch.setitem(
+            application.config, "MARKDOWN_PREVIEW_RATE_LIMIT", "2/minute"
+        )
+
+        responses = [
+            preview_client.post("/markdown", data=f"text {i}") for i in range(3)
+        ]
+
+        assert [r.status_code for r in responses] == [200, 200, 429]
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from flaskbb.forum.models import Category, Forum, Post, Topic
+from flaskbb.user.models import User
+from flaskbb.utils.populate import create_default_groups
+
+THREADS = 4
+REPLIES = 10
+
+
+@pytest.fixture
+def file_database(application, database, tmp_path, monkeypatch):
+    """Binds the app to a SQLite database file which, unlike the in-memory
+    database, can be used by several connections at the same time."""
+    engine = create_engine(
+        "sqlite:///{}".format(tmp_path / "flaskbb.sqlite"),
+        connect_args={"timeout": 30},
+    )
+    database.session.remove()
+    monkeypatch.setitem(database.engines, None, engine)
+    database.create_all()
+
+    yield database
+
+    database.session.remove()
+    engine.dispose()
+
+
+def test_concurrent_replies_keep_exact_counts(application, file_database):
+    db = file_database
+    member = create_default_groups()[3]
+    user = User(username="test", email="test@example.org", password="test")
+    user.primary_group = member
+    user.save()
+    category = Category(title="Category").save()
+    forum = Forum(title="Forum", category_id=category.id).save()
+    topic = Topic(title="Topic").save(forum=forum, user=user, post=Post(content="a"))
+    topic_id, forum_id, user_id = topic.id, forum.id, user.id
+    start = threading.Barrier(THREADS)
+    errors = []
+
+    def reply():
+        try:
+            with application.app_context():
+                author = db.session.get(User, user_id)
+                replied = db.session.get(Topic, topic_id)
+                start.wait()
+                for _ in range(REPLIES):
+                    Post(content="reply").save(user=author, topic=replied)
+                db.session.remove()
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=reply) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.session.expire_all()
+    last_post = db.session.execute(
+        db.select(Post).order_by(Post.date_created.desc(), Post.id.desc())
+    ).scalar()
+    topic = db.session.get(Topic, topic_id)
+    forum = db.session.get(Forum, forum_id)
+    posts = 1 + THREADS * REPLIES
+
+    assert topic.post_count == posts
+    assert forum.post_count == posts
+    assert forum.topic_count == 1
+    assert db.session.get(User, user_id).post_count == posts
+    assert topic.last_post_id == forum.last_post_id == last_post.id
+    assert forum.last_post_created == topic.last_updated == last_post.date_created
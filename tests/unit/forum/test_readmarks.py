@@ -0,0 +1,246 @@
+from datetime import UTC, datetime
+
+import pytest
+from flask import g, url_for
+from flask_login import FlaskLoginClient
+
+from flaskbb.forum.models import (
+    Category,
+    Forum,
+    ForumsRead,
+    Post,
+    ReadMark,
+    Topic,
+    TopicsRead,
+    pack_read_topics,
+    unpack_read_topics,
+)
+from flaskbb.utils.helpers import forum_is_unread, topic_is_unread
+from flaskbb.utils.settings import flaskbb_config
+
+
+def test_read_topics_are_packed_as_arrays():
+    read_topics = {
+        7: datetime(2026, 10, 17, 12, 0, 0, 1, tzinfo=UTC),
+        3: datetime(1999, 1, 1, tzinfo=UTC),
+    }
+
+    packed = pack_read_topics(read_topics)
+
+    assert len(packed) == 2 * 12
+    assert unpack_read_topics(packed) == read_topics
+    assert unpack_read_topics(b"") == {}
+
+
+class TestReadMark(object):
+    def test_topic_is_unread_until_read(self, topic, user):
+        mark = ReadMark.for_user(user, topic.forum_id)
+        assert mark.is_unread(topic)
+        assert mark.first_unread_post_id(topic) == topic.first_post_id
+
+        mark.mark_topic_read(topic)
+        mark.save()
+
+        mark = ReadMark.for_user(user, topic.forum_id)
+        assert not mark.is_unread(topic)
+        assert mark.first_unread_post_id(topic) is None
+
+    def test_new_posts_are_unread(self, topic, user):
+        mark = ReadMark.for_user(user, topic.forum_id)
+        mark.mark_topic_read(topic, topic.last_updated)
+        post = Post(content="new").save(topic=topic, user=user)
+
+        assert mark.is_unread(topic)
+        assert mark.first_unread_post_id(topic) == post.id
+
+    def test_unread_count(self, forum, topic, user):
+        other = Topic(title="other").save(
+            forum=forum, user=user, post=Post(content="other")
+        )
+        mark = ReadMark.for_user(user, forum.id)
+        assert mark.unread_count() == 2
+
+        mark.mark_topic_read(other)
+        assert mark.unread_topic_ids() == [topic.id]
+
+        mark.mark_forum_read()
+        assert mark.unread_count() == 0
+        assert mark.read_topics == {}
+
+    def test_compact_moves_the_watermark(self, forum, topic, user):
+        other = Topic(title="other").save(
+            forum=forum, user=user, post=Post(content="other")
+        )
+        mark = ReadMark.for_user(user, forum.id)
+
+        # the older topic is unread, nothing can be compacted
+        mark.mark_topic_read(other)
+        mark.compact()
+        assert mark.watermark is None
+        assert set(mark.read_topics) == {other.id}
+
+        mark.mark_topic_read(topic)
+        mark.compact()
+        assert mark.watermark == other.last_updated
+        assert mark.read_topics == {}
+        assert mark.unread_count() == 0
+
+    def test_compacts_when_too_many_topics_are_read(
+        self, forum, topic, user, monkeypatch
+    ):
+        monkeypatch.setattr(ReadMark, "max_read_topics", 1)
+        other = Topic(title="other").save(
+            forum=forum, user=user, post=Post(content="other")
+        )
+        mark = ReadMark.for_user(user, forum.id)
+
+        mark.mark_topic_read(topic)
+        mark.mark_topic_read(other)
+
+        assert mark.watermark == other.last_updated
+        assert mark.read_topics == {}
+
+    def test_disabled_tracker(self, topic, user, monkeypatch):
+        monkeypatch.setitem(flaskbb_config, "TRACKER_LENGTH", 0)
+        mark = ReadMark.for_user(user, topic.forum_id)
+
+        assert not mark.is_unread(topic)
+        assert mark.unread_count() == 0
+
+
+class TestMigrateTrackers(object):
+    def test_converts_the_trackers(self, database, forum, topic, user, Fred):
+        read = Topic(title="read").save(forum=forum, user=user, post=Post(content="a"))
+        read.update_read(Fred, forum, None)
+        topic.update_read(user, forum, None)
+        calls = []
+
+        written = ReadMark.migrate_trackers(
+            batch_size=1, progress=lambda *args: calls.append(args)
+        )
+
+        assert written == 2
+        assert calls == [(1, 2), (2, 2)]
+        for reader in (user, Fred):
+            mark = ReadMark.for_user(reader, forum.id)
+            for t in (topic, read):
+                topicsread = TopicsRead.get_by(user_id=reader.id, topic_id=t.id)
+                assert mark.is_unread(t) == topic_is_unread(t, topicsread, reader)
+
+    def test_can_be_rerun(self, database, forum, topic, user):
+        topic.update_read(user, forum, None)
+
+        assert ReadMark.migrate_trackers() == 1
+        assert ReadMark.migrate_trackers() == 1
+        assert len(ReadMark.get_all(ReadMark.user_id == user.id)) == 1
+
+
+@pytest.fixture
+def readmarks(application, monkeypatch):
+    monkeypatch.setitem(application.config, "READ_TRACKER", "readmarks")
+
+
+@pytest.fixture
+def login_client(application, default_settings, readmarks, user, monkeypatch):
+    g.pop("forum", None)
+    monkeypatch.setattr(application, "test_client_class", FlaskLoginClient)
+    monkeypatch.setitem(application.config, "WTF_CSRF_ENABLED", False)
+    return application.test_client(user=user)
+
+
+@pytest.mark.usefixtures("readmarks")
+class TestReadMarksTracker(object):
+    def test_update_read_marks_the_forum_read(self, database, forum, topic, user):
+        mark = ReadMark.for_user(user, forum.id)
+        assert forum_is_unread(forum, mark, user)
+
+        assert topic.update_read(user, forum, mark)
+        assert not topic.update_read(user, forum, mark)
+
+        mark = ReadMark.for_user(user, forum.id)
+        assert mark.watermark == topic.last_updated
+        assert not topic_is_unread(topic, None, user, mark)
+        assert not forum_is_unread(forum, mark, user)
+        assert TopicsRead.get_all(TopicsRead.user_id == user.id) == []
+
+    def test_new_marks_are_upserted(self, database, forum, topic, user):
+        # the first topic of a forum is read in two requests at once
+        first = ReadMark.for_user(user, forum.id)
+        second = ReadMark.for_user(user, forum.id)
+        first.mark_forum_read()
+        second.mark_topic_read(topic)
+
+        first.save()
+        second.save()
+
+        mark = ReadMark.for_user(user, forum.id)
+        assert mark.watermark is None
+        assert set(mark.read_topics) == {topic.id}
+
+    def test_forum_is_unread_until_every_topic_is_read(
+        self, database, forum, topic, user
+    ):
+        other = Topic(title="other").save(
+            forum=forum, user=user, post=Post(content="other")
+        )
+        mark = ReadMark.for_user(user, forum.id)
+
+        other.update_read(user, forum, mark)
+        assert forum_is_unread(forum, mark, user)
+
+        topic.update_read(user, forum, mark)
+        assert not forum_is_unread(forum, mark, user)
+
+    def test_first_unread_post(self, database, forum, topic, user):
+        mark = ReadMark.for_user(user, forum.id)
+        topic.update_read(user, forum, mark)
+        post = Post(content="new").save(topic=topic, user=user)
+
+        forum, mark = Forum.get_forum(forum.id, user)
+        topics = Forum.get_topics(forum.id, user, forumsread=mark)
+
+        assert isinstance(mark, ReadMark)
+        assert [row[2] for row in topics.items] == [None]
+        assert topic.first_unread(None, user, mark).endswith(f"/post/{post.id}")
+
+    def test_categories_join_the_read_marks(self, database, forum, topic, user):
+        ReadMark.mark_read(user, forum.id)
+
+        forums = [
+            read
+            for _, category_forums in Category.get_all(user)
+            for _, read in category_forums
+        ]
+        _, category_forums = Category.get_forums(forum.category_id, user)
+
+        assert ReadMark.for_user(user, forum.id) in forums
+        assert [read for _, read in category_forums] == [
+            ReadMark.for_user(user, forum.id)
+        ]
+
+    def test_mark_all_read(self, database, forum, topic, user):
+        ReadMark.mark_all_read(user)
+
+        marks = ReadMark.get_all(ReadMark.user_id == user.id)
+        assert [mark.forum_id for mark in marks] == [forum.id]
+        assert not marks[0].is_unread(topic)
+        assert ForumsRead.get_all(ForumsRead.user_id == user.id) == []
+
+    def test_views_use_the_read_marks(self, login_client, database, forum, topic, user):
+        response = login_client.get(f"/forum/{forum.id}")
+        assert response.status_code == 200
+
+        response = login_client.get(f"/topic/{topic.id}")
+        assert response.status_code == 200
+        assert not ReadMark.for_user(user, forum.id).is_unread(topic)
+
+        response = login_client.get("/topictracker")
+        assert response.status_code == 200
+
+        post = Post(content="new").save(topic=topic, user=user)
+        response = login_client.post(url_for("forum.markread", forum_id=forum.id))
+        assert response.status_code == 302
+        mark = ReadMark.for_user(user, forum.id)
+        assert mark.watermark > post.date_created
+        assert TopicsRead.get_all(TopicsRead.user_id == user.id) == []
+        assert ForumsRead.get_all(ForumsRead.user_id == user.id) == []
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from flaskbb.forum.models import ForumsRead, TopicsRead
+from flaskbb.forum.trackers import TrackerPruner, prune_trackers
+from flaskbb.utils.helpers import time_utcnow
+from flaskbb.utils.settings import flaskbb_config
+
+
+def add_trackers(database, forum, topic, users, last_read, cleared=None):
+    database.session.execute(
+        database.insert(TopicsRead),
+        [
+            {
+                "user_id": user_id,
+                "topic_id": topic.id,
+                "forum_id": forum.id,
+                "last_read": last_read,
+            }
+            for user_id in users
+        ],
+    )
+    database.session.execute(
+        database.insert(ForumsRead),
+        [
+            {
+                "user_id": user_id,
+                "forum_id": forum.id,
+                "last_read": last_read,
+                "cleared": cleared,
+            }
+            for user_id in users
+        ],
+    )
+    database.session.commit()
+
+
+class TestTrackerPruner(object):
+    def test_deletes_expired_trackers_in_batches(self, database, forum, topic, mocker):
+        now = time_utcnow()
+        expired = now - timedelta(days=flaskbb_config["TRACKER_LENGTH"] + 1)
+        add_trackers(database, forum, topic, range(100, 105), expired)
+        add_trackers(database, forum, topic, [105], now)
+        # marked as read recently, the tracker is still needed
+        add_trackers(database, forum, topic, [106], expired, cleared=now)
+        pruner = TrackerPruner(batch_size=2, pause=0.5)
+        sleep = mocker.patch("flaskbb.forum.trackers.time.sleep")
+
+        report = pruner.prune()
+
+        assert report.deleted == {"topicsread": 6, "forumsread": 5}
+        assert report.total == 11
+        assert report.elapsed > 0
+        assert sleep.call_count == 5
+        assert [r.user_id for r in TopicsRead.get_all()] == [105]
+        assert sorted(r.user_id for r in ForumsRead.get_all()) == [105, 106]
+
+    def test_keeps_trackers_updated_while_pruning(self, database, forum, topic, mocker):
+        expired = time_utcnow() - timedelta(days=flaskbb_config["TRACKER_LENGTH"] + 1)
+        add_trackers(database, forum, topic, [100], expired)
+        execute = database.session.execute
+
+        def read_in_between(stmt, *args, **kwargs):
+            result = execute(stmt, *args, **kwargs)
+            if stmt.is_select:
+                execute(database.update(TopicsRead).values(last_read=time_utcnow()))
+            return result
+
+        mocker.patch.object(database.session, "execute", side_effect=read_in_between)
+        report = TrackerPruner().prune()
+        mocker.stopall()
+
+        assert report.deleted["topicsread"] == 0
+        assert TopicsRead.get_by(user_id=100) is not None
+
+    def test_disabled_tracker(self, database, forum, topic, monkeypatch):
+        add_trackers(database, forum, topic, [100], time_utcnow() - timedelta(days=999))
+        monkeypatch.setitem(flaskbb_config, "TRACKER_LENGTH", 0)
+
+        assert TrackerPruner().prune().total == 0
+        assert TopicsRead.get_by(user_id=100) is not None
+
+    def test_task(self, database, forum, topic):
+        add_trackers(database, forum, topic, [100], time_utcnow() - timedelta(days=999))
+
+        result = prune_trackers()
+
+        assert result["deleted"] == {"topicsread": 1, "forumsread": 1}
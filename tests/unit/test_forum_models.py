@@ -2,7 +2,7 @@ from datetime import UTC, datetime
 
 from flask import current_app
 from flask_login import current_user, login_user, logout_user
-from sqlalchemy import select
+from sqlalchemy import event, select
 
 from flaskbb.extensions import db
 from flaskbb.forum.models import (
@@ -299,6 +299,54 @@ def test_forum_get_topics(topic, user):
         assert topics.items == [(topic, topic.last_post, None)]
 
 
+def _read_topics(forum, topic, user, Fred):
+    """Returns a never visited, a read and a partially read topic."""
+    read = Topic(title="Read").save(forum=forum, user=user, post=Post(content="a"))
+    partially_read = Topic(title="Partially read").save(
+        forum=forum, user=user, post=Post(content="b")
+    )
+    read.update_read(Fred, forum, None)
+    partially_read.update_read(Fred, forum, None)
+    Post(content="c").save(topic=partially_read, user=user)
+    return topic, read, partially_read
+
+
+def test_topic_resolve_first_unread(forum, topic, user, Fred):
+    topics = _read_topics(forum, topic, user, Fred)
+
+    with current_app.test_request_context():
+        rows = [
+            (t, TopicsRead.get_by(topic_id=t.id, user_id=Fred.id), None) for t in topics
+        ]
+        expected = [t.first_unread(topicsread, Fred) for t, topicsread, _ in rows]
+
+        Topic.resolve_first_unread(rows, Fred)
+
+        assert [
+            t.first_unread(topicsread, Fred) for t, topicsread, _ in rows
+        ] == expected
+        assert expected == [
+            topic.first_post.url,
+            topics[1].url,
+            topics[2].last_post.url,
+        ]
+
+
+def test_forum_get_topics_resolves_first_unread_at_once(
+    count_queries, forum, topic, user, Fred
+):
+    _read_topics(forum, topic, user, Fred)
+
+    with current_app.test_request_context(), count_queries() as statements:
+        topics = Forum.get_topics(forum_id=forum.id, user=Fred)
+        queries = len(statements)
+        urls = [t.first_unread(topicsread, Fred) for t, _, topicsread in topics.items]
+
+    assert len(urls) == 3
+    assert len(statements) == queries
+    assert sum("min(posts.id)" in statement for statement in statements) == 1
+
+
 def test_topic_save(forum, user):
     """Test the save topic method with creating and editing a topic."""
     post = Post(content="Test Content")
@@ -490,6 +538,54 @@ def test_topic_update_read(database, user, topic):
         assert not topic.update_read(current_user, topic.forum, forumsread)
 
 
+def test_topic_update_read_commits_once(database, count_queries, user, topic_moderator):
+    topic = topic_moderator
+    commits = []
+
+    def commit(conn):
+        commits.append(conn)
+
+    event.listen(database.engine, "commit", commit)
+    try:
+        with count_queries() as statements:
+            assert topic.update_read(user, topic.forum, None)
+        assert len(commits) == 1
+        # the tracker isn't selected before it is written
+        assert not any(
+            s.lstrip().startswith("SELECT") and "FROM topicsread" in s
+            for s in statements
+        )
+
+        del commits[:]
+        assert not topic.update_read(user, topic.forum, None)
+        assert len(commits) == 0
+    finally:
+        event.remove(database.engine, "commit", commit)
+
+    forumsread = ForumsRead.get_by(user_id=user.id, forum_id=topic.forum_id)
+    assert forumsread is not None
+
+
+def test_topic_update_read_keeps_the_session_if_nothing_changed(
+    count_queries, user, topic_moderator
+):
+    topic = topic_moderator
+    assert topic.update_read(user, topic.forum, None)
+    user.id
+    topic.forum.title
+    topic.last_post.date_created
+    topic.title = "pending"
+
+    with count_queries() as statements:
+        assert not topic.update_read(user, topic.forum, None)
+        # nothing has been expired or rolled back
+        assert topic.title == "pending"
+        topic.forum.title
+
+    assert not [s for s in statements if s.lstrip().startswith("SELECT")]
+    assert TopicsRead.get_by(user_id=user.id, topic_id=topic.id) is not None
+
+
 def test_topic_url(topic):
     assert topic.url == "http://localhost:5000/topic/1-test-topic-normal"
 
@@ -584,6 +680,42 @@ def test_forumsread(topic, user):
     assert forumsread is None
 
 
+def test_forumsread_mark_read(database, topic, user):
+    topic.update_read(user, topic.forum, None)
+
+    ForumsRead.mark_read(user, topic.forum_id)
+    ForumsRead.mark_read(user, topic.forum_id)
+
+    forumsread = ForumsRead.get_by(user_id=user.id, forum_id=topic.forum_id)
+    assert forumsread.cleared == forumsread.last_read
+    assert TopicsRead.get_by(user_id=user.id) is None
+
+
+def test_forumsread_mark_all_read_in_constant_queries(
+    database, count_queries, forum, topic, user
+):
+    def mark_all_read():
+        with count_queries() as statements:
+            ForumsRead.mark_all_read(user)
+        return len(statements)
+
+    topic.update_read(user, forum, None)
+    queries = mark_all_read()
+    assert TopicsRead.get_by(user_id=user.id) is None
+
+    database.session.execute(
+        database.insert(Forum),
+        [
+            {"category_id": forum.category_id, "title": f"Forum {i}"}
+            for i in range(3000)
+        ],
+    )
+    database.session.commit()
+
+    assert mark_all_read() == queries
+    assert ForumsRead.count(ForumsRead.user_id == user.id, ForumsRead.forum_id) == 3001
+
+
 def test_topicsread(topic, user):
     """Tests if the topicsread tracker can be saved/edited and deleted with the
     implemented save and delete methods."""
@@ -99,3 +99,57 @@ def test_Fred_cannot_delete_others_post(Fred, topic, request_context):
 def test_Mod_can_delete_others_post(moderator_user, topic, request_context):
     push_onto_request_context(post=topic.first_post)
     assert r.CanDeletePost(moderator_user)
+
+
+def _check_topic_page(user, topic, posts):
+    for post in posts:
+        bool(r.can_post_reply(user, topic))
+        bool(r.can_edit_post(user, post))
+        bool(r.can_delete_topic(user, topic))
+        bool(r.can_edit_post(user, post))
+
+
+@pytest.mark.parametrize("user_fixture", ["user", "Fred", "moderator_user"])
+def test_topic_page_evaluates_forum_checks_once(
+    user_fixture, topic, request_context, mocker, request
+):
+    user = request.getfixturevalue(user_fixture)
+    push_onto_request_context(topic=topic)
+    for _ in range(19):
+        r.Post(content="Reply").save(user=topic.user, topic=topic)
+    posts = topic.posts.all()
+    assert len(posts) == 20
+    moderator = mocker.spy(r.IsModeratorInForum, "fulfill")
+    locked = mocker.spy(r.TopicNotLocked, "fulfill")
+
+    _check_topic_page(user, topic, posts[:5])
+    evaluations = moderator.call_count + locked.call_count
+    _check_topic_page(user, topic, posts)
+
+    assert moderator.call_count + locked.call_count == evaluations
+
+
+def test_requirements_are_not_remembered_across_requests(
+    Fred, topic, application, mocker
+):
+    locked = mocker.spy(r.TopicNotLocked, "fulfill")
+    for _ in range(2):
+        with application.test_request_context():
+            push_onto_request_context(topic=topic)
+            assert r.can_post_reply(Fred, topic)
+    assert locked.call_count == 2
+
+
+def test_Memoized_remembers_the_result_for_the_request(application, user, mocker):
+    requirement = mocker.Mock(return_value=True)
+    memoized = r.Memoized(requirement, "test")
+
+    with application.test_request_context():
+        assert memoized(user)
+        assert memoized(user)
+        assert requirement.call_count == 1
+        assert g.get(r.REQUIREMENTS_REQUEST_KEY)
+
+    assert r.REQUIREMENTS_REQUEST_KEY not in g
+    assert memoized(user)
+    assert requirement.call_count == 2
@@ -0,0 +1,141 @@
+from cachelib import NullCache
+from flask import g
+
+from flaskbb.extensions import cache
+from flaskbb.user.models import (
+    GROUPS_VERSION_REQUEST_KEY,
+    PERMISSION_BITS,
+    Group,
+    PermissionCache,
+    Permissions,
+)
+
+
+class TestPermissions(object):
+    def test_behaves_like_the_permissions_dict(self, admin_user):
+        expected = {}
+        for group in admin_user.groups:
+            for name in PERMISSION_BITS:
+                expected[name] = getattr(group, name) or expected.get(name, False)
+
+        permissions = admin_user.permissions
+        assert dict(permissions) == expected
+        assert permissions["admin"]
+        assert permissions.get("banned") is False
+
+    def test_has_is_a_bit_test(self, default_groups):
+        member = default_groups[3]
+        permissions = Permissions.from_groups([member])
+
+        assert permissions.bits == member.permission_bits
+        assert permissions.has("postreply")
+        assert not permissions.has("admin")
+        assert not permissions.has("unknown")
+
+    def test_groups_are_combined(self, default_groups):
+        member, banned = default_groups[3], default_groups[4]
+        permissions = Permissions.from_groups([member, banned])
+
+        assert permissions.has("banned")
+        assert permissions.has("posttopic")
+
+    def test_guest_permissions(self, default_groups, guest):
+        assert guest.permissions.has("guest")
+        assert not guest.permissions.has("postreply")
+
+    def test_excluded_permissions(self, admin_user):
+        permissions = admin_user.get_permissions(exclude={"admin", "banned"})
+
+        assert isinstance(permissions, Permissions)
+        assert not permissions.has("admin")
+        assert "admin" not in permissions
+        assert permissions.get("admin") is None
+        assert dict(permissions) == {
+            name: value
+            for name, value in admin_user.permissions.items()
+            if name not in ("admin", "banned")
+        }
+
+
+class TestPermissionCache(object):
+    def test_compiles_the_permissions_once(self, user, mocker):
+        permission_cache = PermissionCache()
+        groups = mocker.Mock(return_value=user.groups)
+
+        first = permission_cache.get(user.id, user.primary_group_id, groups)
+        second = permission_cache.get(user.id, user.primary_group_id, groups)
+
+        assert first is second
+        assert groups.call_count == 1
+
+    def test_invalidating_bumps_the_version(self, user, mocker):
+        permission_cache = PermissionCache()
+        groups = mocker.Mock(return_value=user.groups)
+        version = Group.get_version()
+
+        permission_cache.get(user.id, user.primary_group_id, groups)
+        user.invalidate_cache()
+        permission_cache.get(user.id, user.primary_group_id, groups)
+
+        assert Group.get_version() != version
+        assert groups.call_count == 2
+
+    def test_entries_expire(self, user, mocker):
+        permission_cache = PermissionCache(timeout=60)
+        groups = mocker.Mock(return_value=user.groups)
+        monotonic = mocker.patch("flaskbb.user.models.time.monotonic")
+
+        monotonic.return_value = 1000
+        permission_cache.get(user.id, user.primary_group_id, groups)
+        monotonic.return_value = 1059
+        permission_cache.get(user.id, user.primary_group_id, groups)
+        assert groups.call_count == 1
+
+        monotonic.return_value = 1061
+        permission_cache.get(user.id, user.primary_group_id, groups)
+        assert groups.call_count == 2
+
+    def test_not_cached_without_version_stamp(
+        self, application, user, mocker, monkeypatch
+    ):
+        monkeypatch.setitem(application.extensions["cache"], cache, NullCache())
+        permission_cache = PermissionCache()
+        groups = mocker.Mock(return_value=user.groups)
+
+        permission_cache.get(user.id, user.primary_group_id, groups)
+        permission_cache.get(user.id, user.primary_group_id, groups)
+
+        assert Group.get_version() is None
+        assert groups.call_count == 2
+
+    def test_least_recently_used_users_are_evicted(self, user, Fred, mocker):
+        permission_cache = PermissionCache(maxsize=1)
+        groups = mocker.Mock(return_value=user.groups)
+
+        permission_cache.get(user.id, user.primary_group_id, groups)
+        permission_cache.get(Fred.id, Fred.primary_group_id, groups)
+        permission_cache.get(user.id, user.primary_group_id, groups)
+
+        assert groups.call_count == 3
+
+    def test_version_is_fetched_once_per_request(self, application, mocker):
+        Group.get_version()
+        get = mocker.spy(cache, "get")
+
+        with application.test_request_context():
+            version = Group.get_version()
+            assert Group.get_version() == version
+            assert get.call_count == 1
+            assert g.get(GROUPS_VERSION_REQUEST_KEY) == version
+
+        assert GROUPS_VERSION_REQUEST_KEY not in g
+
+    def test_group_changes_are_visible_after_invalidating(self, user):
+        assert user.permissions.has("postreply")
+
+        group = user.primary_group
+        group.postreply = False
+        group.save()
+        Group.invalidate_cache()
+
+        assert not user.permissions.has("postreply")
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from flask import Flask
+
+from flaskbb.user.presence import LastseenWriter
+from flaskbb.utils.helpers import time_utcnow
+
+
+class TestLastseenWriter(object):
+    def test_touch_is_throttled(self, user):
+        writer = LastseenWriter()
+        now = time_utcnow()
+        user.lastseen = now - timedelta(seconds=10)
+
+        assert not writer.touch(user, now)
+        assert writer.pending() == {}
+
+        later = now + timedelta(minutes=5)
+        assert writer.touch(user, later)
+        # coalesced with the pending update
+        assert not writer.touch(user, later + timedelta(seconds=1))
+        assert writer.pending() == {user.id: later}
+
+    def test_flush_writes_all_users_in_one_statement(
+        self, database, count_queries, user, Fred
+    ):
+        writer = LastseenWriter()
+        now = time_utcnow() + timedelta(hours=1)
+        writer.touch(user, now)
+        writer.touch(Fred, now + timedelta(minutes=2))
+
+        with count_queries() as statements:
+            assert writer.flush() == 2
+
+        assert len([s for s in statements if s.startswith("UPDATE users")]) == 1
+        assert writer.pending() == {}
+        database.session.refresh(user)
+        database.session.refresh(Fred)
+        assert user.lastseen == now
+        assert Fred.lastseen == now + timedelta(minutes=2)
+
+    def test_flush_never_moves_lastseen_backwards(self, database, user):
+        writer = LastseenWriter()
+        now = time_utcnow()
+        user.lastseen = now + timedelta(hours=1)
+        user.save()
+
+        writer._lastseen[user.id] = now
+        writer.flush()
+
+        database.session.refresh(user)
+        assert user.lastseen == now + timedelta(hours=1)
+
+    def test_flush_does_not_commit_the_session(self, database, user):
+        writer = LastseenWriter()
+        now = time_utcnow() + timedelta(hours=1)
+        writer.touch(user, now)
+        user.email = "changed@example.org"
+
+        writer.flush()
+        database.session.rollback()
+
+        database.session.refresh(user)
+        assert user.lastseen == now
+        assert user.email != "changed@example.org"
+
+    def test_init_app_registers_exit_handler_once(self, mocker):
+        register = mocker.patch("flaskbb.utils.flushers.atexit.register")
+        writer = LastseenWriter()
+
+        writer.init_app(Flask(__name__))
+        writer.init_app(Flask(__name__))
+
+        register.assert_called_once_with(writer._flush_at_exit)
@@ -8,6 +8,7 @@ from flaskbb.core.exceptions import PersistenceError, StopValidation, Validation
 from flaskbb.core.user.update import PasswordUpdate
 from flaskbb.user.models import User
 from flaskbb.user.services.update import DefaultPasswordUpdateHandler
+from flaskbb.utils.passwords import PasswordHasherBusy, password_hasher
 
 
 class TestDefaultPasswordUpdateHandler(object):
@@ -30,6 +31,24 @@ class TestDefaultPasswordUpdateHandler(object):
         assert excinfo.value.reasons == [("new_password", "Don't use that password")]
         hook_impl.post_process_changeset.assert_not_called()
 
+    def test_raises_stop_validation_if_hasher_is_busy(
+        self, mocker, user, database, plugin_manager
+    ):
+        mocker.patch.object(password_hasher, "verify", side_effect=PasswordHasherBusy)
+        mocker.patch.object(password_hasher, "hash", side_effect=PasswordHasherBusy)
+        validator = mocker.Mock(spec=ChangeSetValidator)
+        validator.validate.side_effect = lambda model, changeset: model.check_password(
+            changeset.old_password
+        )
+        handler = DefaultPasswordUpdateHandler(
+            db=database, plugin_manager=plugin_manager, validators=[validator]
+        )
+
+        with pytest.raises(StopValidation) as excinfo:
+            handler.apply_changeset(user, PasswordUpdate("test", str(uuid4())))
+
+        assert [attr for attr, _ in excinfo.value.reasons] == ["new_password"]
+
     def test_raises_persistence_error_if_save_fails(self, mocker, user, plugin_manager):
         password_change = PasswordUpdate(str(uuid4()), str(uuid4()))
         db = mocker.Mock()
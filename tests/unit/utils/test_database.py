@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from flaskbb.forum.models import TopicsRead
+from flaskbb.utils.database import upsert
+from flaskbb.utils.helpers import time_utcnow
+
+
+@pytest.fixture(params=["sqlite", "other"])
+def dialect(request, database, monkeypatch):
+    """Runs the test with the native upsert and the fallback."""
+    if request.param != "sqlite":
+        monkeypatch.setattr(database.engine.dialect, "name", request.param)
+    return request.param
+
+
+def upsert_topicsread(topic, user, last_read, where=None):
+    return upsert(
+        TopicsRead,
+        {
+            "user_id": user.id,
+            "topic_id": topic.id,
+            "forum_id": topic.forum_id,
+            "last_read": last_read,
+        },
+        index_elements=["user_id", "topic_id", "forum_id"],
+        set_={"last_read": last_read},
+        where=where,
+    )
+
+
+class TestUpsert(object):
+    def test_inserts_and_updates(self, dialect, database, topic, user):
+        first = time_utcnow() - timedelta(hours=1)
+        assert upsert_topicsread(topic, user, first) == 1
+        database.session.commit()
+        assert TopicsRead.get_by(user_id=user.id).last_read == first
+
+        second = time_utcnow()
+        assert upsert_topicsread(topic, user, second) == 1
+        database.session.commit()
+        assert TopicsRead.get_by(user_id=user.id).last_read == second
+        assert TopicsRead.count(column=TopicsRead.user_id) == 1
+
+    def test_where_skips_the_update(self, dialect, database, topic, user):
+        read = time_utcnow()
+        upsert_topicsread(topic, user, read)
+
+        changed = upsert_topicsread(
+            topic, user, time_utcnow(), where=TopicsRead.last_read < read
+        )
+        database.session.commit()
+
+        assert changed == 0
+        assert TopicsRead.get_by(user_id=user.id).last_read == read
+
+    def test_retries_the_update_if_the_row_is_inserted_concurrently(
+        self, database, topic, user, monkeypatch
+    ):
+        monkeypatch.setattr(database.engine.dialect, "name", "other")
+        read = time_utcnow()
+        inserted = []
+
+        def insert_concurrently(conn, cursor, statement, *args):
+            # another transaction inserts the row right before the insert
+            if statement.startswith("SAVEPOINT") and not inserted:
+                inserted.append(statement)
+                conn.execute(
+                    TopicsRead.__table__.insert().values(
+                        user_id=user.id,
+                        topic_id=topic.id,
+                        forum_id=topic.forum_id,
+                        last_read=read - timedelta(hours=1),
+                    )
+                )
+
+        event.listen(database.engine, "before_cursor_execute", insert_concurrently)
+        try:
+            assert upsert_topicsread(topic, user, read) == 1
+            database.session.commit()
+        finally:
+            event.remove(database.engine, "before_cursor_execute", insert_concurrently)
+
+        assert inserted
+        assert TopicsRead.get_by(user_id=user.id).last_read == read
@@ -1,6 +1,16 @@
 from flask import current_app
 
-from flaskbb.markup import DEFAULT_PLUGINS, FlaskBBRenderer, make_renderer
+from flaskbb.forum.models import Post
+from flaskbb.markup import (
+    DEFAULT_PLUGINS,
+    FlaskBBRenderer,
+    LocalRenderCache,
+    MarkupCache,
+    get_lexer,
+    make_renderer,
+    renderer_config_hash,
+)
+from flaskbb.utils.helpers import time_utcnow
 
 markdown = make_renderer([FlaskBBRenderer], DEFAULT_PLUGINS)
 
@@ -38,3 +48,87 @@ print("Hello World")
     bad_language_render = markdown(bad_language)
     assert "<pre>" in bad_language_render
     assert "highlight" not in bad_language_render
+
+
+class TestMarkupCache(object):
+    def make_cache(self):
+        calls = []
+
+        def renderer(text):
+            calls.append(text)
+            return markdown(text)
+
+        return MarkupCache(renderer, "test", LocalRenderCache()), calls
+
+    def test_post_is_only_rendered_once(self, topic):
+        markup_cache, calls = self.make_cache()
+        post = topic.first_post
+
+        first = markup_cache.render_post(post)
+        assert markup_cache.render_post(post) == first
+        assert calls == [post.content]
+
+    def test_edited_post_is_rendered_again(self, topic):
+        markup_cache, calls = self.make_cache()
+        post = topic.first_post
+        markup_cache.render_post(post)
+
+        post.content = "Edited **content**"
+        post.date_modified = time_utcnow()
+        assert "<strong>content</strong>" in markup_cache.render_post(post)
+        assert len(calls) == 2
+
+    def test_changed_signature_is_rendered_again(self, user):
+        markup_cache, calls = self.make_cache()
+        user.signature = "first"
+        markup_cache.render_signature(user)
+        markup_cache.render_signature(user)
+
+        user.signature = "second"
+        assert "second" in markup_cache.render_signature(user)
+        assert calls == ["first", "second"]
+
+    def test_local_cache_is_bounded(self):
+        backend = LocalRenderCache(maxsize=2)
+        for key in ("a", "b", "c"):
+            backend.set(key, key)
+
+        assert backend.get("a") is None
+        assert backend.get("c") == "c"
+
+    def test_config_hash_depends_on_plugins(self):
+        plugins = DEFAULT_PLUGINS[:]
+        config_hash = renderer_config_hash([FlaskBBRenderer], plugins)
+
+        assert config_hash == renderer_config_hash([FlaskBBRenderer], plugins)
+        assert config_hash != renderer_config_hash([FlaskBBRenderer], plugins[:-1])
+
+    def test_post_is_rendered_on_save(self, application, topic, user):
+        markup_cache = application.extensions["markup_cache"]
+        post = Post(content="Warm **me** up")
+        post.save(user=user, topic=topic)
+
+        stamp, html = markup_cache.backend.get(markup_cache.key("post", post.id))
+        assert stamp == post.date_created.isoformat()
+        assert "<strong>me</strong>" in html
+
+
+def test_highlighting_reuses_lexers():
+    get_lexer.cache_clear()
+    code = """
+```python
+print("Hello World")
+```
+"""
+    first = markdown(code)
+    assert markdown(code) == first
+    assert get_lexer.cache_info().hits == 1
+    assert get_lexer.cache_info().misses == 1
+
+
+def test_large_code_blocks_are_not_highlighted():
+    code = "x = 1\n" * (FlaskBBRenderer.max_highlight_size // 6 + 1)
+    result = markdown(f"```python\n{code}```\n")
+
+    assert "highlight" not in result
+    assert "<pre><code>" in result
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from flaskbb.utils import passwords
+from flaskbb.utils.passwords import PasswordHasher, PasswordHasherBusy
+
+
+class TestPasswordHasher(object):
+    def test_hash_and_verify(self):
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000")
+        pwhash = hasher.hash("secret")
+
+        assert pwhash.startswith("pbkdf2:sha256:1000$")
+        assert hasher.verify(pwhash, "secret")
+        assert not hasher.verify(pwhash, "not secret")
+
+    def test_method_is_normalized(self):
+        hasher = PasswordHasher(method="scrypt")
+
+        assert hasher.method == "scrypt:32768:8:1"
+        assert not hasher.needs_rehash(hasher.hash("secret"))
+
+    @pytest.mark.parametrize(
+        "method,salt_length",
+        [
+            ("pbkdf2:sha256:2000", 16),
+            ("scrypt:16384:8:1", 16),
+            ("pbkdf2:sha256:1000", 8),
+        ],
+    )
+    def test_needs_rehash_if_parameters_changed(self, method, salt_length):
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000")
+
+        assert hasher.needs_rehash(
+            generate_password_hash("secret", method, salt_length)
+        )
+
+    def test_dummy_hash_is_computed_once(self, mocker):
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000")
+        hasher.dummy_hash
+        generate = mocker.spy(passwords, "generate_password_hash")
+        check = mocker.spy(passwords, "check_password_hash")
+
+        assert not hasher.verify_dummy("secret")
+        assert not hasher.verify_dummy("secret")
+
+        assert generate.call_count == 0
+        check.assert_called_with(hasher.dummy_hash, "secret")
+
+    def test_hashes_on_the_workers(self):
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=2)
+        pwhash = hasher.hash("secret")
+
+        assert hasher.verify(pwhash, "secret")
+
+    @pytest.mark.parametrize("timeout", [0, 0.01])
+    def test_raises_busy_if_the_queue_is_full(self, monkeypatch, timeout):
+        hasher = PasswordHasher(
+            method="pbkdf2:sha256:1000", workers=1, queue_size=0, timeout=timeout
+        )
+        started, release = threading.Event(), threading.Event()
+
+        def slow_check(pwhash, password):
+            started.set()
+            release.wait(5)
+            return True
+
+        monkeypatch.setattr(passwords, "check_password_hash", slow_check)
+        thread = threading.Thread(target=hasher.verify, args=("hash", "secret"))
+        thread.start()
+        try:
+            started.wait(5)
+            with pytest.raises(PasswordHasherBusy):
+                hasher.verify("hash", "secret")
+        finally:
+            release.set()
+            thread.join()
+
+        assert hasher.verify("hash", "secret")
@@ -0,0 +1,128 @@
+import pytest
+
+from flaskbb.extensions import cache, db
+from flaskbb.forum.models import Forum, Post, Topic
+from flaskbb.utils.queries import KeysetPagination, approximate_count, paginate
+
+
+@pytest.fixture
+def topics(forum, user):
+    topics = []
+    for i in range(25):
+        topic = Topic(title=f"Topic {i}")
+        topic.important = i % 7 == 0
+        topics.append(topic.save(forum=forum, user=user, post=Post(content="Test")))
+    return topics
+
+
+def topic_page(forum, page, cursor=None, total=None):
+    return paginate(
+        db.select(Topic).where(Topic.forum_id == forum.id),
+        page=page,
+        per_page=10,
+        keys=[Topic.important, Topic.last_updated, Topic.id],
+        descending=True,
+        cursor=cursor,
+        total=total,
+    )
+
+
+class TestKeysetPagination(object):
+    def test_cursors_lead_to_the_same_pages_as_offsets(self, forum, topics):
+        first = topic_page(forum, 1)
+        assert isinstance(first, KeysetPagination)
+        assert first.total == 25
+        assert first.prev_cursor is None
+
+        second = topic_page(forum, 2, cursor=first.next_cursor)
+        assert second.items == topic_page(forum, 2).items
+
+        third = topic_page(forum, 3, cursor=second.next_cursor)
+        assert len(third.items) == 5
+        assert third.next_cursor is None
+
+        back = topic_page(forum, 2, cursor=third.prev_cursor)
+        assert back.items == second.items
+        assert topic_page(forum, 1, cursor=back.prev_cursor).items == first.items
+
+        seen = [row[0].id for page in (first, second, third) for row in page.items]
+        assert sorted(seen) == sorted(topic.id for topic in topics)
+
+    def test_important_topics_come_first(self, forum, topics):
+        first = topic_page(forum, 1)
+        important = [topic for (topic,) in first.items if topic.important]
+        assert [topic for (topic,) in first.items[: len(important)]] == important
+
+    def test_cursor_for_another_page_is_ignored(self, forum, topics):
+        first = topic_page(forum, 1)
+        # the cursor leads to page 2, page 3 is loaded with an offset
+        third = topic_page(forum, 3, cursor=first.next_cursor)
+        assert third.items == topic_page(forum, 3).items
+
+    def test_invalid_cursor_is_ignored(self, forum, topics):
+        second = topic_page(forum, 2, cursor="not-a-cursor")
+        assert second.items == topic_page(forum, 2).items
+
+    def test_total_skips_count_query(self, count_queries, forum, topics):
+        total = forum.topic_count
+        with count_queries() as statements:
+            page = topic_page(forum, 1, total=total)
+
+        assert page.total == 25
+        assert page.pages == 3
+        assert len(statements) == 1
+
+
+def test_forum_get_topics_seeks_with_cursor(forum, topics, user, request_context):
+    first = Forum.get_topics(forum_id=forum.id, user=user, per_page=10)
+    second = Forum.get_topics(
+        forum_id=forum.id, user=user, page=2, per_page=10, cursor=first.next_cursor
+    )
+
+    assert first.total == 25
+    assert second.items == Forum.get_topics(forum.id, user, page=2, per_page=10).items
+    assert {row[0].id for row in first.items}.isdisjoint(
+        {row[0].id for row in second.items}
+    )
+
+
+class TestPaginateTotal(object):
+    def test_callable_total_replaces_count_query(self, database, forum, topics):
+        calls = []
+
+        def total():
+            calls.append(True)
+            return 25
+
+        stmt = db.select(Topic).where(Topic.forum_id == forum.id).order_by(Topic.id)
+        page = paginate(stmt, page=1, per_page=10, total=total)
+
+        assert page.total == 25
+        assert page.pages == 3
+        assert calls == [True]
+
+    def test_approximate_count_is_cached(
+        self, application, database, forum, topics, monkeypatch
+    ):
+        monkeypatch.setitem(application.config, "COUNT_CACHE_TIMEOUT", 60)
+        stmt = db.select(Topic).where(Topic.forum_id == forum.id)
+        key = f"test-topics/{forum.id}"
+        cache.delete(f"count/{key}")
+
+        assert approximate_count(stmt, key) == 25
+        topics[0].delete()
+        # still the cached count
+        assert approximate_count(stmt, key) == 25
+
+        cache.delete(f"count/{key}")
+        assert approximate_count(stmt, key) == 24
+
+
+def test_user_all_posts_uses_post_count(topic, user, request_context):
+    user.post_count = 42
+    user.save()
+
+    posts = user.all_posts(page=1, viewer=user)
+
+    assert posts.items == [topic.first_post]
+    assert posts.total == 42
@@ -0,0 +1,421 @@
+import os
+import tempfile
+
+import pytest
+from flask import Flask
+from flask_whooshee import Whooshee
+from sqlalchemy import inspect
+
+from flaskbb.extensions import cache
+from flaskbb.forum.models import Forum, Post, Topic
+from flaskbb.utils.search import (
+    PostWhoosheer,
+    SearchIndexQueue,
+    SearchReindexer,
+    SearchResultCache,
+    SearchService,
+    UserWhoosheer,
+    whoosheers,
+)
+from flaskbb.utils.search_backends import DatabaseBackend, WhooshDocumentWriter
+
+
+@pytest.fixture(autouse=True)
+def index_dir(application, tmp_path, monkeypatch):
+    """Gives every test its own directory for the indexes and for the
+    temporary files of the whoosh writers, which would otherwise be
+    shared by all test workers."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setitem(
+        application.extensions["whooshee"], "index_path_root", str(tmp_path)
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def index_queue(application):
+    queue = SearchIndexQueue()
+    indexes = application.extensions["whooshee"]["whoosheers_indexes"]
+    for wh in (PostWhoosheer, UserWhoosheer):
+        indexes.pop(wh, None)
+        queue.register(wh)
+    yield queue
+    for wh in (PostWhoosheer, UserWhoosheer):
+        queue.unregister(wh)
+        indexes.pop(wh, None)
+
+
+def indexed_ids(application, wh, field):
+    index = Whooshee.get_or_create_index(application, wh)
+    with index.searcher() as searcher:
+        return sorted(doc[field] for doc in searcher.all_stored_fields())
+
+
+class TestSearchIndexQueue(object):
+    def test_changes_are_indexed_after_commit(
+        self, application, index_queue, topic, user
+    ):
+        post = Post(content="Second post")
+        post.save(user=user, topic=topic)
+
+        assert index_queue.pending() == 0
+        assert indexed_ids(application, PostWhoosheer, "post_id") == [
+            topic.first_post.id,
+            post.id,
+        ]
+
+        post.delete()
+        assert indexed_ids(application, PostWhoosheer, "post_id") == [
+            topic.first_post.id
+        ]
+
+    def test_changes_are_queued_if_async(
+        self, application, user, index_queue, monkeypatch
+    ):
+        monkeypatch.setitem(application.config, "SEARCH_INDEX_ASYNC", True)
+        user.email = "changed@example.org"
+        user.save()
+
+        assert index_queue.pending() == 1
+        assert indexed_ids(application, UserWhoosheer, "user_id") == []
+        assert index_queue.stats()["lag"] >= 0
+
+        assert index_queue.flush() == 1
+        assert index_queue.pending() == 0
+        assert indexed_ids(application, UserWhoosheer, "user_id") == [user.id]
+
+    def test_rolled_back_changes_are_dropped(
+        self, application, database, index_queue, user, monkeypatch
+    ):
+        monkeypatch.setitem(application.config, "SEARCH_INDEX_ASYNC", True)
+        user.email = "changed@example.org"
+        database.session.flush()
+        database.session.rollback()
+
+        assert index_queue.pending() == 0
+
+    def test_batches_are_deduplicated(self, application, user, index_queue, mocker):
+        for _ in range(5):
+            index_queue.add("user", user.id)
+        update = mocker.spy(WhooshDocumentWriter, "update")
+
+        assert index_queue.flush(batch_size=10) == 1
+        assert update.call_count == 1
+        assert index_queue.stats()["batches"] == 1
+
+    def test_missing_rows_are_deleted(self, application, index_queue, user):
+        index_queue.add("user", user.id)
+        index_queue.flush()
+        assert indexed_ids(application, UserWhoosheer, "user_id") == [user.id]
+
+        # the row is gone, even though the change was an update
+        index_queue.add("user", user.id + 1000)
+        index_queue.add("user", user.id, "delete")
+        index_queue.flush()
+        assert indexed_ids(application, UserWhoosheer, "user_id") == []
+
+    def test_batch_is_restored_if_flush_fails(
+        self, application, index_queue, user, mocker
+    ):
+        index_queue.add("user", user.id)
+        mocker.patch.object(
+            WhooshDocumentWriter, "update", side_effect=RuntimeError("locked")
+        )
+        with pytest.raises(RuntimeError):
+            index_queue.flush()
+        mocker.stopall()
+
+        assert index_queue.pending() == 1
+        assert index_queue.flush() == 1
+
+
+@pytest.fixture
+def posts(topic, user):
+    return [topic.first_post] + [
+        Post(content=f"Post {i}").save(user=user, topic=topic) for i in range(6)
+    ]
+
+
+@pytest.fixture
+def reindexer(application, tmp_path):
+    application.extensions["whooshee"]["whoosheers_indexes"].pop(PostWhoosheer, None)
+    yield SearchReindexer(
+        {"post": PostWhoosheer},
+        checkpoint=str(tmp_path / "reindex.json"),
+        chunk_size=2,
+        commit_every=4,
+    )
+    application.extensions["whooshee"]["whoosheers_indexes"].pop(PostWhoosheer, None)
+
+
+class TestSearchReindexer(object):
+    def test_reindex_streams_all_rows(self, application, posts, reindexer):
+        calls = []
+
+        indexed = reindexer.run(progress=lambda *args: calls.append(args))
+
+        assert indexed == {"post": 7}
+        assert indexed_ids(application, PostWhoosheer, "post_id") == sorted(
+            post.id for post in posts
+        )
+        assert calls == [("post", 0, 7), ("post", 2, 7), ("post", 4, 7)] + [
+            ("post", 6, 7),
+            ("post", 7, 7),
+        ]
+        assert reindexer.load_checkpoint() == {}
+
+    def test_reindex_since_id(self, application, posts, reindexer):
+        reindexer.run()
+        posts[-1].content = "changed"
+        posts[-1].save()
+
+        assert reindexer.run(since_id=posts[-3].id) == {"post": 2}
+        # the older documents are kept
+        assert indexed_ids(application, PostWhoosheer, "post_id") == sorted(
+            post.id for post in posts
+        )
+
+    def test_reindex_resumes_from_checkpoint(self, application, posts, reindexer):
+        def crash(name, indexed, total):
+            if indexed == 6:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            reindexer.run(progress=crash)
+
+        # the first commit happened after 4 rows
+        assert reindexer.load_checkpoint() == {"post": posts[3].id}
+        assert reindexer.run() == {"post": 3}
+        assert indexed_ids(application, PostWhoosheer, "post_id") == sorted(
+            post.id for post in posts
+        )
+
+    def test_reindex_keeps_the_checkpoints_of_other_models(
+        self, application, posts, reindexer
+    ):
+        reindexer.whoosheers["user"] = UserWhoosheer
+        reindexer.save_checkpoint({"user": 5})
+
+        reindexer.run(["post"])
+
+        assert reindexer.load_checkpoint() == {"user": 5}
+        reindexer.run(["user"])
+        assert not os.path.exists(reindexer.checkpoint)
+
+
+@pytest.fixture
+def search_index(application, posts, default_groups, category, user):
+    """Indexes the posts and a topic in a forum only admins can access."""
+    admin_forum = Forum(title="Admins", category_id=category.id)
+    admin_forum.groups = [default_groups[0]]
+    admin_forum.save(groups=admin_forum.groups)
+    secret = Topic(title="Secret").save(
+        forum=admin_forum, user=user, post=Post(content="Post secret")
+    )
+
+    indexes = application.extensions["whooshee"]["whoosheers_indexes"]
+    indexes.pop(PostWhoosheer, None)
+    SearchReindexer({"post": PostWhoosheer}).run()
+    yield secret
+    indexes.pop(PostWhoosheer, None)
+
+
+class TestSearchService(object):
+    def test_results_are_ranked_and_paginated(self, search_index, posts, user):
+        service = SearchService()
+        ranked = [
+            post_id
+            for post_id, _ in service.hits("post", "Post")
+            if post_id != search_index.first_post.id
+        ]
+
+        first = service.search("Post", ["post"], viewer=user, per_page=4)["post"]
+        second = service.search("Post", ["post"], viewer=user, page=2, per_page=4)
+
+        assert first.total == 6
+        assert [post.id for post in first.items] == ranked[:4]
+        assert [post.id for post in second["post"].items] == ranked[4:]
+        assert set(first.scores) >= set(ranked)
+
+    def test_hidden_and_inaccessible_results_are_filtered(
+        self, database, search_index, posts, user, Fred
+    ):
+        posts[1].hidden = True
+        database.session.commit()
+
+        results = SearchService().search("Post", ["post"], viewer=user, per_page=20)
+        ids = {post.id for post in results["post"].items}
+
+        assert posts[1].id not in ids
+        assert search_index.first_post.id not in ids
+        assert len(ids) == 5
+
+    def test_page_is_loaded_with_constant_queries(
+        self, count_queries, search_index, posts, user
+    ):
+        # the groups and permissions of the viewer are already loaded
+        user.groups, user.permissions
+        with count_queries() as statements:
+            page = SearchService().search("Post", ["post"], viewer=user)["post"]
+            for post in page.items:
+                post.user.username
+
+        assert len(page.items) == 6
+        # the visible ids and the page
+        assert len(statements) == 2
+
+
+@pytest.fixture
+def result_cache(application, monkeypatch):
+    monkeypatch.setitem(application.config, "TESTING", False)
+    monkeypatch.setitem(application.config, "SEARCH_CACHE_TIMEOUT", 60)
+    cache.clear()
+    yield SearchResultCache()
+    cache.clear()
+
+
+class TestSearchResultCache(object):
+    def test_repeated_searches_are_cached(
+        self, search_index, posts, user, result_cache, mocker
+    ):
+        service = SearchService(cache=result_cache)
+        hits = mocker.spy(service, "hits")
+
+        first = service.search("Post", ["post"], viewer=user)["post"]
+        # normalised to the same query
+        second = service.search("  post ", ["post"], viewer=user)["post"]
+
+        assert hits.call_count == 1
+        assert [p.id for p in first.items] == [p.id for p in second.items]
+        assert result_cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_cache_is_keyed_by_the_permissions(
+        self, search_index, posts, user, admin_user, result_cache
+    ):
+        service = SearchService(cache=result_cache)
+
+        user_results = service.search("Post", ["post"], viewer=user)["post"]
+        admin_results = service.search("Post", ["post"], viewer=admin_user)["post"]
+
+        assert result_cache.stats() == {"hits": 0, "misses": 2}
+        assert admin_results.total == user_results.total + 1
+
+    def test_concurrent_bumps_are_not_lost(self, result_cache, mocker):
+        # both bumps read the generation before either of them wrote it
+        mocker.patch.object(result_cache, "generation", return_value=0)
+
+        result_cache.bump("post")
+        result_cache.bump("post")
+
+        assert cache.get("search-generation/post") == 2
+
+    def test_indexing_invalidates_the_results(
+        self, application, search_index, posts, user, result_cache, mocker
+    ):
+        service = SearchService(cache=result_cache)
+        service.search("Post", ["post"], viewer=user)
+
+        queue = SearchIndexQueue()
+        queue.whoosheers["post"] = (PostWhoosheer, Post)
+        mocker.patch("flaskbb.utils.search.search_result_cache", result_cache)
+        queue.add("post", posts[0].id)
+        queue.flush()
+
+        service.search("Post", ["post"], viewer=user)
+        assert result_cache.stats() == {"hits": 0, "misses": 2}
+
+    def test_disabled_while_testing(self, application, search_index, user):
+        result_cache = SearchResultCache()
+        SearchService(cache=result_cache).search("Post", ["post"], viewer=user)
+
+        assert not result_cache.enabled
+        assert result_cache.stats() == {"hits": 0, "misses": 0}
+
+
+@pytest.fixture
+def database_backend(application, database, monkeypatch):
+    backend = DatabaseBackend()
+    monkeypatch.setitem(application.extensions, "search_backend", backend)
+    backend.create_indexes(whoosheers)
+    backend.clear(PostWhoosheer)
+    yield backend
+    backend.clear(PostWhoosheer)
+
+
+class TestDatabaseBackend(object):
+    def test_tables_are_only_created_if_configured(
+        self, application, database, monkeypatch
+    ):
+        assert "search_post" not in inspect(database.engine).get_table_names()
+
+        monkeypatch.setitem(application.extensions, "search_backend", DatabaseBackend())
+        database.create_all()
+
+        assert "search_post" in inspect(database.engine).get_table_names()
+
+    def test_reindex_and_search(self, database_backend, search_index, posts, user):
+        SearchReindexer({"post": PostWhoosheer}).run()
+
+        results = SearchService().search("pos", ["post"], viewer=user)["post"]
+
+        assert {post.id for post in results.items} == {post.id for post in posts[1:]}
+        hits = database_backend.search(PostWhoosheer, "secret", 10)
+        assert [obj_id for obj_id, _ in hits] == [search_index.first_post.id]
+
+    def test_documents_are_updated_and_deleted(self, database_backend, user, posts):
+        queue = SearchIndexQueue()
+        queue.whoosheers["post"] = (PostWhoosheer, Post)
+        for post in posts:
+            queue.add("post", post.id)
+        queue.flush()
+
+        posts[1].content = "a needle in the haystack"
+        posts[1].save()
+        queue.add("post", posts[1].id)
+        posts[2].delete()
+        queue.add("post", posts[2].id, "delete")
+        queue.flush()
+
+        ids = {
+            obj_id for obj_id, _ in database_backend.search(PostWhoosheer, "Post", 10)
+        }
+        assert ids == {post.id for post in posts[3:]}
+        assert [
+            obj_id for obj_id, _ in database_backend.search(PostWhoosheer, "needle", 10)
+        ] == [posts[1].id]
+
+    def test_postgresql_statements(self, mocker):
+        backend = DatabaseBackend()
+
+        assert backend.schema("postgresql", PostWhoosheer) == [
+            "CREATE TABLE IF NOT EXISTS search_post "
+            "(id INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS ix_search_post_document "
+            "ON search_post USING GIN (document)",
+        ]
+
+        stmt, params = backend._postgresql_search("search_post", ["foo", "bar"], 5)
+        assert stmt == (
+            "SELECT id, ts_rank(document, query) AS score FROM search_post, "
+            "to_tsquery(CAST(:config AS regconfig), :query) query "
+            "WHERE document @@ query ORDER BY score DESC LIMIT :limit"
+        )
+        assert params == {"config": "simple", "query": "foo:* | bar:*", "limit": 5}
+
+        conn = mocker.Mock()
+        document = {"post_id": 1, "username": "a", "modified_by": "b", "content": "c"}
+        backend._postgresql_insert(conn, PostWhoosheer, "search_post", [document])
+        stmt, rows = conn.execute.call_args.args
+        assert str(stmt) == (
+            "INSERT INTO search_post (id, document) "
+            "VALUES (:id, to_tsvector(CAST(:config AS regconfig), :document)) "
+            "ON CONFLICT (id) DO UPDATE SET document = excluded.document"
+        )
+        assert rows == [{"id": 1, "config": "simple", "document": "c b a"}]
+
+    def test_unsupported_database_is_rejected(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "mysql://flaskbb@localhost/flaskbb"
+
+        with pytest.raises(RuntimeError):
+            DatabaseBackend(app)
@@ -1,3 +1,8 @@
+from cachelib import NullCache
+from flask import g
+
+from flaskbb.extensions import cache
+from flaskbb.management.models import Setting
 from flaskbb.utils.settings import FlaskBBConfig
 
 
@@ -12,3 +17,59 @@ def test_flaskbb_config(default_settings):
     assert flaskbb_config["PROJECT_TITLE"] == "FlaskBBTest"
     # test __iter__
     assert "PROJECT_TITLE" in list(flaskbb_config.__iter__())
+
+
+def test_flaskbb_config_reloads_snapshot_on_version_change(default_settings):
+    flaskbb_config = FlaskBBConfig()
+
+    assert flaskbb_config["PROJECT_TITLE"] == "FlaskBB"
+    reloads = flaskbb_config.snapshot.reloads
+
+    # unchanged version - served from the process local snapshot
+    assert flaskbb_config["PROJECT_TITLE"] == "FlaskBB"
+    assert flaskbb_config.snapshot.reloads == reloads
+
+    old_version = Setting.get_version()
+    Setting.update({"project_title": "FlaskBBTest"})
+    assert Setting.get_version() != old_version
+
+    assert flaskbb_config["PROJECT_TITLE"] == "FlaskBBTest"
+    assert flaskbb_config.snapshot.reloads == reloads + 1
+
+
+def test_flaskbb_config_fetches_once_per_request(application, default_settings):
+    flaskbb_config = FlaskBBConfig()
+
+    with application.test_request_context():
+        fetches = flaskbb_config.snapshot.fetches
+        for _ in range(10):
+            assert flaskbb_config["PROJECT_TITLE"] == "FlaskBB"
+
+        assert flaskbb_config.snapshot.fetches == fetches + 1
+        assert g.flaskbb_settings_fetches == 1
+        assert g.flaskbb_settings_lookups == 10
+
+        # changing the settings drops the memoized settings of the request
+        flaskbb_config["PROJECT_TITLE"] = "FlaskBBTest"
+        assert flaskbb_config["PROJECT_TITLE"] == "FlaskBBTest"
+        assert g.flaskbb_settings_fetches == 2
+
+
+def test_flaskbb_config_reloads_without_shared_cache(
+    application, default_settings, monkeypatch
+):
+    monkeypatch.setitem(application.extensions["cache"], cache, NullCache())
+    flaskbb_config = FlaskBBConfig()
+
+    assert Setting.get_version() is None
+    assert flaskbb_config["PROJECT_TITLE"] == "FlaskBB"
+    Setting.update({"project_title": "FlaskBBTest"})
+    assert flaskbb_config["PROJECT_TITLE"] == "FlaskBBTest"
+
+    with application.test_request_context():
+        reloads = flaskbb_config.snapshot.reloads
+        for _ in range(3):
+            assert flaskbb_config["PROJECT_TITLE"] == "FlaskBBTest"
+
+        assert flaskbb_config.snapshot.reloads == reloads + 1
+        assert g.flaskbb_settings_reloads == 1